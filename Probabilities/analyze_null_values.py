@@ -1,167 +1,401 @@
 #!/usr/bin/env python3
 """
 Script to analyze null values in NASA Power API data
-Shows data completeness and missing values for a specific location and time range
+Shows data completeness and missing values for one location, or audits many locations at once:
+downloads run concurrently (one per Power grid cell), decoding and counting run in a process pool,
+and the aggregated report can be written as JSON or CSV
 """
 
-import requests
-import json
-from collections import defaultdict
+import argparse
+import csv
 import datetime
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import requests
+
+try:
+    from .power_session import get_shared_session, power_base_url
+    from .power_grid import MERRA2_GRID
+    from .data_quality import quality_masks
+except ImportError:
+    # Allow running this file directly as a script from the Probabilities directory
+    from power_session import get_shared_session, power_base_url
+    from power_grid import MERRA2_GRID
+    from data_quality import quality_masks
+
+
+# Parameters to analyze
+DEFAULT_PARAMETERS = ['T2M', 'T2M_MAX', 'T2M_MIN', 'PRECTOTCORR', 'WS2M', 'RH2M', 'T2MWET']
+
+# Example locations analyzed when none are given
+EXAMPLE_LOCATIONS = [
+    {"name": "Austin, Texas", "longitude": -97.1384, "latitude": 30.2672},
+    {"name": "New York City", "longitude": -74.0060, "latitude": 40.7128},
+    {"name": "London, UK", "longitude": -0.1276, "latitude": 51.5074},
+    {"name": "Tokyo, Japan", "longitude": 139.6917, "latitude": 35.6895}
+]
+
+# Columns of the CSV report, one row per (location, parameter)
+CSV_FIELDS = ['name', 'latitude', 'longitude', 'cell_latitude', 'cell_longitude', 'parameter',
+              'total_entries', 'valid_count', 'null_count', 'zero_count', 'fill_count', 'implausible_count',
+              'null_percentage', 'valid_percentage', 'zero_percentage', 'completeness', 'min', 'max', 'mean', 'error']
+
+NULL_STRINGS = frozenset(['null', 'none', 'nan', ''])
+
+
+def build_url(longitude: float, latitude: float, start_year: int, end_year: int, parameters: List[str]) -> str:
+    """Power API URL for the daily series of a location"""
+    params_str = ','.join(parameters)
+    return (f"{power_base_url()}?parameters={params_str}&community=RE&longitude={longitude}&latitude={latitude}"
+            f"&start={start_year}0101&end={end_year}1231&format=JSON")
+
+
+def expected_days(start_year: int, end_year: int) -> int:
+    """Number of days from January 1 of start_year to December 31 of end_year"""
+    return (datetime.date(end_year, 12, 31) - datetime.date(start_year, 1, 1)).days + 1
+
+
+def summarize_parameter(parameter: str, param_values: Dict[str, Any], total_days: int) -> Dict[str, Any]:
+    """
+    Count null, fill, implausible, zero and valid values of one parameter
+
+    Values are classified with the same validity mask the estimator applies, so a value counted as
+    valid here is a value the predictions use.
+
+    Args:
+        parameter: Parameter code
+        param_values: Power API {YYYYMMDD: value} map
+        total_days: Days expected in the requested range
+
+    Returns:
+        Dictionary of counts, percentages, completeness and the range and mean of valid values
+    """
+    values = list(param_values.values())
+    total_entries = len(values)
+    try:
+        # JSON nulls become NaN
+        numeric = np.array(values, dtype=np.float64)
+        other_nulls = other_valid = 0
+    except (TypeError, ValueError):
+        # Non-numeric entries: null-like strings are nulls, anything else is valid but has no value
+        is_number = [isinstance(v, (int, float)) and not isinstance(v, bool) for v in values]
+        numeric = np.array([v if ok else np.nan for v, ok in zip(values, is_number)], dtype=np.float64)
+        others = [v for v, ok in zip(values, is_number) if not ok and v is not None]
+        other_nulls = sum(str(v).lower() in NULL_STRINGS for v in others)
+        other_valid = len(others) - other_nulls
+
+    masks = quality_masks(parameter, numeric)
+    null_count = int(masks['missing'].sum()) - other_valid
+    zero = masks['valid'] & (numeric == 0)
+    nonzero = numeric[masks['valid'] & ~zero]
+    valid_count = len(nonzero) + other_valid
+    zero_count = int(zero.sum())
+
+    def percentage(count: int) -> float:
+        return (count / total_entries) * 100 if total_entries > 0 else 0
+
+    summary = {
+        'total_entries': total_entries,
+        'valid_count': valid_count,
+        'null_count': null_count,
+        'zero_count': zero_count,
+        'fill_count': int(masks['fill'].sum()),
+        'implausible_count': int(masks['implausible'].sum()),
+        'null_percentage': percentage(null_count),
+        'valid_percentage': percentage(valid_count),
+        'zero_percentage': percentage(zero_count),
+        'completeness': (valid_count / total_days) * 100 if total_days > 0 else 0,
+    }
+    if len(nonzero):
+        summary.update({'min': float(nonzero.min()), 'max': float(nonzero.max()), 'mean': float(nonzero.mean())})
+    return summary
+
 
-def analyze_nasa_data(longitude, latitude, start_year=2010, end_year=2024):
+def summarize_response(content: bytes, parameters: List[str], total_days: int) -> Dict[str, Any]:
+    """
+    Decode a Power API response and summarize every parameter (runs in a worker process)
+
+    Args:
+        content: Raw response body
+        parameters: Parameter codes to summarize
+        total_days: Days expected in the requested range
+
+    Returns:
+        Dictionary with 'parameters' (code -> summary) and 'missing' (codes absent from the response),
+        or 'error' when the response cannot be used
+    """
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        return {'error': f"Error parsing JSON response: {e}"}
+
+    if not isinstance(data, dict) or 'parameter' not in data.get('properties', {}):
+        return {'error': "Invalid API response structure"}
+
+    parameter_data = data['properties']['parameter']
+    return {
+        'parameters': {p: summarize_parameter(p, parameter_data[p], total_days) for p in parameters if p in parameter_data},
+        'missing': [p for p in parameters if p not in parameter_data],
+    }
+
+
+def fetch_response(url: str) -> bytes:
+    """Download a Power API response body"""
+    response = get_shared_session().get(url, timeout=60)
+    response.raise_for_status()
+    return response.content
+
+
+def print_location_report(results: Dict[str, Dict[str, Any]], missing: List[str], total_days: int) -> None:
+    """Print the per-parameter report and summary for one location"""
+    print(f"Total expected days in range: {total_days}")
+    print()
+
+    for param in missing:
+        print(f"X {param}: Parameter not found in response")
+
+    for param, summary in results.items():
+        print(f"[{param}] {parameter_descriptions.get(param, 'Unknown')}:")
+        print(f"   Total entries: {summary['total_entries']:,}")
+        print(f"   Valid values: {summary['valid_count']:,} ({summary['valid_percentage']:.1f}%)")
+        print(f"   Null values: {summary['null_count']:,} ({summary['null_percentage']:.1f}%)")
+        print(f"   Zero values: {summary['zero_count']:,} ({summary['zero_percentage']:.1f}%)")
+        print(f"   Fill values (-999): {summary['fill_count']:,}")
+        print(f"   Implausible values: {summary['implausible_count']:,}")
+        print(f"   Data completeness: {summary['completeness']:.1f}%")
+
+        if 'mean' in summary:
+            print(f"   Value range: {summary['min']:.2f} to {summary['max']:.2f}")
+            print(f"   Average: {summary['mean']:.2f}")
+
+        print()
+
+    # Summary
+    print("=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+
+    if not results:
+        print("No parameters found in response")
+        return
+
+    avg_completeness = sum(r['completeness'] for r in results.values()) / len(results)
+    total_nulls = sum(r['null_count'] for r in results.values())
+    total_valid = sum(r['valid_count'] for r in results.values())
+
+    print(f"Average data completeness: {avg_completeness:.1f}%")
+    print(f"Total null values across all parameters: {total_nulls:,}")
+    print(f"Total valid values across all parameters: {total_valid:,}")
+
+    # Find parameters with most nulls
+    worst_param = max(results.items(), key=lambda x: x[1]['null_percentage'])
+    best_param = min(results.items(), key=lambda x: x[1]['null_percentage'])
+
+    print(f"Parameter with most nulls: {worst_param[0]} ({worst_param[1]['null_percentage']:.1f}%)")
+    print(f"Parameter with least nulls: {best_param[0]} ({best_param[1]['null_percentage']:.1f}%)")
+
+
+def analyze_nasa_data(longitude, latitude, start_year=2010, end_year=2024, parameters=None):
     """
     Analyze NASA Power API data for null values and data completeness
-    
+
     Args:
         longitude: Longitude coordinate
         latitude: Latitude coordinate
         start_year: Start year for analysis
         end_year: End year for analysis
+        parameters: Parameter codes to analyze (if None, uses DEFAULT_PARAMETERS)
+
+    Returns:
+        Parameter code -> summary, or None when the data could not be retrieved
     """
-    
-    # Parameters to analyze
-    parameters = ['T2M', 'T2M_MAX', 'T2M_MIN', 'PRECTOTCORR', 'WS2M', 'RH2M', 'T2MWET']
-    
-    # Build API URL
-    params_str = ','.join(parameters)
-    base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
-    start_date = f"{start_year}0101"
-    end_date = f"{end_year}1231"
-    
-    url = f"{base_url}?parameters={params_str}&community=RE&longitude={longitude}&latitude={latitude}&start={start_date}&end={end_date}&format=JSON"
-    
+    parameters = parameters or DEFAULT_PARAMETERS
+    url = build_url(longitude, latitude, start_year, end_year, parameters)
+
     print(f"Analyzing data for location: {longitude}, {latitude}")
     print(f"Time range: {start_year}-{end_year}")
     print(f"Parameters: {', '.join(parameters)}")
     print(f"API URL: {url}")
     print("-" * 80)
-    
+
     try:
         # Make API request
         print("Making API request...")
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if 'properties' not in data or 'parameter' not in data['properties']:
-            print("Error: Invalid API response structure")
-            return
-        
-        parameter_data = data['properties']['parameter']
-        
-        # Calculate total expected days
-        start_date_obj = datetime.date(start_year, 1, 1)
-        end_date_obj = datetime.date(end_year, 12, 31)
-        total_days = (end_date_obj - start_date_obj).days + 1
-        
-        print(f"Total expected days in range: {total_days}")
-        print()
-        
-        # Analyze each parameter
-        results = {}
-        
-        for param in parameters:
-            if param not in parameter_data:
-                print(f"X {param}: Parameter not found in response")
-                continue
-            
-            param_values = parameter_data[param]
-            
-            # Count different types of values
-            total_entries = len(param_values)
-            null_count = 0
-            valid_count = 0
-            zero_count = 0
-            
-            valid_values = []
-            
-            for date_key, value in param_values.items():
-                if value is None:
-                    null_count += 1
-                elif isinstance(value, (int, float)):
-                    if value == 0:
-                        zero_count += 1
-                    else:
-                        valid_count += 1
-                        valid_values.append(value)
-                else:
-                    # Handle string values that might represent nulls
-                    if str(value).lower() in ['null', 'none', 'nan', '']:
-                        null_count += 1
-                    else:
-                        valid_count += 1
-            
-            # Calculate percentages
-            null_percentage = (null_count / total_entries) * 100 if total_entries > 0 else 0
-            valid_percentage = (valid_count / total_entries) * 100 if total_entries > 0 else 0
-            zero_percentage = (zero_count / total_entries) * 100 if total_entries > 0 else 0
-            
-            # Calculate data completeness
-            completeness = (valid_count / total_days) * 100 if total_days > 0 else 0
-            
-            results[param] = {
-                'total_entries': total_entries,
-                'valid_count': valid_count,
-                'null_count': null_count,
-                'zero_count': zero_count,
-                'null_percentage': null_percentage,
-                'valid_percentage': valid_percentage,
-                'zero_percentage': zero_percentage,
-                'completeness': completeness
-            }
-            
-            # Print results for this parameter
-            print(f"[{param}] {parameter_descriptions.get(param, 'Unknown')}:")
-            print(f"   Total entries: {total_entries:,}")
-            print(f"   Valid values: {valid_count:,} ({valid_percentage:.1f}%)")
-            print(f"   Null values: {null_count:,} ({null_percentage:.1f}%)")
-            print(f"   Zero values: {zero_count:,} ({zero_percentage:.1f}%)")
-            print(f"   Data completeness: {completeness:.1f}%")
-            
-            if valid_values:
-                min_val = min(valid_values)
-                max_val = max(valid_values)
-                avg_val = sum(valid_values) / len(valid_values)
-                print(f"   Value range: {min_val:.2f} to {max_val:.2f}")
-                print(f"   Average: {avg_val:.2f}")
-            
-            print()
-        
-        # Summary
-        print("=" * 80)
-        print("SUMMARY")
-        print("=" * 80)
-        
-        avg_completeness = sum(r['completeness'] for r in results.values()) / len(results)
-        total_nulls = sum(r['null_count'] for r in results.values())
-        total_valid = sum(r['valid_count'] for r in results.values())
-        
-        print(f"Average data completeness: {avg_completeness:.1f}%")
-        print(f"Total null values across all parameters: {total_nulls:,}")
-        print(f"Total valid values across all parameters: {total_valid:,}")
-        
-        # Find parameters with most nulls
-        if results:
-            worst_param = max(results.items(), key=lambda x: x[1]['null_percentage'])
-            best_param = min(results.items(), key=lambda x: x[1]['null_percentage'])
-            
-            print(f"Parameter with most nulls: {worst_param[0]} ({worst_param[1]['null_percentage']:.1f}%)")
-            print(f"Parameter with least nulls: {best_param[0]} ({best_param[1]['null_percentage']:.1f}%)")
-        
-        return results
-        
+        content = fetch_response(url)
     except requests.exceptions.RequestException as e:
         print(f"Error making API request: {e}")
         return None
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        return None
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+
+    total_days = expected_days(start_year, end_year)
+    outcome = summarize_response(content, parameters, total_days)
+    if 'error' in outcome:
+        print(f"Error: {outcome['error']}")
         return None
 
+    print_location_report(outcome['parameters'], outcome['missing'], total_days)
+    return outcome['parameters']
+
+
+def analyze_locations(locations: List[Dict[str, Any]], start_year: int = 2010, end_year: int = 2024,
+                      parameters: Optional[List[str]] = None, fetch_workers: int = 8,
+                      process_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Audit data completeness for many locations
+
+    Locations in the same Power grid cell share one download. Downloads run on a thread pool while
+    finished responses are decoded and counted in a process pool, so JSON decoding uses every core.
+
+    Args:
+        locations: Dictionaries with latitude, longitude and an optional name
+        start_year: Start year for analysis
+        end_year: End year for analysis
+        parameters: Parameter codes to analyze (if None, uses DEFAULT_PARAMETERS)
+        fetch_workers: Maximum number of downloads in flight
+        process_workers: Decoding processes (if None, one per CPU when there are several; 0 decodes in this process)
+
+    Returns:
+        Report with the settings and one entry per location, in input order
+    """
+    parameters = parameters or DEFAULT_PARAMETERS
+    total_days = expected_days(start_year, end_year)
+
+    cells: Dict[Tuple[float, float], List[int]] = {}
+    for i, location in enumerate(locations):
+        cells.setdefault(MERRA2_GRID.snap(location['latitude'], location['longitude']), []).append(i)
+
+    outcomes: Dict[Tuple[float, float], Dict[str, Any]] = {}
+    if process_workers is None:
+        # A single core gains nothing from a process pool but its start-up cost
+        cpus = os.cpu_count() or 1
+        process_workers = cpus if cpus > 1 else 0
+    process_pool = None
+    if process_workers > 0 and cells:
+        # Spawned rather than forked: the parent is running download threads
+        process_pool = ProcessPoolExecutor(max_workers=min(process_workers, len(cells)),
+                                           mp_context=multiprocessing.get_context('spawn'))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(fetch_workers, len(cells) or 1))) as fetch_pool:
+            downloads = {
+                fetch_pool.submit(fetch_response, build_url(cell[1], cell[0], start_year, end_year, parameters)): cell
+                for cell in cells
+            }
+            summaries = {}
+            for done in as_completed(downloads):
+                cell = downloads[done]
+                try:
+                    content = done.result()
+                except requests.exceptions.RequestException as e:
+                    outcomes[cell] = {'error': f"Error making API request: {e}"}
+                    continue
+                if process_pool is not None:
+                    summaries[process_pool.submit(summarize_response, content, parameters, total_days)] = cell
+                else:
+                    outcomes[cell] = summarize_response(content, parameters, total_days)
+
+            for done in as_completed(summaries):
+                outcomes[summaries[done]] = done.result()
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+
+    report_locations = []
+    for cell, indexes in cells.items():
+        outcome = outcomes[cell]
+        for i in indexes:
+            location = locations[i]
+            entry = {
+                'name': location.get('name') or f"{location['latitude']}, {location['longitude']}",
+                'latitude': location['latitude'],
+                'longitude': location['longitude'],
+                'cell_latitude': cell[0],
+                'cell_longitude': cell[1],
+            }
+            if 'error' in outcome:
+                entry['error'] = outcome['error']
+            else:
+                results = outcome['parameters']
+                entry['parameters'] = results
+                entry['missing_parameters'] = outcome['missing']
+                entry['average_completeness'] = (
+                    sum(r['completeness'] for r in results.values()) / len(results) if results else 0.0
+                )
+            report_locations.append((i, entry))
+
+    return {
+        'start_year': start_year,
+        'end_year': end_year,
+        'parameters': parameters,
+        'total_days': total_days,
+        'locations': [entry for _i, entry in sorted(report_locations, key=lambda item: item[0])],
+    }
+
+
+def load_locations(path: str) -> List[Dict[str, Any]]:
+    """
+    Read locations from a JSON list of objects or a CSV file with latitude and longitude columns (name optional)
+
+    Args:
+        path: Path to a .json or .csv file
+
+    Returns:
+        List of {name, latitude, longitude} dictionaries
+
+    Raises:
+        ValueError: When a location has no valid coordinates
+    """
+    with open(path, newline='') as f:
+        rows = json.load(f) if path.lower().endswith('.json') else list(csv.DictReader(f))
+
+    locations = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            latitude = float(row['latitude'])
+            longitude = float(row['longitude'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{path}: location {number} needs numeric latitude and longitude")
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            raise ValueError(f"{path}: location {number} is outside [-90, 90] x [-180, 180]")
+        locations.append({'name': row.get('name') or '', 'latitude': latitude, 'longitude': longitude})
+    return locations
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    """
+    Write the report as JSON, or as CSV with one row per (location, parameter) when the path ends in .csv
+
+    Args:
+        report: Report from analyze_locations
+        path: Output file path
+    """
+    if not path.lower().endswith('.csv'):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for entry in report['locations']:
+            location_fields = {key: entry[key] for key in ('name', 'latitude', 'longitude', 'cell_latitude', 'cell_longitude')}
+            if 'error' in entry:
+                writer.writerow(dict(location_fields, error=entry['error']))
+                continue
+            for param in report['parameters']:
+                summary = entry['parameters'].get(param)
+                if summary is None:
+                    writer.writerow(dict(location_fields, parameter=param, error="Parameter not found in response"))
+                else:
+                    writer.writerow(dict(location_fields, parameter=param, **summary))
+
+
 # Parameter descriptions
 parameter_descriptions = {
     'T2M': 'Air Temperature at 2 meters (°C)',
@@ -175,35 +409,62 @@ parameter_descriptions = {
 
 def main():
     """Main function to run the analysis"""
-    
-    # Example locations to analyze
-    locations = [
-        {"name": "Austin, Texas", "longitude": -97.1384, "latitude": 30.2672},
-        {"name": "New York City", "longitude": -74.0060, "latitude": 40.7128},
-        {"name": "London, UK", "longitude": -0.1276, "latitude": 51.5074},
-        {"name": "Tokyo, Japan", "longitude": 139.6917, "latitude": 35.6895}
-    ]
-    
+    parser = argparse.ArgumentParser(description='NASA Power API data completeness analysis for one or many locations')
+    parser.add_argument('--locations-file', type=str, default=None,
+                        help='JSON list or CSV file of locations (latitude, longitude, optional name)')
+    parser.add_argument('--location', type=float, nargs=2, action='append', metavar=('LATITUDE', 'LONGITUDE'),
+                        help='Location to analyze (repeatable)')
+    parser.add_argument('--start-year', type=int, default=2010, help='Start year for analysis (default: 2010)')
+    parser.add_argument('--end-year', type=int, default=2024, help='End year for analysis (default: 2024)')
+    parser.add_argument('--parameters', nargs='*', default=DEFAULT_PARAMETERS, help='Parameters to analyze')
+    parser.add_argument('--fetch-workers', type=int, default=8, help='Downloads in flight at the same time (default: 8)')
+    parser.add_argument('--process-workers', type=int, default=None,
+                        help='Processes decoding responses (default: one per CPU on multi-core machines; 0 decodes in the main process)')
+    parser.add_argument('--output', type=str, default=None, help='Write the report to a .json or .csv file')
+    parser.add_argument('--details', action='store_true', help='Print the full per-parameter report for every location')
+    args = parser.parse_args()
+
+    locations = []
+    if args.locations_file:
+        try:
+            locations.extend(load_locations(args.locations_file))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    for latitude, longitude in args.location or []:
+        locations.append({'name': '', 'latitude': latitude, 'longitude': longitude})
+    if not locations:
+        locations = EXAMPLE_LOCATIONS
+
     print("NASA Power API Data Completeness Analysis")
     print("=" * 80)
-    
-    for location in locations:
-        print(f"\nAnalyzing: {location['name']}")
-        print("=" * 60)
-        
-        results = analyze_nasa_data(
-            longitude=location['longitude'],
-            latitude=location['latitude'],
-            start_year=2010,
-            end_year=2024
-        )
-        
-        if results:
-            print(f"SUCCESS: Analysis completed for {location['name']}")
+    print(f"Locations: {len(locations)}, time range: {args.start_year}-{args.end_year}")
+
+    started = time.perf_counter()
+    report = analyze_locations(locations, args.start_year, args.end_year, args.parameters,
+                               args.fetch_workers, args.process_workers)
+    elapsed = time.perf_counter() - started
+
+    failed = 0
+    for entry in report['locations']:
+        if 'error' in entry:
+            failed += 1
+            print(f"ERROR: Analysis failed for {entry['name']}: {entry['error']}")
+            continue
+
+        if args.details:
+            print(f"\nAnalyzing: {entry['name']}")
+            print("=" * 60)
+            print_location_report(entry['parameters'], entry['missing_parameters'], report['total_days'])
+            print("\n" + "=" * 80)
         else:
-            print(f"ERROR: Analysis failed for {location['name']}")
-        
-        print("\n" + "=" * 80)
+            print(f"SUCCESS: {entry['name']}: {entry['average_completeness']:.1f}% average completeness")
+
+    print(f"\nAnalyzed {len(locations) - failed}/{len(locations)} locations in {elapsed:.1f}s")
+
+    if args.output:
+        write_report(report, args.output)
+        print(f"Report saved to {args.output}")
 
 if __name__ == "__main__":
     main()
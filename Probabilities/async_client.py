@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Asyncio variant of the NASA Weather Probability Estimator
+Upstream downloads go through a shared httpx.AsyncClient so one event loop can keep many requests in flight;
+blocking work (disk cache, JSON decoding, statistics) runs in worker threads
+"""
+
+import asyncio
+import json
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Any, Optional
+
+import httpx
+
+try:
+    from .nasa_weather_probability import NASAWeatherProbability
+    from .climate_store import DailySeries
+    from .single_flight import AsyncSingleFlight
+    from .power_cache import merge_power_responses
+    from .power_stream import ChunkReader, series_from_power_stream, streaming_available
+except ImportError:
+    from nasa_weather_probability import NASAWeatherProbability
+    from climate_store import DailySeries
+    from single_flight import AsyncSingleFlight
+    from power_cache import merge_power_responses
+    from power_stream import ChunkReader, series_from_power_stream, streaming_available
+
+
+# Shared by every async estimator so concurrent requests for one URL await a single download
+async_single_flight = AsyncSingleFlight()
+
+
+def create_async_client(max_connections: int = 200, max_keepalive_connections: int = 50,
+                        timeout: float = 30.0) -> httpx.AsyncClient:
+    """
+    Create an HTTP client for Power API calls with connection reuse
+
+    Args:
+        max_connections: Maximum simultaneous connections
+        max_keepalive_connections: Idle connections kept open for reuse
+        timeout: Request timeout in seconds
+
+    Returns:
+        httpx.AsyncClient (close it with aclose() when done)
+    """
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+    )
+
+
+class AsyncNASAWeatherProbability(NASAWeatherProbability):
+    """NASAWeatherProbability with coroutine versions of the request and prediction methods"""
+
+    def __init__(self, longitude: float, latitude: float, start_year: Optional[int] = None,
+                 end_year: Optional[int] = None, client: Optional[httpx.AsyncClient] = None, **kwargs):
+        """
+        Initialize the async estimator
+
+        Args:
+            longitude: Longitude coordinate
+            latitude: Latitude coordinate
+            start_year: Start year for data collection (if None, uses current_year - 11)
+            end_year: End year for data collection (if None, uses current_year - 1)
+            client: Shared async HTTP client (if None, a client is opened per request)
+            **kwargs: cache, store, climatology_index, session, single_flight, grid, memo, tiles and metrics as for
+                NASAWeatherProbability
+        """
+        super().__init__(longitude, latitude, start_year, end_year, **kwargs)
+        self.client = client
+
+    async def make_api_request_async(self, parameters: List[str], start_year: Optional[int] = None,
+                                     end_year: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Make a request to NASA Power API without blocking the event loop
+
+        Args:
+            parameters: List of parameter codes to request
+            start_year: First year to request (if None, uses the configured start year)
+            end_year: Last year to request (if None, uses the configured end year)
+
+        Returns:
+            API response data
+        """
+        start_year = start_year if start_year is not None else self.start_year
+        end_year = end_year if end_year is not None else self.end_year
+
+        cached = await asyncio.to_thread(self.cached_parameters, parameters, start_year, end_year)
+        missing = [p for p in parameters if p not in cached]
+        if not missing:
+            return merge_power_responses([cached[p] for p in parameters])
+
+        url = self.build_api_url(missing, f"{start_year}0101", f"{end_year}1231")
+        data = await async_single_flight.do(url, lambda: self.fetch_api_data_async(url, start_year, end_year))
+        return self.merge_cached_parameters(cached, data)
+
+    async def fetch_api_data_async(self, url: str, start_year: int, end_year: int) -> Dict[str, Any]:
+        """
+        Download and decode one NASA Power API response without blocking the event loop
+
+        Args:
+            url: Request URL
+            start_year: First year of the request, for the cache entries
+            end_year: Last year of the request, for the cache entries
+
+        Returns:
+            API response data (empty on failure)
+        """
+        try:
+            print(f"Making request to: {url}")
+            response = await self.get_async(url)
+            response.raise_for_status()
+            self.metrics.increment('weather_upstream_bytes_total', len(response.content))
+
+            with self.metrics.time('json_decode'):
+                data = await asyncio.to_thread(json.loads, response.content)
+
+            # Only cache well-formed responses so a bad upstream reply is retried next time
+            if self.cache is not None and 'properties' in data:
+                await asyncio.to_thread(self.cache.put_parameters, self.cell_latitude, self.cell_longitude, data,
+                                        start_year, end_year, self.community)
+            return data
+
+        except httpx.HTTPError as e:
+            print(f"Error making API request: {e}")
+            return {}
+        except json.JSONDecodeError as e:
+            print(f"Error parsing JSON response: {e}")
+            return {}
+
+    async def get_async(self, url: str) -> httpx.Response:
+        """GET a URL with the shared client (or a client opened for this request), timed as the upstream fetch"""
+        with self.metrics.time('upstream_fetch'):
+            if self.client is not None:
+                return await self.client.get(url)
+            async with create_async_client() as client:
+                return await client.get(url)
+
+    async def load_series_async(self, parameters: List[str]) -> Optional[DailySeries]:
+        """
+        Coroutine version of load_series
+
+        Args:
+            parameters: List of parameter codes to load
+
+        Returns:
+            DailySeries covering the configured year range, or None if the data could not be retrieved
+        """
+        if self.store is None:
+            return None
+
+        with self.metrics.time('cache_lookup'):
+            series = await asyncio.to_thread(self.store.load, self.cell_latitude, self.cell_longitude, parameters,
+                                             self.start_year, self.end_year)
+        if series is not None:
+            return series
+
+        plan = await asyncio.to_thread(self.store.plan_fetches, self.cell_latitude, self.cell_longitude, parameters,
+                                       self.start_year, self.end_year)
+        for (start_year, end_year), missing in plan.items():
+            if not await self.fill_store_async(missing, start_year, end_year):
+                return None
+
+        return self.store.load(self.cell_latitude, self.cell_longitude, parameters, self.start_year, self.end_year)
+
+    async def fill_store_async(self, parameters: List[str], start_year: int, end_year: int) -> bool:
+        """
+        Coroutine version of fill_store
+
+        Args:
+            parameters: List of parameter codes to download
+            start_year: First year of the span
+            end_year: Last year of the span
+
+        Returns:
+            True when the response was merged into the store (parameters it lacks are stored as missing days)
+        """
+        # As in fill_store, the streaming path relies on the store alone and skips the response cache
+        url = self.build_api_url(parameters, f"{start_year}0101", f"{end_year}1231")
+
+        # Only the leader writes the store; coroutines that waited on it reload what it merged
+        async def fetch_and_merge() -> bool:
+            if streaming_available():
+                fetched = await self.fetch_series_async(url, parameters)
+            else:
+                data = await self.make_api_request_async(parameters, start_year, end_year)
+                fetched = await asyncio.to_thread(DailySeries.from_power_json, data, parameters)
+            if fetched is None:
+                return False
+            await asyncio.to_thread(self.store.merge, self.cell_latitude, self.cell_longitude,
+                                    fetched.with_parameters(parameters))
+            return True
+
+        return await async_single_flight.do(f"{url}#series", fetch_and_merge)
+
+    @asynccontextmanager
+    async def stream_async(self, url: str) -> AsyncIterator[httpx.Response]:
+        """Streaming GET with the shared client (or a client opened for this request); the body is read inside the block"""
+        async with AsyncExitStack() as stack:
+            client = self.client if self.client is not None else await stack.enter_async_context(create_async_client())
+            # Until the headers arrive; the body transfer is timed by whoever reads it
+            with self.metrics.time('upstream_fetch'):
+                response = await stack.enter_async_context(client.stream('GET', url))
+            yield response
+
+    async def fetch_series_async(self, url: str, parameters: List[str]) -> Optional[DailySeries]:
+        """
+        Download one NASA Power API response and decode it as a stream in a worker thread
+
+        Args:
+            url: Request URL
+            parameters: Parameter codes to keep from the response
+
+        Returns:
+            DailySeries, or None on failure
+        """
+        try:
+            print(f"Making request to: {url}")
+            async with self.stream_async(url) as response:
+                response.raise_for_status()
+                loop = asyncio.get_running_loop()
+                body = response.aiter_bytes(self.STREAM_CHUNK_BYTES)
+
+                async def next_chunk() -> bytes:
+                    try:
+                        return await body.__anext__()
+                    except StopAsyncIteration:
+                        return b''
+
+                # The decoder thread pulls each chunk from the event loop as it needs it, so only one chunk of the
+                # body is held at a time
+                reader = ChunkReader(iter(lambda: asyncio.run_coroutine_threadsafe(next_chunk(), loop).result(), b''))
+                try:
+                    # The body arrives while it is decoded, so its transfer time counts as decoding
+                    with self.metrics.time('json_decode'):
+                        return await asyncio.to_thread(series_from_power_stream, reader, parameters)
+                finally:
+                    self.metrics.increment('weather_upstream_bytes_total', reader.bytes_read)
+
+        except httpx.HTTPError as e:
+            print(f"Error making API request: {e}")
+            return None
+        except ValueError as e:
+            print(f"Error parsing JSON response: {e}")
+            return None
+
+    async def predict_weather_for_date_async(self, target_date: str, parameters: Optional[List[str]] = None,
+                                             tolerance_days: int = 7) -> Dict[str, Any]:
+        """
+        Coroutine version of predict_weather_for_date
+
+        Args:
+            target_date: Target date in format "YYYY/MM/DD", "MM/DD", or "YYYYMMDD"
+            parameters: List of parameter codes to request (if None, uses all available parameters)
+            tolerance_days: Number of days before/after target date to include in analysis
+
+        Returns:
+            Complete weather prediction for the target date
+        """
+        with self.metrics.time('parse'):
+            parameters = self.validate_parameters(parameters)
+            if not parameters:
+                return {}
+
+            try:
+                target_month, target_day = self.parse_date_string(target_date)
+            except ValueError as e:
+                print(f"Error: {e}")
+                return {}
+
+        key = self.memo_key(parameters, target_month, target_day, tolerance_days, self.prediction_method(parameters))
+        if key is not None:
+            # The shared memo tier is a SQLite read, so it runs off the event loop
+            results = await asyncio.to_thread(self.recall_prediction, key, target_date, target_month, target_day,
+                                              tolerance_days)
+            if results is not None:
+                return results
+
+        results = await self.compute_prediction_async(parameters, target_date, target_month, target_day, tolerance_days)
+
+        if key is not None and results:
+            await asyncio.to_thread(self.remember_prediction, key, results)
+        return results
+
+    async def compute_prediction_async(self, parameters: List[str], target_date: str, target_month: int,
+                                       target_day: int, tolerance_days: int) -> Dict[str, Any]:
+        """
+        Coroutine version of compute_prediction
+
+        Args:
+            parameters: Validated parameter codes
+            target_date: Target date as given by the caller
+            target_month: Parsed target month
+            target_day: Parsed target day
+            tolerance_days: Number of days before/after target date to include in analysis
+
+        Returns:
+            Complete weather prediction for the target date (empty on failure)
+        """
+        if self.index_covers(parameters):
+            # Index queries are constant time, no need to leave the event loop
+            return self.compute_prediction(parameters, target_date, target_month, target_day, tolerance_days)
+
+        if self.store is not None:
+            series = await self.load_series_async(parameters)
+            if series is None:
+                print("Error: Failed to retrieve data from NASA API")
+                return {}
+            with self.metrics.time('seasonal_extraction'):
+                seasonal_data, seasonal_years = self.get_seasonal_window_from_series(series, parameters, target_month,
+                                                                                     target_day, tolerance_days)
+        else:
+            print(f"Requesting data for parameters: {parameters}")
+            data = await self.make_api_request_async(parameters)
+            if not data:
+                print("Error: Failed to retrieve data from NASA API")
+                return {}
+            with self.metrics.time('seasonal_extraction'):
+                seasonal_data, seasonal_years = await asyncio.to_thread(self.get_seasonal_window, data, parameters,
+                                                                        target_month, target_day, tolerance_days)
+
+        return await asyncio.to_thread(self.predict_from_seasonal_data, seasonal_data, parameters, target_date,
+                                       target_month, target_day, tolerance_days, seasonal_years)
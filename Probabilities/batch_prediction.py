@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Batch weather prediction for many (latitude, longitude, date) items
+Items are grouped by location, distinct locations are fetched concurrently with a bounded worker pool,
+and results come back in input order with a per-item error instead of failing the whole batch
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+try:
+    from .nasa_weather_probability import NASAWeatherProbability
+except ImportError:
+    from nasa_weather_probability import NASAWeatherProbability
+
+
+def coordinate_error(latitude: float, longitude: float) -> Optional[str]:
+    """
+    Check that a location is a finite point on the globe
+
+    Args:
+        latitude: Latitude coordinate
+        longitude: Longitude coordinate
+
+    Returns:
+        Error message, or None when the coordinates are valid
+    """
+    # NaN and infinities would otherwise reach the grid snapping; out-of-range values would be clamped silently
+    if not math.isfinite(latitude) or not math.isfinite(longitude):
+        return "latitude and longitude must be finite numbers"
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        return "latitude must be within [-90, 90] and longitude within [-180, 180]"
+    return None
+
+
+def parse_batch_item(item: Any) -> Tuple[Optional[Tuple[float, float, str]], Optional[str]]:
+    """
+    Validate one batch item
+
+    Args:
+        item: Dictionary with latitude, longitude and date
+
+    Returns:
+        Tuple of ((latitude, longitude, date), None) when valid, or (None, error message)
+    """
+    if not isinstance(item, dict):
+        return None, "Item must be an object with latitude, longitude and date"
+
+    try:
+        latitude = float(item['latitude'])
+        longitude = float(item['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None, "latitude and longitude must be numbers"
+
+    error = coordinate_error(latitude, longitude)
+    if error is not None:
+        return None, error
+
+    target_date = item.get('date')
+    if not isinstance(target_date, str) or not target_date:
+        return None, "date must be a string (YYYY/MM/DD, MM/DD, or YYYYMMDD)"
+
+    return (latitude, longitude, target_date), None
+
+
+def predict_weather_batch(items: List[Any], estimator_factory: Callable[[float, float], NASAWeatherProbability],
+                          parameters: Optional[List[str]] = None, tolerance_days: int = 7,
+                          max_workers: int = 8) -> List[Dict[str, Any]]:
+    """
+    Predict weather for many locations and dates
+
+    Args:
+        items: List of {latitude, longitude, date} dictionaries
+        estimator_factory: Callable creating an estimator for (latitude, longitude)
+        parameters: List of parameter codes to request (if None, uses all available parameters)
+        tolerance_days: Number of days before/after each target date to include in analysis
+        max_workers: Maximum number of locations fetched at the same time
+
+    Returns:
+        One entry per input item, in input order, holding either 'result' or 'error'
+    """
+    outputs: List[Dict[str, Any]] = [{} for _ in items]
+    dates_by_location: Dict[Tuple[float, float], List[str]] = {}
+    valid_items: List[Tuple[int, Tuple[float, float], str]] = []
+
+    for i, item in enumerate(items):
+        parsed, error = parse_batch_item(item)
+        if error:
+            outputs[i] = {'error': error}
+            continue
+        latitude, longitude, target_date = parsed
+        location = (latitude, longitude)
+        dates_by_location.setdefault(location, [])
+        if target_date not in dates_by_location[location]:
+            dates_by_location[location].append(target_date)
+        valid_items.append((i, location, target_date))
+
+    def predict_location(location: Tuple[float, float]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        dates = dates_by_location[location]
+        estimator = estimator_factory(location[0], location[1])
+        try:
+            predictions = estimator.predict_weather_for_dates(dates, parameters, tolerance_days)
+        except Exception as e:
+            return {}, {target_date: f"Prediction failed: {e}" for target_date in dates}
+
+        errors = {}
+        for target_date in dates:
+            if predictions.get(target_date):
+                continue
+            # Date errors come first: no index is built when every date failed to parse
+            try:
+                estimator.parse_date_string(target_date)
+            except ValueError as e:
+                errors[target_date] = str(e)
+                continue
+            if estimator.climatology_index is None:
+                errors[target_date] = "Failed to retrieve data from NASA API"
+            else:
+                errors[target_date] = "No seasonal data found for the specified date range"
+        return predictions, errors
+
+    location_results: Dict[Tuple[float, float], Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]] = {}
+    if dates_by_location:
+        workers = max(1, min(max_workers, len(dates_by_location)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            locations = list(dates_by_location.keys())
+            for location, outcome in zip(locations, pool.map(predict_location, locations)):
+                location_results[location] = outcome
+
+    for i, location, target_date in valid_items:
+        predictions, errors = location_results[location]
+        entry: Dict[str, Any] = {'latitude': location[0], 'longitude': location[1], 'date': target_date}
+        if target_date in errors:
+            entry['error'] = errors[target_date]
+        else:
+            entry['result'] = predictions[target_date]
+        outputs[i] = entry
+
+    return outputs
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Offline builder for precomputed climatology tiles
+Walks a bounding box of Power grid cells, fetches each cell once with bounded concurrency and writes one
+compact tile file per square of cells, so requests inside the box need no upstream call.
+
+Run from the repository root:
+    python -m Probabilities.build_climatology_tiles --bbox 29 31 -99 -96 --tile-dir .cache/tiles --store-dir .cache/store
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .nasa_weather_probability import NASAWeatherProbability
+    from .climatology_index import ClimatologyIndex
+    from .climate_store import ClimateStore
+    from .climatology_tiles import (ClimatologyTiles, DEFAULT_TILE_DEGREES, TILE_DTYPE, TILE_FORMAT_VERSION,
+                                    cells_in_bbox, tile_filename, tile_key)
+except ImportError:
+    from nasa_weather_probability import NASAWeatherProbability
+    from climatology_index import ClimatologyIndex
+    from climate_store import ClimateStore
+    from climatology_tiles import (ClimatologyTiles, DEFAULT_TILE_DEGREES, TILE_DTYPE, TILE_FORMAT_VERSION,
+                                   cells_in_bbox, tile_filename, tile_key)
+
+
+def build_tile(cells: List[Tuple[float, float]], path: str, estimator_factory: Callable[[float, float], NASAWeatherProbability],
+               parameters: List[str], max_workers: int = 4) -> Dict[str, Any]:
+    """
+    Fetch every cell of one tile with bounded concurrency and write the tile file
+
+    Args:
+        cells: Cell centres belonging to the tile
+        path: Output file path
+        estimator_factory: Callable creating an estimator for (latitude, longitude)
+        parameters: Parameter codes to include
+        max_workers: Maximum number of cells fetched at the same time
+
+    Returns:
+        Summary with the cells written and the cells that could not be fetched
+    """
+    def fetch_cell(cell: Tuple[float, float]) -> Tuple[Optional[ClimatologyIndex], NASAWeatherProbability]:
+        estimator = estimator_factory(cell[0], cell[1])
+        try:
+            return estimator.build_climatology_index(parameters), estimator
+        except Exception as e:
+            print(f"Error building climatology for {cell}: {e}")
+            return None, estimator
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(cells)))) as pool:
+        outcomes = list(pool.map(fetch_cell, cells))
+
+    written = [(cell, index) for cell, (index, _estimator) in zip(cells, outcomes)
+               if index is not None and index.parameters == list(parameters)]
+    missing = [list(cell) for cell, (index, _estimator) in zip(cells, outcomes)
+               if index is None or index.parameters != list(parameters)]
+    if not written:
+        return {'path': path, 'cells': 0, 'missing': missing}
+
+    estimator = outcomes[0][1]
+    above, below = estimator.probability_thresholds()
+    metadata = {
+        'version': TILE_FORMAT_VERSION,
+        'grid': estimator.grid.describe(),
+        'start_year': estimator.start_year,
+        'end_year': estimator.end_year,
+        'parameters': list(parameters),
+        'above_thresholds': above,
+        'below_thresholds': below,
+        'missing_cells': missing,
+        'built': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+    daily = np.stack([index.daily for _cell, index in written]).astype(TILE_DTYPE)
+    cell_array = np.array([cell for cell, _index in written], dtype=np.float64)
+
+    # Write then rename so serving processes never read a half-written tile
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, daily=daily, cells=cell_array, metadata=np.array(json.dumps(metadata)))
+    os.replace(tmp_path, path)
+    return {'path': path, 'cells': len(written), 'missing': missing}
+
+
+def build_tiles(lat_min: float, lat_max: float, lon_min: float, lon_max: float, tile_dir: str,
+                estimator_factory: Callable[[float, float], NASAWeatherProbability], parameters: List[str],
+                start_year: int, end_year: int, tile_degrees: float = DEFAULT_TILE_DEGREES,
+                max_workers: int = 4, overwrite: bool = False) -> List[Dict[str, Any]]:
+    """
+    Build the tiles covering a bounding box, one tile at a time
+
+    Complete tiles already on disk are skipped unless overwrite is set, so an interrupted run can be resumed;
+    tiles with cells that failed to download are rebuilt.
+
+    Args:
+        lat_min: Southern edge
+        lat_max: Northern edge
+        lon_min: Western edge
+        lon_max: Eastern edge
+        tile_dir: Output directory
+        estimator_factory: Callable creating an estimator for (latitude, longitude)
+        parameters: Parameter codes to include
+        start_year: First year of the historical range (must match the estimators)
+        end_year: Last year of the historical range (must match the estimators)
+        tile_degrees: Tile edge in degrees
+        max_workers: Maximum number of cells fetched at the same time
+        overwrite: Rebuild tiles that already exist
+
+    Returns:
+        One summary per tile
+    """
+    os.makedirs(tile_dir, exist_ok=True)
+    reader = ClimatologyTiles(tile_dir, tile_degrees, max_tiles=1, max_indexes=1)
+
+    cells_by_tile: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+    for cell in cells_in_bbox(lat_min, lat_max, lon_min, lon_max):
+        cells_by_tile.setdefault(tile_key(cell[0], cell[1], tile_degrees), []).append(cell)
+
+    summaries = []
+    for i, (key, tile_cells) in enumerate(sorted(cells_by_tile.items())):
+        path = os.path.join(tile_dir, tile_filename(key, start_year, end_year))
+        existing = None if overwrite else reader.load_tile(path)
+        if (existing is not None and not existing['metadata'].get('missing_cells')
+                and all(cell in existing['cells'] for cell in tile_cells)):
+            print(f"[{i + 1}/{len(cells_by_tile)}] {os.path.basename(path)} is complete, skipping")
+            summaries.append({'path': path, 'cells': len(existing['cells']), 'missing': [], 'skipped': True})
+            continue
+
+        started = time.perf_counter()
+        summary = build_tile(tile_cells, path, estimator_factory, parameters, max_workers)
+        print(f"[{i + 1}/{len(cells_by_tile)}] {os.path.basename(path)}: {summary['cells']} cells, "
+              f"{len(summary['missing'])} missing ({time.perf_counter() - started:.1f}s)")
+        summaries.append(summary)
+    return summaries
+
+
+def main():
+    """Command line entry point for the tile builder"""
+    parser = argparse.ArgumentParser(description='Build precomputed climatology tiles for a bounding box')
+    parser.add_argument('--bbox', type=float, nargs=4, required=True, metavar=('LAT_MIN', 'LAT_MAX', 'LON_MIN', 'LON_MAX'),
+                        help='Bounding box in degrees')
+    parser.add_argument('--tile-dir', type=str, required=True, help='Output directory for tile files')
+    current_year = datetime.datetime.now().year
+    parser.add_argument('--start-year', type=int, default=current_year - 11, help='Start year (default: current year - 11)')
+    parser.add_argument('--end-year', type=int, default=current_year - 1, help='End year (default: current year - 1)')
+    parser.add_argument('--parameters', nargs='*', choices=list(NASAWeatherProbability.AVAILABLE_PARAMETERS.keys()),
+                        default=list(NASAWeatherProbability.AVAILABLE_PARAMETERS.keys()),
+                        help='Parameters to include (default: all available parameters)')
+    parser.add_argument('--store-dir', type=str, default=None, help='Climate series store to fill and reuse (optional)')
+    parser.add_argument('--tile-degrees', type=float, default=DEFAULT_TILE_DEGREES, help='Tile edge in degrees (default: 5)')
+    parser.add_argument('--workers', type=int, default=4, help='Cells fetched at the same time (default: 4)')
+    parser.add_argument('--overwrite', action='store_true', help='Rebuild tiles that already exist')
+    args = parser.parse_args()
+
+    lat_min, lat_max, lon_min, lon_max = args.bbox
+    if lat_min > lat_max or lon_min > lon_max:
+        print("Error: bounding box must be LAT_MIN LAT_MAX LON_MIN LON_MAX with minimums first")
+        sys.exit(1)
+
+    store = ClimateStore(args.store_dir) if args.store_dir else None
+
+    def estimator_factory(latitude: float, longitude: float) -> NASAWeatherProbability:
+        return NASAWeatherProbability(longitude=longitude, latitude=latitude, start_year=args.start_year,
+                                      end_year=args.end_year, store=store)
+
+    summaries = build_tiles(lat_min, lat_max, lon_min, lon_max, args.tile_dir, estimator_factory, args.parameters,
+                            args.start_year, args.end_year, args.tile_degrees, args.workers, args.overwrite)
+
+    missing = sum(len(summary['missing']) for summary in summaries)
+    print(f"Built {len(summaries)} tiles in {args.tile_dir} ({missing} cells missing)")
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
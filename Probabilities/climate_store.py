@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Columnar local store for NASA Power daily point series
+Each (grid cell, parameter) series is a contiguous float32 file indexed by day offset from a base date,
+opened as a read-only memory map so workers never parse JSON to get at the data. A fixed header in the same file
+holds the base date and length, so a reader always gets values that match their dates.
+"""
+
+import datetime
+import functools
+import os
+import struct
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .data_quality import mask_invalid
+except ImportError:
+    from data_quality import mask_invalid
+
+
+# Day of year offsets in a leap year, matching the 2024 calendar used by is_date_in_range
+LEAP_MONTH_OFFSETS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335], dtype=np.int16)
+LEAP_MONTH_LENGTHS = np.array([31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int16)
+
+
+def leap_day_of_year(months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Map month/day arrays onto a 1-366 day of year using the leap year calendar
+
+    Args:
+        months: Array of months (1-12)
+        days: Array of days of month
+
+    Returns:
+        Array of day of year values (Feb 29 is always day 60)
+    """
+    return LEAP_MONTH_OFFSETS[np.asarray(months) - 1] + np.asarray(days)
+
+
+def date_keys_day_of_year(date_keys: List[str]) -> np.ndarray:
+    """
+    Parse Power API YYYYMMDD date keys into leap calendar day of year values in one pass
+
+    Args:
+        date_keys: Date keys in response order
+
+    Returns:
+        Array of day of year values, with 0 for keys that are not valid dates
+    """
+    keys = np.asarray(date_keys, dtype=str)
+    day_of_year = np.zeros(keys.shape, dtype=np.int16)
+    if keys.size == 0:
+        return day_of_year
+
+    parseable = (np.char.str_len(keys) == 8) & np.char.isdigit(keys)
+    numeric = keys[parseable].astype(np.int64)
+    months = (numeric // 100) % 100
+    days = numeric % 100
+
+    valid = (months >= 1) & (months <= 12) & (days >= 1)
+    valid[valid] &= days[valid] <= LEAP_MONTH_LENGTHS[months[valid] - 1]
+
+    parsed = np.zeros(numeric.shape, dtype=np.int16)
+    parsed[valid] = leap_day_of_year(months[valid], days[valid])
+    day_of_year[parseable] = parsed
+    return day_of_year
+
+
+def date_keys_year(date_keys: List[str]) -> np.ndarray:
+    """
+    Calendar year of Power API YYYYMMDD date keys
+
+    Args:
+        date_keys: Date keys in response order
+
+    Returns:
+        Array of years, with 0 for keys that are not 8 digits
+    """
+    keys = np.asarray(date_keys, dtype=str)
+    years = np.zeros(keys.shape, dtype=np.int64)
+    if keys.size == 0:
+        return years
+    parseable = (np.char.str_len(keys) == 8) & np.char.isdigit(keys)
+    years[parseable] = keys[parseable].astype(np.int64) // 10000
+    return years
+
+
+def seasonal_window_mask(day_of_year: np.ndarray, target_month: int, target_day: int, tolerance_days: int) -> np.ndarray:
+    """
+    Select days within tolerance of the target date, wrapping around the year boundary
+
+    Args:
+        day_of_year: Leap calendar day of year for every sample (0 marks samples to skip)
+        target_month: Target month
+        target_day: Target day
+        tolerance_days: Number of days before/after target date to include
+
+    Returns:
+        Boolean mask with the same shape as day_of_year
+    """
+    try:
+        datetime.date(2024, target_month, target_day)
+    except ValueError:
+        return np.zeros(day_of_year.shape, dtype=bool)
+
+    target = LEAP_MONTH_OFFSETS[target_month - 1] + target_day
+    diff = np.abs(day_of_year.astype(np.int16) - target)
+    # Same year boundary handling as is_date_in_range (e.g., Dec 31 to Jan 1)
+    diff = np.where(diff > 180, 365 - diff, diff)
+    return (diff <= tolerance_days) & (day_of_year > 0)
+
+
+@functools.lru_cache(maxsize=4096)
+def expected_window_days(start_year: int, end_year: int, target_month: int, target_day: int, tolerance_days: int) -> int:
+    """
+    Number of calendar days from January 1 of start_year to December 31 of end_year inside the seasonal window
+
+    Args:
+        start_year: First year
+        end_year: Last year
+        target_month: Target month
+        target_day: Target day
+        tolerance_days: Number of days before/after target date to include
+
+    Returns:
+        Day count, the number of samples a parameter without gaps contributes to the window
+    """
+    dates = np.arange(np.datetime64(f"{start_year:04d}-01-01"), np.datetime64(f"{end_year + 1:04d}-01-01"))
+    month_starts = dates.astype('datetime64[M]')
+    months = month_starts.astype(int) % 12 + 1
+    days = (dates - month_starts.astype('datetime64[D]')).astype(int) + 1
+    return int(seasonal_window_mask(leap_day_of_year(months, days), target_month, target_day, tolerance_days).sum())
+
+
+class DailySeries:
+    """Aligned daily values for several parameters, starting at a common base date"""
+
+    def __init__(self, base_date: datetime.date, values: Dict[str, np.ndarray]):
+        """
+        Initialize the series
+
+        Args:
+            base_date: Date of the first sample
+            values: Parameter code -> array of daily values (NaN marks missing days)
+        """
+        self.base_date = base_date
+        self.values = values
+        self.length = len(next(iter(values.values()))) if values else 0
+        self._day_of_year = None
+        self._years = None
+
+    @classmethod
+    def from_power_json(cls, data: Dict[str, Any], parameters: List[str]) -> Optional['DailySeries']:
+        """
+        Convert a Power API response into a DailySeries
+
+        Args:
+            data: Raw API response data
+            parameters: Parameter codes to keep
+
+        Returns:
+            DailySeries (fill and implausible values are NaN), or None when the response has no usable parameter data
+        """
+        parameter_data = data.get('properties', {}).get('parameter', {}) if data else {}
+        present = [p for p in parameters if parameter_data.get(p)]
+        if not present:
+            return None
+
+        all_keys = sorted(set().union(*(parameter_data[p].keys() for p in present)))
+        all_keys = [k for k in all_keys if len(k) == 8 and k.isdigit()]
+        if not all_keys:
+            return None
+
+        dates = np.array([f"{k[:4]}-{k[4:6]}-{k[6:]}" for k in all_keys], dtype='datetime64[D]')
+        base = dates[0]
+        length = int((dates[-1] - base).astype(int)) + 1
+        index = {k: int(offset) for k, offset in zip(all_keys, (dates - base).astype(int))}
+
+        values = {}
+        for param in present:
+            series = np.full(length, np.nan, dtype=np.float64)
+            for date_key, value in parameter_data[param].items():
+                offset = index.get(date_key)
+                if offset is not None and isinstance(value, (int, float)):
+                    series[offset] = value
+            # Fill values and implausible values are masked once here, so stored series are already clean
+            values[param] = mask_invalid(param, series)
+
+        return cls(base.item(), values)
+
+    def day_of_year(self) -> np.ndarray:
+        """Leap calendar day of year for every sample, computed once per series"""
+        if self._day_of_year is None:
+            dates = np.datetime64(self.base_date, 'D') + np.arange(self.length)
+            month_starts = dates.astype('datetime64[M]')
+            months = month_starts.astype(int) % 12 + 1
+            days = (dates - month_starts.astype('datetime64[D]')).astype(int) + 1
+            self._day_of_year = leap_day_of_year(months, days)
+        return self._day_of_year
+
+    def years(self) -> np.ndarray:
+        """Calendar year of every sample, computed once per series"""
+        if self._years is None:
+            dates = np.datetime64(self.base_date, 'D') + np.arange(self.length)
+            self._years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+        return self._years
+
+    def slice_years(self, start_year: int, end_year: int) -> 'DailySeries':
+        """
+        Restrict the series to whole calendar years
+
+        Args:
+            start_year: First year to keep
+            end_year: Last year to keep
+
+        Returns:
+            DailySeries sharing memory with this one
+        """
+        start = max(0, (datetime.date(start_year, 1, 1) - self.base_date).days)
+        stop = min(self.length, (datetime.date(end_year, 12, 31) - self.base_date).days + 1)
+        stop = max(start, stop)
+        return DailySeries(
+            self.base_date + datetime.timedelta(days=start),
+            {param: series[start:stop] for param, series in self.values.items()}
+        )
+
+    def with_parameters(self, parameters: List[str]) -> 'DailySeries':
+        """
+        Add an all-NaN series for every parameter the response did not include
+
+        Power leaves a parameter out of the response where it has no data (e.g. IMERG outside its coverage).
+        Storing it as missing days lets ClimateStore.load answer later requests for it instead of fetching again.
+
+        Args:
+            parameters: Parameter codes that were requested
+
+        Returns:
+            DailySeries with the same dates holding every requested parameter
+        """
+        absent = [p for p in parameters if p not in self.values]
+        if not absent:
+            return self
+        values = dict(self.values)
+        for param in absent:
+            values[param] = np.full(self.length, np.nan, dtype=np.float64)
+        return DailySeries(self.base_date, values)
+
+    def end_date(self) -> datetime.date:
+        """Date of the last sample"""
+        return self.base_date + datetime.timedelta(days=self.length - 1)
+
+
+class ClimateStore:
+    """Directory of memory-mapped float32 series, one file per (grid cell, parameter)"""
+
+    DTYPE = np.dtype('<f4')
+
+    # Header in front of the values: magic, format version, base date ordinal, length
+    HEADER = struct.Struct('<4sIqQ8x')
+    MAGIC = b'WXS1'
+
+    # Stored in each series' header: series written by older versions (before fill values were masked, or with
+    # their dates in a separate metadata file) read as not stored, so they are fetched again
+    FORMAT_VERSION = 3
+
+    def __init__(self, root_dir: str):
+        """
+        Initialize the store
+
+        Args:
+            root_dir: Directory holding one subdirectory per grid cell
+        """
+        self.root_dir = root_dir
+        self._merge_lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def cell_key(self, latitude: float, longitude: float) -> str:
+        """Directory name for a location"""
+        return f"{latitude:+09.4f}_{longitude:+010.4f}"
+
+    def _path(self, latitude: float, longitude: float, parameter: str) -> str:
+        return os.path.join(self.root_dir, self.cell_key(latitude, longitude), f"{parameter}.f32")
+
+    def read_series(self, latitude: float, longitude: float, parameter: str) -> Optional[Tuple[datetime.date, np.ndarray]]:
+        """
+        Open a stored series as a read-only memory map
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameter: Parameter code
+
+        Returns:
+            Tuple of (base_date, values), or None when the series is not stored
+        """
+        try:
+            with open(self._path(latitude, longitude, parameter), 'rb') as f:
+                header = f.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    return None
+                magic, version, base_ordinal, length = self.HEADER.unpack(header)
+                if magic != self.MAGIC or version != self.FORMAT_VERSION:
+                    return None
+                base_date = datetime.date.fromordinal(base_ordinal)
+                if length == 0:
+                    return base_date, np.empty(0, dtype=self.DTYPE)
+                # Mapping the file already opened keeps header and values together even if a writer replaces the
+                # path meanwhile (the map outlives the descriptor)
+                values = np.memmap(f, dtype=self.DTYPE, mode='r', offset=self.HEADER.size, shape=(length,))
+        except (OSError, ValueError):
+            return None
+        return base_date, values
+
+    def write_series(self, latitude: float, longitude: float, parameter: str,
+                     base_date: datetime.date, values: np.ndarray) -> None:
+        """
+        Persist a series, replacing any stored version atomically
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameter: Parameter code
+            base_date: Date of the first sample
+            values: Daily values (NaN marks missing days)
+        """
+        data_path = self._path(latitude, longitude, parameter)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        temp_path = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with open(temp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, base_date.toordinal(), int(len(values))))
+            np.ascontiguousarray(values, dtype=self.DTYPE).tofile(f)
+        os.replace(temp_path, data_path)
+
+    def save(self, latitude: float, longitude: float, series: DailySeries) -> None:
+        """
+        Persist every parameter of a DailySeries
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            series: Series to store
+        """
+        for parameter, values in series.values.items():
+            self.write_series(latitude, longitude, parameter, series.base_date, values)
+
+    def merge(self, latitude: float, longitude: float, series: DailySeries) -> None:
+        """
+        Merge newly fetched days into the stored series, extending its date range
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            series: Fetched series; its values replace stored values on overlapping days
+        """
+        # Read-modify-write, so merges of one store are serialized within the process
+        with self._merge_lock:
+            for parameter, values in series.values.items():
+                stored = self.read_series(latitude, longitude, parameter)
+                if stored is None or len(stored[1]) == 0:
+                    self.write_series(latitude, longitude, parameter, series.base_date, values)
+                    continue
+
+                stored_base, stored_values = stored
+                base_date = min(stored_base, series.base_date)
+                end_date = max(stored_base + datetime.timedelta(days=len(stored_values) - 1), series.end_date())
+                merged = np.full((end_date - base_date).days + 1, np.nan, dtype=self.DTYPE)
+
+                stored_offset = (stored_base - base_date).days
+                merged[stored_offset:stored_offset + len(stored_values)] = stored_values
+                new_offset = (series.base_date - base_date).days
+                merged[new_offset:new_offset + len(values)] = values
+
+                self.write_series(latitude, longitude, parameter, base_date, merged)
+
+    def stored_years(self, latitude: float, longitude: float, parameter: str) -> Optional[Tuple[int, int]]:
+        """
+        Calendar years fully covered by a stored series
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameter: Parameter code
+
+        Returns:
+            Tuple of (first_year, last_year), or None when no complete year is stored
+        """
+        stored = self.read_series(latitude, longitude, parameter)
+        if stored is None or len(stored[1]) == 0:
+            return None
+        base_date, values = stored
+        end_date = base_date + datetime.timedelta(days=len(values) - 1)
+        first_year = base_date.year if (base_date.month, base_date.day) == (1, 1) else base_date.year + 1
+        last_year = end_date.year if (end_date.month, end_date.day) == (12, 31) else end_date.year - 1
+        if last_year < first_year:
+            return None
+        return first_year, last_year
+
+    def missing_spans(self, latitude: float, longitude: float, parameter: str,
+                      start_year: int, end_year: int) -> List[Tuple[int, int]]:
+        """
+        Year spans that must be fetched so a parameter covers start_year to end_year
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameter: Parameter code
+            start_year: First year required
+            end_year: Last year required
+
+        Returns:
+            Up to two inclusive (first_year, last_year) spans, empty when everything is stored
+        """
+        covered = self.stored_years(latitude, longitude, parameter)
+        if covered is None:
+            return [(start_year, end_year)]
+
+        # Spans reach back to the stored years so a merged series never has a gap
+        first_year, last_year = covered
+        spans = []
+        if start_year < first_year:
+            spans.append((start_year, first_year - 1))
+        if end_year > last_year:
+            spans.append((last_year + 1, end_year))
+        return spans
+
+    def plan_fetches(self, latitude: float, longitude: float, parameters: List[str],
+                     start_year: int, end_year: int) -> Dict[Tuple[int, int], List[str]]:
+        """
+        Group the missing (parameter, year span) blocks into as few upstream requests as possible
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameters: Parameter codes required
+            start_year: First year required
+            end_year: Last year required
+
+        Returns:
+            (first_year, last_year) -> parameters to fetch for that span, in request order
+        """
+        plan: Dict[Tuple[int, int], List[str]] = {}
+        for parameter in parameters:
+            for span in self.missing_spans(latitude, longitude, parameter, start_year, end_year):
+                plan.setdefault(span, []).append(parameter)
+        return plan
+
+    def load(self, latitude: float, longitude: float, parameters: List[str],
+             start_year: int, end_year: int) -> Optional[DailySeries]:
+        """
+        Load parameters covering a full year range as a DailySeries backed by memory maps
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameters: Parameter codes to load
+            start_year: First year required
+            end_year: Last year required
+
+        Returns:
+            DailySeries covering start_year-01-01 to end_year-12-31, or None if any parameter is missing or short
+        """
+        start = datetime.date(start_year, 1, 1)
+        end = datetime.date(end_year, 12, 31)
+        length = (end - start).days + 1
+
+        values = {}
+        for parameter in parameters:
+            stored = self.read_series(latitude, longitude, parameter)
+            if stored is None:
+                return None
+            base_date, series = stored
+            offset = (start - base_date).days
+            if offset < 0 or offset + length > len(series):
+                return None
+            values[parameter] = series[offset:offset + length]
+
+        return DailySeries(start, values)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Day-of-year climatology index for one location
+Holds per-day-of-year prefix sums, sums of squares and threshold exceedance counts so any
+(target_month, target_day, tolerance_days) window is answered with a handful of range queries
+"""
+
+import datetime
+import json
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+
+try:
+    from .climate_store import DailySeries, LEAP_MONTH_OFFSETS
+    from .seasonal_statistics import SeasonalStatistics
+except ImportError:
+    from climate_store import DailySeries, LEAP_MONTH_OFFSETS
+    from seasonal_statistics import SeasonalStatistics
+
+
+DAYS_IN_INDEX = 366
+
+
+def window_ranges(target_month: int, target_day: int, tolerance_days: int) -> List[Tuple[int, int]]:
+    """
+    Inclusive day of year ranges selected by seasonal_window_mask for a target date
+
+    Args:
+        target_month: Target month
+        target_day: Target day
+        tolerance_days: Number of days before/after target date to include
+
+    Returns:
+        Disjoint (first_day, last_day) ranges on the 1-366 leap calendar
+    """
+    try:
+        datetime.date(2024, target_month, target_day)
+    except ValueError:
+        return []
+    if tolerance_days < 0:
+        return []
+
+    target = int(LEAP_MONTH_OFFSETS[target_month - 1]) + target_day
+    # Distances up to 180 days count directly; larger distances wrap as 365 - distance
+    near = min(tolerance_days, 180)
+    far = max(181, 365 - tolerance_days)
+
+    ranges = [(max(1, target - near), min(DAYS_IN_INDEX, target + near))]
+    if target + far <= DAYS_IN_INDEX:
+        ranges.append((target + far, DAYS_IN_INDEX))
+    if target - far >= 1:
+        ranges.append((1, target - far))
+    return ranges
+
+
+class ClimatologyIndex:
+    """Prefix-sum statistics over the 366 days of year for one (location, year range, parameter set)"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, latitude: float, longitude: float, start_year: int, end_year: int,
+                 parameters: List[str], daily: np.ndarray,
+                 above_thresholds: Dict[str, float], below_thresholds: Dict[str, float]):
+        """
+        Initialize the index from a (parameter x year x day of year) value cube
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            start_year: First year covered
+            end_year: Last year covered
+            parameters: Parameter codes, one per cube row
+            daily: Daily values shaped (parameters, years, 366), NaN where no sample exists
+            above_thresholds: Parameter code -> upper exceedance threshold
+            below_thresholds: Parameter code -> lower exceedance threshold
+        """
+        self.latitude = latitude
+        self.longitude = longitude
+        self.start_year = start_year
+        self.end_year = end_year
+        self.parameters = list(parameters)
+        self.daily = daily
+        self.above_thresholds = dict(above_thresholds)
+        self.below_thresholds = dict(below_thresholds)
+        self.row = {param: i for i, param in enumerate(self.parameters)}
+        self._build_prefix_sums()
+
+    def _build_prefix_sums(self) -> None:
+        valid = ~np.isnan(self.daily)
+        filled = np.where(valid, self.daily, 0.0)
+
+        # Shift by each parameter's overall mean so sums of squares stay well conditioned
+        totals = valid.sum(axis=(1, 2))
+        self.shift = np.where(totals > 0, filled.sum(axis=(1, 2)) / np.maximum(totals, 1), 0.0)
+        shifted = np.where(valid, self.daily - self.shift[:, None, None], 0.0)
+
+        above = np.array([self.above_thresholds.get(p, np.inf) for p in self.parameters])
+        below = np.array([self.below_thresholds.get(p, -np.inf) for p in self.parameters])
+        with np.errstate(invalid='ignore'):
+            above_hits = self.daily > above[:, None, None]
+            below_hits = self.daily < below[:, None, None]
+
+        def prefix(per_day: np.ndarray) -> np.ndarray:
+            # Leading zero column so range (lo, hi) is prefix[hi] - prefix[lo - 1]
+            return np.concatenate([np.zeros((per_day.shape[0], 1)), np.cumsum(per_day, axis=1)], axis=1)
+
+        self.count_prefix = prefix(valid.sum(axis=1).astype(np.float64))
+        self.sum_prefix = prefix(shifted.sum(axis=1))
+        self.sumsq_prefix = prefix((shifted ** 2).sum(axis=1))
+        self.above_prefix = prefix(above_hits.sum(axis=1).astype(np.float64))
+        self.below_prefix = prefix(below_hits.sum(axis=1).astype(np.float64))
+
+    @classmethod
+    def from_series(cls, series: DailySeries, latitude: float, longitude: float, start_year: int, end_year: int,
+                    parameters: List[str], above_thresholds: Dict[str, float],
+                    below_thresholds: Dict[str, float]) -> 'ClimatologyIndex':
+        """
+        Build an index from daily series
+
+        Args:
+            series: Daily series for the location
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            start_year: First year to index
+            end_year: Last year to index
+            parameters: Parameter codes to index
+            above_thresholds: Parameter code -> upper exceedance threshold
+            below_thresholds: Parameter code -> lower exceedance threshold
+
+        Returns:
+            ClimatologyIndex
+        """
+        series = series.slice_years(start_year, end_year)
+        parameters = [p for p in parameters if p in series.values]
+
+        dates = np.datetime64(series.base_date, 'D') + np.arange(series.length)
+        year_rows = dates.astype('datetime64[Y]').astype(int) + 1970 - start_year
+        day_columns = series.day_of_year().astype(np.intp) - 1
+
+        daily = np.full((len(parameters), end_year - start_year + 1, DAYS_IN_INDEX), np.nan, dtype=np.float64)
+        for i, param in enumerate(parameters):
+            daily[i, year_rows, day_columns] = series.values[param]
+
+        return cls(latitude, longitude, start_year, end_year, parameters, daily, above_thresholds, below_thresholds)
+
+    def covers(self, latitude: float, longitude: float, start_year: int, end_year: int, parameters: List[str],
+               above_thresholds: Dict[str, float], below_thresholds: Dict[str, float]) -> bool:
+        """True when this index can answer queries for the given estimator configuration"""
+        return (self.latitude == latitude and self.longitude == longitude
+                and self.start_year == start_year and self.end_year == end_year
+                and all(p in self.row for p in parameters)
+                and all(self.above_thresholds.get(p) == above_thresholds.get(p) for p in parameters)
+                and all(self.below_thresholds.get(p) == below_thresholds.get(p) for p in parameters))
+
+    def statistics(self, parameters: List[str], target_month: int, target_day: int,
+                   tolerance_days: int) -> SeasonalStatistics:
+        """
+        Seasonal statistics for a window from range queries over the prefix sums
+
+        Args:
+            parameters: Parameter codes in output order
+            target_month: Target month
+            target_day: Target day
+            tolerance_days: Number of days before/after target date to include
+
+        Returns:
+            SeasonalStatistics for the parameters with at least one sample in the window
+        """
+        rows = np.array([self.row[p] for p in parameters if p in self.row], dtype=np.intp)
+        totals = {name: np.zeros(len(rows)) for name in ('count', 'sum', 'sumsq', 'above', 'below')}
+        for first_day, last_day in window_ranges(target_month, target_day, tolerance_days):
+            for name, prefix in (('count', self.count_prefix), ('sum', self.sum_prefix),
+                                 ('sumsq', self.sumsq_prefix), ('above', self.above_prefix),
+                                 ('below', self.below_prefix)):
+                totals[name] += prefix[rows, last_day] - prefix[rows, first_day - 1]
+
+        count = np.rint(totals['count']).astype(np.int64)
+        keep = count > 0
+        rows, count = rows[keep], count[keep]
+        shifted_sum, shifted_sumsq = totals['sum'][keep], totals['sumsq'][keep]
+
+        safe_count = np.maximum(count, 1)
+        mean = self.shift[rows] + shifted_sum / safe_count
+        squared_deviation = np.maximum(shifted_sumsq - shifted_sum ** 2 / safe_count, 0.0)
+
+        return SeasonalStatistics(
+            [self.parameters[r] for r in rows],
+            count,
+            mean,
+            squared_deviation / safe_count,
+            np.where(count > 1, squared_deviation / np.maximum(count - 1, 1), 0.0),
+            np.rint(totals['above'][keep]).astype(np.int64),
+            np.rint(totals['below'][keep]).astype(np.int64),
+        )
+
+    def yearly_means(self, parameters: List[str], target_month: int, target_day: int,
+                     tolerance_days: int) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Mean of each parameter's window samples per season year, straight from the value cube
+
+        Days that wrap around the year boundary count toward the neighbouring year's window, and partial
+        seasons outside the indexed years are dropped, as trend_engine.season_years/yearly_means do.
+
+        Args:
+            parameters: Parameter codes in output order
+            target_month: Target month
+            target_day: Target day
+            tolerance_days: Number of days before/after target date to include
+
+        Returns:
+            Tuple of (parameters with samples, years, means shaped (parameters, years) with NaN for empty years)
+        """
+        kept = [p for p in parameters if p in self.row]
+        rows = np.array([self.row[p] for p in kept], dtype=np.intp)
+        num_years = self.end_year - self.start_year + 1
+        sums = np.zeros((len(rows), num_years))
+        counts = np.zeros((len(rows), num_years))
+
+        target = int(LEAP_MONTH_OFFSETS[target_month - 1]) + target_day if kept else 0
+        for first_day, last_day in window_ranges(target_month, target_day, tolerance_days):
+            block = self.daily[rows, :, first_day - 1:last_day]
+            valid = ~np.isnan(block)
+            block_sums = np.where(valid, block, 0.0).sum(axis=2)
+            block_counts = valid.sum(axis=2)
+
+            # Ranges beyond 180 days from the target belong to the next or previous season year
+            shift = 1 if first_day - target > 180 else (-1 if last_day - target < -180 else 0)
+            source = slice(max(0, -shift), num_years - max(0, shift))
+            destination = slice(max(0, shift), num_years - max(0, -shift))
+            sums[:, destination] += block_sums[:, source]
+            counts[:, destination] += block_counts[:, source]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        has_data = counts.sum(axis=1) > 0
+        return [p for p, keep in zip(kept, has_data) if keep], np.arange(self.start_year, self.end_year + 1), means[has_data]
+
+    def save(self, path: str) -> None:
+        """
+        Serialize the index to a compressed .npz file that other workers can load
+
+        Args:
+            path: Output file path
+        """
+        metadata = {
+            'version': self.FORMAT_VERSION,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'start_year': self.start_year,
+            'end_year': self.end_year,
+            'parameters': self.parameters,
+            'above_thresholds': self.above_thresholds,
+            'below_thresholds': self.below_thresholds,
+        }
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, daily=self.daily, metadata=np.array(json.dumps(metadata)))
+
+    @classmethod
+    def load(cls, path: str) -> 'ClimatologyIndex':
+        """
+        Load an index written by save()
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            ClimatologyIndex
+        """
+        with np.load(path) as archive:
+            metadata: Dict[str, Any] = json.loads(str(archive['metadata']))
+            daily = archive['daily']
+        if metadata.get('version') != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported climatology index version in {path}: {metadata.get('version')}")
+        return cls(metadata['latitude'], metadata['longitude'], metadata['start_year'], metadata['end_year'],
+                   metadata['parameters'], daily, metadata['above_thresholds'], metadata['below_thresholds'])
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Precomputed climatology tiles
+Each tile file holds the day-of-year value cubes of every Power grid cell in a square of the globe, written
+offline by build_climatology_tiles.py. At request time the estimator answers from the tile's climatology
+index whenever a tile covers the cell, and fetches live otherwise.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .climatology_index import ClimatologyIndex
+    from .power_grid import PowerGrid, MERRA2_GRID
+except ImportError:
+    from climatology_index import ClimatologyIndex
+    from power_grid import PowerGrid, MERRA2_GRID
+
+
+TILE_FORMAT_VERSION = 2
+
+# Tile edge in degrees: 10 x 8 MERRA-2 cells (both grid steps divide it evenly)
+DEFAULT_TILE_DEGREES = 5.0
+
+# Same storage precision as the climate store
+TILE_DTYPE = np.dtype('<f4')
+
+
+def tile_key(latitude: float, longitude: float, tile_degrees: float = DEFAULT_TILE_DEGREES) -> Tuple[int, int]:
+    """
+    Tile holding a grid cell
+
+    Args:
+        latitude: Cell centre latitude
+        longitude: Cell centre longitude
+        tile_degrees: Tile edge in degrees
+
+    Returns:
+        Tuple of (latitude index, longitude index)
+    """
+    return math.floor(latitude / tile_degrees), math.floor(longitude / tile_degrees)
+
+
+def tile_filename(key: Tuple[int, int], start_year: int, end_year: int) -> str:
+    """File name of a tile for a year range"""
+    return f"tile_{start_year}-{end_year}_{key[0]}_{key[1]}.npz"
+
+
+def cells_in_bbox(lat_min: float, lat_max: float, lon_min: float, lon_max: float,
+                  grid: PowerGrid = MERRA2_GRID) -> List[Tuple[float, float]]:
+    """
+    Centres of every grid cell overlapping a bounding box
+
+    Args:
+        lat_min: Southern edge
+        lat_max: Northern edge
+        lon_min: Western edge
+        lon_max: Eastern edge (must not be west of lon_min; boxes crossing the antimeridian are not supported)
+        grid: Grid the cells belong to
+
+    Returns:
+        List of (latitude, longitude) cell centres
+    """
+    first_lat, first_lon = grid.snap(lat_min, lon_min)
+    last_lat, last_lon = grid.snap(lat_max, lon_max)
+    num_lat = int(round((last_lat - first_lat) / grid.latitude_step)) + 1
+    num_lon = int(round((last_lon - first_lon) / grid.longitude_step)) + 1
+    return [
+        grid.snap(first_lat + i * grid.latitude_step, first_lon + j * grid.longitude_step)
+        for i in range(max(0, num_lat)) for j in range(max(0, num_lon))
+    ]
+
+
+class ClimatologyTiles:
+    """Read side of the tile directory: climatology indexes for covered grid cells"""
+
+    def __init__(self, tile_dir: str, tile_degrees: float = DEFAULT_TILE_DEGREES,
+                 max_tiles: int = 64, max_indexes: int = 1024):
+        """
+        Initialize the tile reader
+
+        Args:
+            tile_dir: Directory written by build_climatology_tiles
+            tile_degrees: Tile edge in degrees (must match the builder)
+            max_tiles: Decoded tiles kept in memory
+            max_indexes: Per-cell climatology indexes kept in memory
+        """
+        self.tile_dir = tile_dir
+        self.tile_degrees = tile_degrees
+        self.max_tiles = max_tiles
+        self.max_indexes = max_indexes
+
+        self._tiles: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._indexes: 'OrderedDict[Tuple[str, int], ClimatologyIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load_tile(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Decode a tile file (cached)
+
+        Args:
+            path: Tile file path
+
+        Returns:
+            Dictionary with metadata, daily cube and cell positions, or None when the file is missing or unusable
+        """
+        with self._lock:
+            tile = self._tiles.get(path)
+            if tile is not None:
+                self._tiles.move_to_end(path)
+                return tile
+
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as archive:
+                metadata = json.loads(str(archive['metadata']))
+                daily = archive['daily']
+                cells = archive['cells']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: ignoring unreadable climatology tile {path}: {e}")
+            return None
+        if metadata.get('version') != TILE_FORMAT_VERSION:
+            print(f"Warning: ignoring climatology tile {path} with version {metadata.get('version')}")
+            return None
+
+        tile = {
+            'metadata': metadata,
+            'daily': daily,
+            'cells': {(float(lat), float(lon)): i for i, (lat, lon) in enumerate(cells)},
+        }
+        with self._lock:
+            self._tiles[path] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return tile
+
+    def index_for(self, latitude: float, longitude: float, start_year: int, end_year: int) -> Optional[ClimatologyIndex]:
+        """
+        Climatology index of a grid cell from its tile
+
+        Args:
+            latitude: Cell centre latitude
+            longitude: Cell centre longitude
+            start_year: First year of the historical range
+            end_year: Last year of the historical range
+
+        Returns:
+            ClimatologyIndex, or None when no tile covers the cell and year range
+        """
+        path = os.path.join(self.tile_dir, tile_filename(tile_key(latitude, longitude, self.tile_degrees),
+                                                         start_year, end_year))
+        tile = self.load_tile(path)
+        row = tile['cells'].get((latitude, longitude)) if tile is not None else None
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            index = self._indexes.get((path, row))
+            if index is not None:
+                self._indexes.move_to_end((path, row))
+                return index
+
+        metadata = tile['metadata']
+        index = ClimatologyIndex(latitude, longitude, metadata['start_year'], metadata['end_year'],
+                                 metadata['parameters'], tile['daily'][row].astype(np.float64),
+                                 metadata['above_thresholds'], metadata['below_thresholds'])
+        with self._lock:
+            self._indexes[(path, row)] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        """Cell lookups answered from tiles (hits) or not covered (misses), and tiles held in memory"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'tiles_loaded': len(self._tiles),
+                'indexes_loaded': len(self._indexes),
+            }
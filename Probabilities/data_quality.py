@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Validity masks for NASA Power daily values
+One vectorized check shared by the estimator and the completeness analyzer: a value is usable when it is
+present (not null/NaN), is not the Power fill value and lies within the physically plausible range of its parameter
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+# Value Power reports for days it has no data for (header.fill_value in API responses)
+POWER_FILL_VALUE = -999.0
+
+# Inclusive bounds of physically plausible daily values; anything outside is treated as missing
+PLAUSIBLE_RANGES = {
+    'T2M': (-90.0, 60.0),                    # °C
+    'T2M_MAX': (-90.0, 65.0),                # °C
+    'T2M_MIN': (-95.0, 60.0),                # °C
+    'T2MWET': (-95.0, 40.0),                 # °C
+    'PRECTOTCORR': (0.0, 2000.0),            # mm/day
+    'WS2M': (0.0, 100.0),                    # m/s
+    'WD2M': (0.0, 360.0),                    # degrees
+    'RH2M': (0.0, 100.0),                    # %
+    'IMERG_PRECLIQUID_PROB': (0.0, 100.0),   # %
+    'CLRSKY_SFC_SW_DWN': (0.0, 15.0),        # kWh/m^2/day
+}
+
+
+def valid_mask(parameter: str, values: np.ndarray) -> np.ndarray:
+    """
+    Usable values of one parameter
+
+    Args:
+        parameter: Parameter code (unknown codes are only checked for NaN and the fill value)
+        values: Daily values, NaN for missing days
+
+    Returns:
+        Boolean mask with the same shape as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    low, high = PLAUSIBLE_RANGES.get(parameter, (-np.inf, np.inf))
+    # NaN fails both comparisons, so missing days are excluded without a separate check
+    return (values >= low) & (values <= high) & (values != POWER_FILL_VALUE)
+
+
+def mask_invalid(parameter: str, values: np.ndarray) -> np.ndarray:
+    """
+    Replace unusable values with NaN in place
+
+    Args:
+        parameter: Parameter code
+        values: Writable float array of daily values
+
+    Returns:
+        The same array
+    """
+    values[~valid_mask(parameter, values)] = np.nan
+    return values
+
+
+def quality_masks(parameter: str, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Classify every value of one parameter
+
+    Args:
+        parameter: Parameter code
+        values: Daily values, NaN for missing days
+
+    Returns:
+        Disjoint boolean masks: 'valid', 'missing' (null/NaN), 'fill' (Power fill value) and 'implausible'
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = valid_mask(parameter, values)
+    missing = np.isnan(values)
+    fill = values == POWER_FILL_VALUE
+    return {
+        'valid': valid,
+        'missing': missing,
+        'fill': fill,
+        'implausible': ~(valid | missing | fill),
+    }
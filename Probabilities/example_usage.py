@@ -113,10 +113,12 @@ def example_compare_dates():
     # Compare different dates - using all parameters by default
     dates_to_compare = ["01/15", "04/15", "07/15", "10/15"]
     
+    # One API request serves every date
+    all_results = estimator.predict_weather_for_dates(dates_to_compare, tolerance_days=7)
+    
     comparison_results = {}
     
-    for date in dates_to_compare:
-        results = estimator.predict_weather_for_date(date, tolerance_days=7)
+    for date, results in all_results.items():
         comparison_results[date] = {
             'probabilities': results.get('probabilities', {}),
             'predicted_values': results.get('predicted_values', {}),
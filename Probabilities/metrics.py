@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Per-stage latency histograms and counters for the prediction hot path
+Rendered in the Prometheus text exposition format by the Flask app's /metrics endpoint. Metrics are kept per
+process; with several server workers, each scrape reports the worker that answered it.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Upper bounds in seconds: sub-millisecond index queries up to slow upstream downloads
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stages of predict_weather_for_date, in the order a cold request goes through them
+STAGES = ('parse', 'cache_lookup', 'upstream_fetch', 'json_decode', 'seasonal_extraction', 'statistics', 'trend',
+          'serialization')
+
+METRIC_HELP = {
+    'weather_stage_seconds': 'Time spent in each stage of a prediction',
+    'weather_request_seconds': 'Time to answer an API request, by endpoint',
+    'weather_upstream_bytes_total': 'Response body bytes downloaded from NASA Power',
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: Dict[str, Any]) -> str:
+    """Prometheus label set such as {stage="parse"} (empty string for no labels)"""
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def format_value(value: float) -> str:
+    """Sample value without exponent rounding (whole numbers print as integers)"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def format_family(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, Any], float]]) -> str:
+    """
+    One metric family in the text exposition format
+
+    Args:
+        name: Metric name
+        kind: counter, gauge or histogram
+        help_text: HELP line
+        samples: (labels, value) pairs
+
+    Returns:
+        HELP and TYPE lines followed by one line per sample
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples)
+    return '\n'.join(lines) + '\n'
+
+
+class StageMetrics:
+    """Thread-safe latency histograms and counters, keyed by metric name and labels"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        Initialize the registry
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds, ascending
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (name, labels) -> [per-bucket counts..., overflow count, sum]
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Record one observation in a histogram
+
+        Args:
+            name: Histogram name
+            value: Observed value (seconds for latencies)
+            **labels: Label values
+        """
+        slot = bisect.bisect_left(self.buckets, value)
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[slot] += 1
+            histogram[-1] += value
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one observation of weather_stage_seconds{stage=...}"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('weather_stage_seconds', time.perf_counter() - started, stage=stage)
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        """
+        Add to a counter
+
+        Args:
+            name: Counter name (ending in _total)
+            amount: Amount added
+            **labels: Label values
+        """
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def totals(self, name: str = 'weather_stage_seconds') -> Dict[str, Dict[str, float]]:
+        """
+        Observation count and sum of one histogram per label set
+
+        Args:
+            name: Histogram name
+
+        Returns:
+            Label values joined with commas (e.g. the stage) -> {'count', 'sum'}
+        """
+        with self._lock:
+            return {
+                ','.join(value for _, value in labels): {'count': int(sum(values[:-1])), 'sum': values[-1]}
+                for (metric, labels), values in sorted(self._histograms.items()) if metric == name
+            }
+
+    def render(self) -> str:
+        """
+        Every histogram and counter in the Prometheus text exposition format
+
+        Returns:
+            Exposition text, one family per metric name
+        """
+        with self._lock:
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+            counters = dict(self._counters)
+
+        families: Dict[str, List[str]] = {}
+        for (name, labels), values in sorted(histograms.items()):
+            lines = families.setdefault(name, [f"# HELP {name} {METRIC_HELP.get(name, name)}", f"# TYPE {name} histogram"])
+            label_dict = dict(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels({**label_dict, 'le': f'{bound:g}'})} {cumulative}")
+            cumulative += values[len(self.buckets)]
+            lines.append(f"{name}_bucket{format_labels({**label_dict, 'le': '+Inf'})} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(label_dict)} {format_value(values[-1])}")
+            lines.append(f"{name}_count{format_labels(label_dict)} {cumulative}")
+        for (name, labels), value in sorted(counters.items()):
+            lines = families.setdefault(name, [f"# HELP {name} {METRIC_HELP.get(name, name)}", f"# TYPE {name} counter"])
+            lines.append(f"{name}{format_labels(dict(labels))} {format_value(value)}")
+
+        return ''.join('\n'.join(lines) + '\n' for lines in families.values())
+
+    def reset(self) -> None:
+        """Drop every observation"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def cache_families(caches: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Hits, misses and hit ratio of every cache layer
+
+    Args:
+        caches: Cache name -> stats() dictionary with hits, misses and hit_ratio (shared_hits count as hits)
+
+    Returns:
+        Exposition text for weather_cache_hits_total, weather_cache_misses_total and weather_cache_hit_ratio
+    """
+    return (
+        format_family('weather_cache_hits_total', 'counter', 'Lookups answered by each cache layer',
+                      [({'cache': name}, stats['hits'] + stats.get('shared_hits', 0)) for name, stats in caches.items()])
+        + format_family('weather_cache_misses_total', 'counter', 'Lookups each cache layer could not answer',
+                        [({'cache': name}, stats['misses']) for name, stats in caches.items()])
+        + format_family('weather_cache_hit_ratio', 'gauge', 'Fraction of lookups answered by each cache layer',
+                        [({'cache': name}, stats['hit_ratio']) for name, stats in caches.items()])
+    )
+
+
+def upstream_families(session_stats: Dict[str, Any], coalescing: Dict[str, Any]) -> str:
+    """
+    NASA Power request, attempt, retry and failure counts, and coalesced downloads
+
+    Args:
+        session_stats: PowerSession.stats()
+        coalescing: SingleFlight.stats()
+
+    Returns:
+        Exposition text for the weather_upstream_* families
+    """
+    return (
+        format_family('weather_upstream_requests_total', 'counter', 'Requests made to NASA Power',
+                      [({}, session_stats['requests'])])
+        + format_family('weather_upstream_attempts_total', 'counter', 'HTTP attempts made to NASA Power, including retries',
+                        [({}, session_stats['attempts'])])
+        + format_family('weather_upstream_retries_total', 'counter', 'Retried NASA Power attempts',
+                        [({}, session_stats['retries'])])
+        + format_family('weather_upstream_failures_total', 'counter', 'NASA Power requests that failed after every retry',
+                        [({}, session_stats['failures'])])
+        + format_family('weather_upstream_coalesced_total', 'counter', 'Callers that shared another caller\'s download',
+                        [({}, coalescing['followers'])])
+    )
+
+
+_shared_metrics: Optional[StageMetrics] = None
+_shared_metrics_lock = threading.Lock()
+
+
+def get_shared_metrics() -> StageMetrics:
+    """Process-wide StageMetrics, created on first use"""
+    global _shared_metrics
+    with _shared_metrics_lock:
+        if _shared_metrics is None:
+            _shared_metrics = StageMetrics()
+        return _shared_metrics
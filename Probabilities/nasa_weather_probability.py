@@ -11,9 +11,42 @@ import datetime
 from typing import Dict, List, Any, Optional, Tuple
 import argparse
 import sys
-from collections import defaultdict
 import math
 
+import numpy as np
+
+try:
+    from .power_cache import PowerResponseCache, merge_power_responses
+    from .power_session import PowerSession, get_shared_session, power_base_url
+    from .single_flight import SingleFlight, get_shared_single_flight
+    from .power_grid import PowerGrid, MERRA2_GRID, EXACT_COORDINATES
+    from .power_stream import ChunkReader, series_from_power_stream, streaming_available
+    from .climate_store import ClimateStore, DailySeries, date_keys_day_of_year, date_keys_year, expected_window_days, seasonal_window_mask
+    from .data_quality import valid_mask
+    from .seasonal_statistics import SeasonalStatistics, sample_matrix
+    from .climatology_index import ClimatologyIndex
+    from .trend_engine import fit_trends, season_years, trends_from_samples
+    from .result_memo import ResultMemo
+    from .climatology_tiles import ClimatologyTiles
+    from .metrics import StageMetrics, get_shared_metrics
+    from .request_profiler import RequestProfiler
+except ImportError:
+    # Allow running this file directly as a script from the Probabilities directory
+    from power_cache import PowerResponseCache, merge_power_responses
+    from power_session import PowerSession, get_shared_session, power_base_url
+    from single_flight import SingleFlight, get_shared_single_flight
+    from power_grid import PowerGrid, MERRA2_GRID, EXACT_COORDINATES
+    from power_stream import ChunkReader, series_from_power_stream, streaming_available
+    from climate_store import ClimateStore, DailySeries, date_keys_day_of_year, date_keys_year, expected_window_days, seasonal_window_mask
+    from data_quality import valid_mask
+    from seasonal_statistics import SeasonalStatistics, sample_matrix
+    from climatology_index import ClimatologyIndex
+    from trend_engine import fit_trends, season_years, trends_from_samples
+    from result_memo import ResultMemo
+    from climatology_tiles import ClimatologyTiles
+    from metrics import StageMetrics, get_shared_metrics
+    from request_profiler import RequestProfiler
+
 
 class NASAWeatherProbability:
     """Main class for handling NASA Power API requests and date-specific probability calculations"""
@@ -41,6 +74,18 @@ class NASAWeatherProbability:
         'very_uncomfortable_humidity': 80.0  # % (Muggy)
     }
     
+    # Bytes read from the network per step when decoding a response as a stream
+    STREAM_CHUNK_BYTES = 64 * 1024
+    
+    # Probability outputs: (name, parameters counted, exceedance direction, THRESHOLDS key)
+    PROBABILITY_RULES = [
+        ('very_hot', ('T2M', 'T2M_MAX'), 'above', 'very_hot_temp'),
+        ('very_cold', ('T2M', 'T2M_MAX'), 'below', 'very_cold_temp'),
+        ('very_windy', ('WS2M',), 'above', 'very_windy_speed'),
+        ('very_wet', ('PRECTOTCORR',), 'above', 'very_wet_precip'),
+        ('very_uncomfortable', ('RH2M',), 'above', 'very_uncomfortable_humidity'),
+    ]
+    
     # Additional thresholds for weather conditions
     WEATHER_THRESHOLDS = {
         'heavy_rain': 10.0,      # mm/day
@@ -58,7 +103,12 @@ class NASAWeatherProbability:
         'moderate_air': 5        # air quality index
     }
     
-    def __init__(self, longitude: float, latitude: float, start_year: Optional[int] = None, end_year: Optional[int] = None):
+    def __init__(self, longitude: float, latitude: float, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                 cache: Optional[PowerResponseCache] = None, store: Optional[ClimateStore] = None,
+                 climatology_index: Optional[ClimatologyIndex] = None, session: Optional[PowerSession] = None,
+                 single_flight: Optional[SingleFlight] = None, grid: Optional[PowerGrid] = None,
+                 memo: Optional[ResultMemo] = None, tiles: Optional[ClimatologyTiles] = None,
+                 metrics: Optional[StageMetrics] = None, profiler: Optional[RequestProfiler] = None):
         """
         Initialize the NASA Weather Probability estimator
         
@@ -67,16 +117,43 @@ class NASAWeatherProbability:
             latitude: Latitude coordinate
             start_year: Start year for data collection (if None, uses current_year - 11)
             end_year: End year for data collection (if None, uses current_year - 1)
+            cache: Optional persistent response cache consulted before calling the API
+            store: Optional columnar series store read instead of parsing API responses
+            climatology_index: Optional prebuilt index answering seasonal statistics without rescanning the series
+            session: HTTP session for API calls (if None, uses the process-wide pooled session)
+            single_flight: Coalescer sharing one download between concurrent identical requests
+                (if None, uses the process-wide instance)
+            grid: Grid that coordinates are snapped to before fetching (if None, uses the Power MERRA-2 grid)
+            memo: Optional memo of finished predictions answering repeated requests without recomputing
+            tiles: Optional precomputed climatology tiles (or pinned warm indexes) used as the index when they cover this grid cell
+            metrics: Stage latency histograms and counters (if None, uses the process-wide instance)
+            profiler: Optional profiler capturing CPU and allocation traces of sampled or requested predictions
         """
         self.longitude = longitude
         self.latitude = latitude
         
+        # Data is fetched, cached and indexed per grid cell so nearby coordinates share it
+        self.grid = grid if grid is not None else MERRA2_GRID
+        self.cell_latitude, self.cell_longitude = self.grid.snap(latitude, longitude)
+        
         # Set dynamic year range if not provided
         current_year = datetime.datetime.now().year
         self.start_year = start_year if start_year is not None else current_year - 11
         self.end_year = end_year if end_year is not None else current_year - 1
         
-        self.base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
+        self.base_url = power_base_url()
+        self.community = "RE"
+        self.cache = cache
+        self.store = store
+        self.climatology_index = climatology_index
+        self.session = session if session is not None else get_shared_session()
+        self.single_flight = single_flight if single_flight is not None else get_shared_single_flight()
+        self.memo = memo
+        self.tiles = tiles
+        self.metrics = metrics if metrics is not None else get_shared_metrics()
+        self.profiler = profiler
+        # Name of the profile captured by the last prediction, if it was profiled
+        self.last_profile: Optional[str] = None
         
         # Use all available parameters by default
         self.default_parameters = list(self.AVAILABLE_PARAMETERS.keys())
@@ -129,31 +206,84 @@ class NASAWeatherProbability:
         """
         params_str = ','.join(parameters)
         
-        url = f"{self.base_url}?parameters={params_str}&community=RE&longitude={self.longitude}&latitude={self.latitude}&start={start_date}&end={end_date}&format=JSON"
+        url = f"{self.base_url}?parameters={params_str}&community={self.community}&longitude={self.cell_longitude}&latitude={self.cell_latitude}&start={start_date}&end={end_date}&format=JSON"
         
         return url
     
-    def make_api_request(self, parameters: List[str]) -> Dict[str, Any]:
+    def make_api_request(self, parameters: List[str], start_year: Optional[int] = None,
+                         end_year: Optional[int] = None) -> Dict[str, Any]:
         """
         Make a request to NASA Power API
         
         Args:
             parameters: List of parameter codes to request
+            start_year: First year to request (if None, uses the configured start year)
+            end_year: Last year to request (if None, uses the configured end year)
             
         Returns:
             API response data
         """
-        start_date = f"{self.start_year}0101"
-        end_date = f"{self.end_year}1231"
+        start_year = start_year if start_year is not None else self.start_year
+        end_year = end_year if end_year is not None else self.end_year
         
-        url = self.build_api_url(parameters, start_date, end_date)
+        # The cache holds one entry per parameter: serve what it has and fetch only the rest, in one call
+        cached = self.cached_parameters(parameters, start_year, end_year)
+        missing = [p for p in parameters if p not in cached]
+        if not missing:
+            return merge_power_responses([cached[p] for p in parameters])
+        
+        url = self.build_api_url(missing, f"{start_year}0101", f"{end_year}1231")
+        
+        # Concurrent requests for the same URL share one download; after waiting on another
+        # process the cache is checked again before fetching
+        def recheck() -> Optional[Dict[str, Any]]:
+            found = self.cached_parameters(missing, start_year, end_year)
+            return merge_power_responses([found[p] for p in missing]) if len(found) == len(missing) else None
+        
+        data = self.single_flight.do(url, lambda: self.fetch_api_data(url, start_year, end_year),
+                                     recheck if self.cache is not None else None)
+        return self.merge_cached_parameters(cached, data)
+    
+    def cached_parameters(self, parameters: List[str], start_year: int, end_year: int) -> Dict[str, Dict[str, Any]]:
+        """Single-parameter responses available in the response cache for this grid cell and year range"""
+        if self.cache is None:
+            return {}
+        with self.metrics.time('cache_lookup'):
+            return self.cache.get_parameters(self.cell_latitude, self.cell_longitude, parameters,
+                                             start_year, end_year, self.community)
+    
+    def merge_cached_parameters(self, cached: Dict[str, Dict[str, Any]], data: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine freshly fetched data with the cached parameters (a failed fetch stays empty)"""
+        if not cached or 'properties' not in data:
+            return data
+        return merge_power_responses(list(cached.values()) + [data])
+    
+    def fetch_api_data(self, url: str, start_year: int, end_year: int) -> Dict[str, Any]:
+        """
+        Download and decode one NASA Power API response
         
+        Args:
+            url: Request URL
+            start_year: First year of the request, for the cache entries
+            end_year: Last year of the request, for the cache entries
+            
+        Returns:
+            API response data (empty on failure)
+        """
         try:
             print(f"Making request to: {url}")
-            response = requests.get(url, timeout=30)
+            with self.metrics.time('upstream_fetch'):
+                response = self.session.get(url, timeout=30)
             response.raise_for_status()
+            self.metrics.increment('weather_upstream_bytes_total', len(response.content))
             
-            data = response.json()
+            with self.metrics.time('json_decode'):
+                data = response.json()
+            
+            # Only cache well-formed responses so a bad upstream reply is retried next time
+            if self.cache is not None and 'properties' in data:
+                self.cache.put_parameters(self.cell_latitude, self.cell_longitude, data,
+                                          start_year, end_year, self.community)
             return data
             
         except requests.exceptions.RequestException as e:
@@ -172,24 +302,34 @@ class NASAWeatherProbability:
             
         Returns:
             Tuple of (month, day)
+            
+        Raises:
+            ValueError: If the format is not recognized or the month and day are not a calendar date
         """
+        month_day = None
         try:
             if '/' in date_str:
                 parts = date_str.split('/')
                 if len(parts) == 3:  # YYYY/MM/DD
-                    return int(parts[1]), int(parts[2])
+                    month_day = int(parts[1]), int(parts[2])
                 elif len(parts) == 2:  # MM/DD
-                    return int(parts[0]), int(parts[1])
+                    month_day = int(parts[0]), int(parts[1])
             else:
                 # Assume YYYYMMDD format
                 if len(date_str) == 8:
-                    month = int(date_str[4:6])
-                    day = int(date_str[6:8])
-                    return month, day
+                    month_day = int(date_str[4:6]), int(date_str[6:8])
         except (ValueError, IndexError):
             pass
         
-        raise ValueError(f"Invalid date format: {date_str}. Use YYYY/MM/DD, MM/DD, or YYYYMMDD")
+        if month_day is None:
+            raise ValueError(f"Invalid date format: {date_str}. Use YYYY/MM/DD, MM/DD, or YYYYMMDD")
+        
+        try:
+            # A leap year, so 02/29 is accepted
+            datetime.date(2024, *month_day)
+        except ValueError:
+            raise ValueError(f"Invalid date: {date_str}. Month or day out of range")
+        return month_day
     
     def get_seasonal_data(self, data: Dict[str, Any], parameters: List[str], target_month: int, target_day: int, tolerance_days: int = 7) -> Dict[str, List[float]]:
         """
@@ -205,13 +345,37 @@ class NASAWeatherProbability:
         Returns:
             Dictionary with parameter data for seasonal analysis
         """
+        seasonal_data = self.get_seasonal_window(data, parameters, target_month, target_day, tolerance_days)[0]
+        return {param: values[~np.isnan(values)].tolist() for param, values in seasonal_data.items()}
+    
+    def get_seasonal_window(self, data: Dict[str, Any], parameters: List[str], target_month: int, target_day: int, tolerance_days: int = 7) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Extract data for dates around the target date across all years, with the season year of every sample
+        
+        Args:
+            data: Raw API response data
+            parameters: List of requested parameters
+            target_month: Target month
+            target_day: Target day
+            tolerance_days: Number of days before/after target date to include
+            
+        Returns:
+            Tuple of (parameter -> window samples with NaN for missing days, parameter -> season year of each sample)
+        """
         if not data or 'properties' not in data:
-            return {}
+            return {}, {}
         
         properties = data['properties']
         parameter_data = properties.get('parameter', {})
         
-        seasonal_data = defaultdict(list)
+        seasonal_data = {}
+        seasonal_years = {}
+        
+        # Date keys are shared by every parameter in a response, so parse them and build the window once
+        window_keys = None
+        window = None
+        window_years = None
+        window_sample_years = None
         
         for param in parameters:
             if param not in parameter_data:
@@ -221,23 +385,170 @@ class NASAWeatherProbability:
             if not param_values:
                 continue
             
-            # Extract values for dates around target date
-            for date_key, value_data in param_values.items():
-                if isinstance(value_data, (int, float)) and value_data is not None:
-                    try:
-                        # Parse date from key (format: YYYYMMDD)
-                        if len(date_key) == 8:
-                            year = int(date_key[:4])
-                            month = int(date_key[4:6])
-                            day = int(date_key[6:8])
-                            
-                            # Check if this date is within tolerance of target date
-                            if self.is_date_in_range(month, day, target_month, target_day, tolerance_days):
-                                seasonal_data[param].append(value_data)
-                    except (ValueError, IndexError):
-                        continue
-        
-        return dict(seasonal_data)
+            date_keys = list(param_values.keys())
+            if date_keys != window_keys:
+                window_keys = date_keys
+                day_of_year = date_keys_day_of_year(date_keys)
+                window = seasonal_window_mask(day_of_year, target_month, target_day, tolerance_days)
+                window_years = season_years(date_keys_year(date_keys), day_of_year, target_month, target_day)
+                window_sample_years = window_years[window]
+            
+            values = np.array(list(param_values.values()))
+            if values.dtype.kind not in 'biuf':
+                # Nulls or strings in the series: keep only numeric values, like the per-key check did
+                values = np.array([v if isinstance(v, (int, float)) else np.nan for v in param_values.values()], dtype=np.float64)
+            
+            # Fill values, missing days and implausible values become NaN through the shared validity mask
+            selected_mask = window & valid_mask(param, values)
+            if selected_mask.any():
+                # Every parameter keeps the whole window, so all of them share one year array and one trend fit
+                seasonal_data[param] = np.where(selected_mask, values, np.nan)[window]
+                seasonal_years[param] = window_sample_years
+        
+        return seasonal_data, seasonal_years
+    
+    def load_series(self, parameters: List[str]) -> Optional[DailySeries]:
+        """
+        Load daily series for this location from the climate store, populating it from the API when needed
+        
+        Args:
+            parameters: List of parameter codes to load
+            
+        Returns:
+            DailySeries covering the configured year range, or None if the data could not be retrieved
+        """
+        if self.store is None:
+            return None
+        
+        with self.metrics.time('cache_lookup'):
+            series = self.store.load(self.cell_latitude, self.cell_longitude, parameters, self.start_year, self.end_year)
+        if series is not None:
+            return series
+        
+        # Only the (parameter, year span) blocks missing from the store are downloaded
+        plan = self.store.plan_fetches(self.cell_latitude, self.cell_longitude, parameters, self.start_year, self.end_year)
+        for (start_year, end_year), missing in plan.items():
+            if not self.fill_store(missing, start_year, end_year):
+                return None
+        
+        return self.store.load(self.cell_latitude, self.cell_longitude, parameters, self.start_year, self.end_year)
+    
+    def fill_store(self, parameters: List[str], start_year: int, end_year: int) -> bool:
+        """
+        Download parameters for a year span into the climate store
+        
+        When ijson is installed the response body is decoded as a stream straight into arrays, so the store never
+        needs the full JSON document in memory. That path skips the response cache: the store already keeps every
+        downloaded series, so a second copy would only be looked up and never filled. Without ijson the request
+        goes through make_api_request and its per-parameter response cache.
+        
+        Args:
+            parameters: List of parameter codes to download
+            start_year: First year of the span
+            end_year: Last year of the span
+            
+        Returns:
+            True when the response was merged into the store (parameters it lacks are stored as missing days)
+        """
+        url = self.build_api_url(parameters, f"{start_year}0101", f"{end_year}1231")
+        
+        # Only the leader writes the store; callers that waited on it reload what it merged
+        def fetch_and_merge() -> bool:
+            if streaming_available():
+                fetched = self.fetch_series(url, parameters)
+            else:
+                fetched = DailySeries.from_power_json(self.make_api_request(parameters, start_year, end_year), parameters)
+            if fetched is None:
+                return False
+            # Parameters missing from the response are stored as missing days, so the cell is not fetched again
+            self.store.merge(self.cell_latitude, self.cell_longitude, fetched.with_parameters(parameters))
+            return True
+        
+        # Another process may have filled the store while this one waited for the lock
+        def recheck() -> Optional[bool]:
+            stored = self.store.load(self.cell_latitude, self.cell_longitude, parameters, start_year, end_year)
+            return True if stored is not None else None
+        
+        return self.single_flight.do(f"{url}#series", fetch_and_merge, recheck)
+    
+    def fetch_series(self, url: str, parameters: List[str]) -> Optional[DailySeries]:
+        """
+        Download one NASA Power API response and decode it as a stream
+        
+        Args:
+            url: Request URL
+            parameters: Parameter codes to keep from the response
+            
+        Returns:
+            DailySeries, or None on failure
+        """
+        try:
+            print(f"Making request to: {url}")
+            with self.metrics.time('upstream_fetch'):
+                response = self.session.get(url, timeout=30, stream=True)
+            with response:
+                response.raise_for_status()
+                reader = ChunkReader(response.iter_content(self.STREAM_CHUNK_BYTES))
+                try:
+                    # The body arrives while it is decoded, so its transfer time counts as decoding
+                    with self.metrics.time('json_decode'):
+                        return series_from_power_stream(reader, parameters)
+                finally:
+                    self.metrics.increment('weather_upstream_bytes_total', reader.bytes_read)
+            
+        except requests.exceptions.RequestException as e:
+            print(f"Error making API request: {e}")
+            return None
+        except ValueError as e:
+            print(f"Error parsing JSON response: {e}")
+            return None
+    
+    def get_seasonal_data_from_series(self, series: DailySeries, parameters: List[str], target_month: int, target_day: int, tolerance_days: int = 7) -> Dict[str, List[float]]:
+        """
+        Extract data for dates around the target date across all years from a DailySeries
+        
+        Args:
+            series: Daily series for the location
+            parameters: List of requested parameters
+            target_month: Target month
+            target_day: Target day
+            tolerance_days: Number of days before/after target date to include
+            
+        Returns:
+            Dictionary with parameter data for seasonal analysis
+        """
+        seasonal_data = self.get_seasonal_window_from_series(series, parameters, target_month, target_day, tolerance_days)[0]
+        return {param: values[~np.isnan(values)].tolist() for param, values in seasonal_data.items()}
+    
+    def get_seasonal_window_from_series(self, series: DailySeries, parameters: List[str], target_month: int, target_day: int, tolerance_days: int = 7) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Extract data for dates around the target date from a DailySeries, with the season year of every sample
+        
+        Args:
+            series: Daily series for the location
+            parameters: List of requested parameters
+            target_month: Target month
+            target_day: Target day
+            tolerance_days: Number of days before/after target date to include
+            
+        Returns:
+            Tuple of (parameter -> window samples with NaN for missing days, parameter -> season year of each sample)
+        """
+        window = seasonal_window_mask(series.day_of_year(), target_month, target_day, tolerance_days)
+        window_years = season_years(series.years()[window], series.day_of_year()[window], target_month, target_day)
+        
+        seasonal_data = {}
+        seasonal_years = {}
+        for param in parameters:
+            if param not in series.values:
+                continue
+            values = np.asarray(series.values[param][window], dtype=np.float64)
+            if not np.isnan(values).all():
+                # Missing days stay NaN, so every parameter shares one year array and one trend fit
+                seasonal_data[param] = values
+                seasonal_years[param] = window_years
+        
+        return seasonal_data, seasonal_years
     
     def is_date_in_range(self, month: int, day: int, target_month: int, target_day: int, tolerance_days: int) -> bool:
         """
@@ -269,13 +580,72 @@ class NASAWeatherProbability:
         except ValueError:
             return False
     
-    def calculate_date_probabilities(self, seasonal_data: Dict[str, List[float]], parameters: List[str]) -> Dict[str, Any]:
+    def probability_thresholds(self) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Per-parameter thresholds used for exceedance counts
+        
+        Returns:
+            Tuple of (above_thresholds, below_thresholds) keyed by parameter code
+        """
+        above, below = {}, {}
+        for _name, rule_params, direction, threshold_key in self.PROBABILITY_RULES:
+            target = above if direction == 'above' else below
+            for param in rule_params:
+                target[param] = self.THRESHOLDS[threshold_key]
+        return above, below
+    
+    def calculate_date_probabilities(self, seasonal_data: Dict[str, List[float]], parameters: List[str],
+                                     seasonal_years: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
         """
         Calculate weather probabilities for a specific date based on seasonal data
         
         Args:
             seasonal_data: Data for dates around target date
             parameters: List of requested parameters
+            seasonal_years: Season year of each value (if None, values are split into equal yearly blocks)
+            
+        Returns:
+            Dictionary with calculated probabilities and predicted values
+        """
+        # All statistics and threshold counts for every parameter in one batched pass
+        above, below = self.probability_thresholds()
+        with self.metrics.time('statistics'):
+            present, samples = sample_matrix(seasonal_data, parameters)
+            stats = SeasonalStatistics.from_sample_matrix(present, samples, above, below)
+        
+        # <PARAM>_trend for every parameter with data, fitted together from the same sample matrix
+        with self.metrics.time('trend'):
+            trends = trends_from_samples(seasonal_data, parameters, self.start_year, self.end_year, seasonal_years,
+                                         matrix=samples)
+        
+        return self.build_results(stats, parameters, self.trend_values(trends))
+    
+    def calculate_predicted_T2M(self, seasonal_data: Dict[str, List[float]],
+                                seasonal_years: Optional[Dict[str, np.ndarray]] = None) -> Optional[float]:
+        """
+        Calculate predicted T2M value from seasonal data (the T2M_trend of the trend engine)
+
+        Args:
+            seasonal_data: Data for dates around target date
+            seasonal_years: Season year of each value (if None, values are split into equal yearly blocks)
+
+        Returns:
+            Predicted T2M, or None if there is no T2M data
+        """
+        return trends_from_samples(seasonal_data, ['T2M'], self.start_year, self.end_year, seasonal_years).get('T2M')
+
+    def trend_values(self, trends: Dict[str, float]) -> Dict[str, float]:
+        """Name trend predictions as derived values (<PARAM>_trend)"""
+        return {f"{param}_trend": value for param, value in trends.items()}
+    
+    def build_results(self, stats: SeasonalStatistics, parameters: List[str], derived_values: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Assemble the prediction JSON from seasonal statistics
+        
+        Args:
+            stats: Statistics for the parameters with seasonal data
+            parameters: List of requested parameters
+            derived_values: Derived predictions such as T2M_trend
             
         Returns:
             Dictionary with calculated probabilities and predicted values
@@ -289,6 +659,8 @@ class NASAWeatherProbability:
             },
             'metadata': {
                 'location': {'longitude': self.longitude, 'latitude': self.latitude},
+                'grid_cell': {'longitude': self.cell_longitude, 'latitude': self.cell_latitude,
+                              'resolution': self.grid.describe()},
                 'data_points_used': {},
                 'parameters_requested': parameters,
                 # add container for any derived values produced during calculation
@@ -300,66 +672,36 @@ class NASAWeatherProbability:
         predicted_values = {}
         confidence = {}
         pred_uncertainty = {}
-        for param in parameters:
-            if param not in seasonal_data or not seasonal_data[param]:
-                continue
+        margins = stats.margin_of_error()
+        for i, param in enumerate(stats.parameters):
+            count = int(stats.count[i])
+            results['metadata']['data_points_used'][param] = count
             
-            values = seasonal_data[param]
-            results['metadata']['data_points_used'][param] = len(values)
-            
-            if len(values) < 5:  # Need minimum data points for reliable statistics
+            if count < 5:  # Need minimum data points for reliable statistics
                 confidence[param] = "low"
-            elif len(values) < 15:
+            elif count < 15:
                 confidence[param] = "medium"
             else:
                 confidence[param] = "high"
             
-            # Calculate statistics
-            mean_val = sum(values) / len(values)
-            std_val = (sum((x - mean_val) ** 2 for x in values) / len(values)) ** 0.5
-            
-
-            predicted_values[param] = round(mean_val, 2)
+            predicted_values[param] = round(float(stats.mean[i]), 2)
             
-            # Calculate uncertainty for predicted values
-            margin_error, ci_width = self.calculate_confidence_interval(values)
+            # Uncertainty for predicted values
+            margin_error = float(margins[i])
             pred_uncertainty[param] = {
                 'margin_of_error': round(margin_error, 2),
-                'confidence_interval_width': round(ci_width, 2),
+                'confidence_interval_width': round(margin_error * 2, 2),
                 'confidence_level': '95%'
             }
             
-            # Calculate probabilities based on parameter type
-            if param == 'T2M' or param == 'T2M_MAX':
-                # Temperature probabilities
-                hot_count = sum(1 for v in values if v > self.THRESHOLDS['very_hot_temp'])
-                cold_count = sum(1 for v in values if v < self.THRESHOLDS['very_cold_temp'])
-                
-                probabilities['very_hot'] = round((hot_count / len(values)) * 100, 1)
-                probabilities['very_cold'] = round((cold_count / len(values)) * 100, 1)
-                
-            elif param == 'WS2M':
-                # Wind speed probability
-                windy_count = sum(1 for v in values if v > self.THRESHOLDS['very_windy_speed'])
-                probabilities['very_windy'] = round((windy_count / len(values)) * 100, 1)
-                
-            elif param == 'PRECTOTCORR':
-                # Precipitation probability
-                wet_count = sum(1 for v in values if v > self.THRESHOLDS['very_wet_precip'])
-                probabilities['very_wet'] = round((wet_count / len(values)) * 100, 1)
-                
-            elif param == 'RH2M':
-                # Humidity probability
-                uncomfortable_count = sum(1 for v in values if v > self.THRESHOLDS['very_uncomfortable_humidity'])
-                probabilities['very_uncomfortable'] = round((uncomfortable_count / len(values)) * 100, 1)
-        
-        # Compute derived values (e.g., trend) only when appropriate data exists.
-        derived_params = []
-        if 'T2M' in seasonal_data and seasonal_data['T2M']:
-            t2m_trend = self.calculate_predicted_T2M(seasonal_data)
-            if t2m_trend is not None:
-                results['predicted_values']['T2M_trend'] = t2m_trend
-                derived_params.append('T2M_trend')
+            # Probabilities based on parameter type; later parameters overwrite earlier ones (T2M_MAX over T2M)
+            for name, rule_params, direction, _threshold_key in self.PROBABILITY_RULES:
+                if param in rule_params:
+                    exceed_count = stats.above_counts[i] if direction == 'above' else stats.below_counts[i]
+                    probabilities[name] = round((int(exceed_count) / count) * 100, 1)
+        
+        derived_params = list(derived_values.keys())
+        results['predicted_values'].update(derived_values)
         
         # finalize results
         results['probabilities'] = probabilities
@@ -454,88 +796,67 @@ class NASAWeatherProbability:
         
         return results
     
-    def calculate_predicted_T2M(self, seasonal_data: Dict[str, List[float]]) -> Optional[float]:
-        """Calculate predicted T2M value from seasonal data using a weighted recent mean + annual rate.
-        Select only the central day from each year's tolerance window (the 8th value of ~15) by sampling
-        one value per year before computing trend and weighted mean.
+    def build_climatology_index(self, parameters: Optional[List[str]] = None) -> Optional[ClimatologyIndex]:
         """
-        if 'T2M' not in seasonal_data or not seasonal_data['T2M']:
-            return None
-
-        all_values = seasonal_data['T2M']  # list containing ~x values per year (ordered chronologically) because of tolerance window
-        total_vals = len(all_values)
-        # expected number of years in the series
-        expected_years = max(1, (self.end_year - self.start_year + 1))
-
-        # approximate block size (number of samples per year). fallback to 1 to avoid zero division.
-        block_size = max(1, total_vals // expected_years)
-
-        # central index in each block (0-based). Example: for block_size=15 this gives 7 (the 8th value).
-        center_idx = block_size // 2
-
-        # collect one sample per year: the central value of each block
-        year_samples: List[Tuple[int, float]] = []
-        for i in range(expected_years):
-            idx = i * block_size + center_idx
-            if idx < total_vals:
-                year = self.start_year + i
-                year_samples.append((year, float(all_values[idx])))
-
-        # If we couldn't form year_samples by blocks (e.g., uneven data), as a fallback try every 8th element
-        if not year_samples:
-            # Use center_idx and block_size to sample one central value per approximate-year block.
-            # This avoids the hardcoded step of 8 and adapts to different tolerance window sizes.
-            sampled = []
-            if center_idx < total_vals:
-                # step by block_size to pick the central element of each block
-                sampled = all_values[center_idx::block_size]
-
-            # If still empty (e.g., center_idx out of range), evenly sample across available values.
-            if not sampled:
-                step = max(1, total_vals // expected_years) if expected_years > 0 else 1
-                sampled = all_values[::step]
-
-            year_samples = [
-                (self.start_year + i, float(v)) for i, v in enumerate(sampled)
-            ]
-
-        # compute slope (°C/year) and weighted recent mean using the selected per-year samples
-        years = [y for (y, _v) in year_samples]
-        vals = [v for (_y, v) in year_samples]
-
-        if not years or not vals:
-            return None
-
-        n = len(years)
-        if n < 2:
-            slope = 0.0
+        Build a day-of-year climatology index for this location and attach it to the estimator
+        
+        Args:
+            parameters: List of parameter codes to index (if None, uses all available parameters)
+            
+        Returns:
+            The new index, or None if the data could not be retrieved
+        """
+        parameters = parameters or self.default_parameters
+        
+        if self.store is not None:
+            series = self.load_series(parameters)
         else:
-            avg_year = sum(years) / n
-            avg_val = sum(vals) / n
-            num = sum((years[i] - avg_year) * (vals[i] - avg_val) for i in range(n))
-            den = sum((years[i] - avg_year) ** 2 for i in range(n))
-            slope = (num / den) if den != 0 else 0.0
-
-        # weighted recent mean: give more weight to recent years (decay controls emphasis)
-        decay = 0.25
-        max_year = max(years)
-        weights = [math.exp(decay * (y - max_year)) for y in years]
-        weighted_mean = sum(w * v for w, v in zip(weights, vals)) / sum(weights)
-
-        predicted = round(weighted_mean + slope, 2)
-        return predicted
-
-    def predict_weather_for_date(self, target_date: str, parameters: Optional[List[str]] = None, tolerance_days: int = 7) -> Dict[str, Any]:
+            series = DailySeries.from_power_json(self.make_api_request(parameters), parameters)
+        
+        if series is None:
+            print("Error: Failed to retrieve data from NASA API")
+            return None
+        
+        above, below = self.probability_thresholds()
+        self.climatology_index = ClimatologyIndex.from_series(
+            series, self.cell_latitude, self.cell_longitude, self.start_year, self.end_year, parameters, above, below
+        )
+        return self.climatology_index
+    
+    def calculate_date_probabilities_from_index(self, index: ClimatologyIndex, parameters: List[str], target_month: int, target_day: int, tolerance_days: int) -> Dict[str, Any]:
         """
-        Main method to predict weather for a specific date
+        Calculate weather probabilities for a specific date from a climatology index
         
         Args:
-            target_date: Target date in format "YYYY/MM/DD", "MM/DD", or "YYYYMMDD"
-            parameters: List of parameter codes to request (if None, uses all available parameters)
-            tolerance_days: Number of days before/after target date to include in analysis
+            index: Climatology index covering the parameters
+            parameters: List of requested parameters
+            target_month: Target month
+            target_day: Target day
+            tolerance_days: Number of days before/after target date to include
             
         Returns:
-            Complete weather prediction for the target date
+            Dictionary with calculated probabilities and predicted values (empty if the window has no data)
+        """
+        # Window extraction and statistics are one set of prefix-sum lookups here
+        with self.metrics.time('statistics'):
+            stats = index.statistics(parameters, target_month, target_day, tolerance_days)
+        if not stats.parameters:
+            return {}
+        
+        with self.metrics.time('trend'):
+            trends = fit_trends(*index.yearly_means(stats.parameters, target_month, target_day, tolerance_days))
+        
+        return self.build_results(stats, parameters, self.trend_values(trends))
+    
+    def validate_parameters(self, parameters: Optional[List[str]]) -> List[str]:
+        """
+        Resolve the parameter list, dropping codes the API does not provide
+        
+        Args:
+            parameters: List of parameter codes (if None, uses all available parameters)
+            
+        Returns:
+            List of valid parameter codes (empty if none are valid)
         """
         # Use all parameters by default if none specified
         if parameters is None:
@@ -550,41 +871,271 @@ class NASAWeatherProbability:
         
         if not parameters:
             print("Error: No valid parameters specified")
-            return {}
         
-        # Parse target date
-        try:
-            target_month, target_day = self.parse_date_string(target_date)
-        except ValueError as e:
-            print(f"Error: {e}")
-            return {}
+        return parameters
+    
+    def index_covers(self, parameters: List[str]) -> bool:
+        """True when the attached climatology index can answer queries for these parameters"""
+        if self.climatology_index is None and self.tiles is not None:
+            # A precomputed tile for this cell answers without any upstream call
+            self.climatology_index = self.tiles.index_for(self.cell_latitude, self.cell_longitude, self.start_year, self.end_year)
+        above, below = self.probability_thresholds()
+        return self.climatology_index is not None and self.climatology_index.covers(
+            self.cell_latitude, self.cell_longitude, self.start_year, self.end_year, parameters, above, below)
+    
+    def add_target_metadata(self, results: Dict[str, Any], target_date: str, target_month: int, target_day: int, tolerance_days: int) -> Dict[str, Any]:
+        """Add target date details and per-parameter data coverage to the results metadata"""
+        results['metadata']['target_date'] = target_date
+        results['metadata']['target_month'] = target_month
+        results['metadata']['target_day'] = target_day
+        results['metadata']['tolerance_days'] = tolerance_days
+        results['metadata']['data_quality'] = self.window_coverage(results['metadata']['parameters_requested'], results['metadata']['data_points_used'],
+                                                                   target_month, target_day, tolerance_days)
+        return results
+    
+    def window_coverage(self, parameters: List[str], data_points_used: Dict[str, int], target_month: int, target_day: int, tolerance_days: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Share of the seasonal window's days that had a usable value, per parameter
         
-        # Make API request
-        print(f"Requesting data for parameters: {parameters}")
-        data = self.make_api_request(parameters)
+        Args:
+            parameters: Requested parameter codes
+            data_points_used: Parameter code -> valid samples in the window
+            target_month: Parsed target month
+            target_day: Parsed target day
+            tolerance_days: Number of days before/after target date included
+            
+        Returns:
+            Parameter code -> valid and expected sample counts and coverage percentage
+            (parameters without any usable value, e.g. only fill values, report 0% coverage)
+        """
+        expected = expected_window_days(self.start_year, self.end_year, target_month, target_day, tolerance_days)
+        coverage = {}
+        for param in parameters:
+            valid = int(data_points_used.get(param, 0))
+            coverage[param] = {
+                'valid': valid,
+                'expected': expected,
+                'coverage': round(valid / expected * 100, 1) if expected else 0.0,
+            }
+        return coverage
+    
+    def prediction_method(self, parameters: List[str]) -> str:
+        """
+        How compute_prediction will answer: 'index' from the climatology index, otherwise 'samples'
         
-        if not data:
-            print("Error: Failed to retrieve data from NASA API")
-            return {}
+        Index and sample predictions sum in a different order and can round differently, so each is memoized under
+        its own key and an answer never depends on which endpoint memoized it first.
+        """
+        return 'index' if self.index_covers(parameters) else 'samples'
+    
+    def memo_key(self, parameters: List[str], target_month: int, target_day: int, tolerance_days: int,
+                 method: str) -> Optional[str]:
+        """Memo key of a prediction at this grid cell computed by method, 'samples' or 'index' (None when no memo is attached)"""
+        if self.memo is None:
+            return None
+        return self.memo.make_key(self.cell_latitude, self.cell_longitude, self.start_year, self.end_year, parameters,
+                                  target_month, target_day, tolerance_days, self.community, self.grid.describe(), method)
+    
+    def recall_prediction(self, key: Optional[str], target_date: str, target_month: int, target_day: int, tolerance_days: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up a memoized prediction and fill in this caller's location and target date
         
-        # Extract seasonal data around target date
-        seasonal_data = self.get_seasonal_data(data, parameters, target_month, target_day, tolerance_days)
+        Args:
+            key: Memo key from memo_key (None skips the lookup)
+            target_date: Target date as given by the caller
+            target_month: Parsed target month
+            target_day: Parsed target day
+            tolerance_days: Number of days before/after target date included
+            
+        Returns:
+            The prediction, or None when it is not memoized
+        """
+        if key is None:
+            return None
+        with self.metrics.time('cache_lookup'):
+            results = self.memo.get(key)
+        if results is None:
+            return None
+        # Memoized per grid cell: the requested coordinates and date spelling belong to this caller
+        results['metadata']['location'] = {'longitude': self.longitude, 'latitude': self.latitude}
+        return self.add_target_metadata(results, target_date, target_month, target_day, tolerance_days)
+    
+    def remember_prediction(self, key: Optional[str], results: Dict[str, Any]) -> Dict[str, Any]:
+        """Memoize a finished prediction (no-op without a memo or for empty results) and return it"""
+        if key is not None and results:
+            self.memo.put(key, results)
+        return results
+    
+    def predict_weather_for_date(self, target_date: str, parameters: Optional[List[str]] = None, tolerance_days: int = 7,
+                                 profile: bool = False) -> Dict[str, Any]:
+        """
+        Main method to predict weather for a specific date
+        
+        Args:
+            target_date: Target date in format "YYYY/MM/DD", "MM/DD", or "YYYYMMDD"
+            parameters: List of parameter codes to request (if None, uses all available parameters)
+            tolerance_days: Number of days before/after target date to include in analysis
+            profile: Capture a CPU and allocation profile of this prediction (needs a profiler; it may also sample
+                predictions on its own)
+            
+        Returns:
+            Complete weather prediction for the target date
+        """
+        self.last_profile = None
+        if self.profiler is not None and self.profiler.should_profile(profile):
+            with self.profiler.capture(f"{self.cell_latitude}_{self.cell_longitude}_{target_date}") as name:
+                self.last_profile = name
+                return self.predict_date(target_date, parameters, tolerance_days)
+        return self.predict_date(target_date, parameters, tolerance_days)
+    
+    def predict_date(self, target_date: str, parameters: Optional[List[str]], tolerance_days: int) -> Dict[str, Any]:
+        """Prediction for one date from the memo or freshly computed (predict_weather_for_date without profiling)"""
+        with self.metrics.time('parse'):
+            parameters = self.validate_parameters(parameters)
+            if not parameters:
+                return {}
+            
+            # Parse target date
+            try:
+                target_month, target_day = self.parse_date_string(target_date)
+            except ValueError as e:
+                print(f"Error: {e}")
+                return {}
+        
+        # Repeated requests are answered from the memo without touching the data
+        key = self.memo_key(parameters, target_month, target_day, tolerance_days, self.prediction_method(parameters))
+        results = self.recall_prediction(key, target_date, target_month, target_day, tolerance_days)
+        if results is not None:
+            return results
+        
+        results = self.compute_prediction(parameters, target_date, target_month, target_day, tolerance_days)
+        
+        return self.remember_prediction(key, results)
+    
+    def compute_prediction(self, parameters: List[str], target_date: str, target_month: int, target_day: int, tolerance_days: int) -> Dict[str, Any]:
+        """
+        Compute a prediction from the climatology index, the series store or the API, in that order of preference
+        
+        Args:
+            parameters: Validated parameter codes
+            target_date: Target date as given by the caller
+            target_month: Parsed target month
+            target_day: Parsed target day
+            tolerance_days: Number of days before/after target date to include in analysis
+            
+        Returns:
+            Complete weather prediction for the target date (empty on failure)
+        """
+        if self.index_covers(parameters):
+            # O(1) range queries over the precomputed day-of-year index
+            results = self.calculate_date_probabilities_from_index(self.climatology_index, parameters, target_month, target_day, tolerance_days)
+            
+            if not results:
+                print("Error: No seasonal data found for the specified date range")
+                return {}
+            
+            return self.add_target_metadata(results, target_date, target_month, target_day, tolerance_days)
         
+        if self.store is not None:
+            # Read memory-mapped series from the local store instead of parsing the API response
+            series = self.load_series(parameters)
+            
+            if series is None:
+                print("Error: Failed to retrieve data from NASA API")
+                return {}
+            
+            with self.metrics.time('seasonal_extraction'):
+                seasonal_data, seasonal_years = self.get_seasonal_window_from_series(series, parameters, target_month, target_day, tolerance_days)
+        else:
+            # Make API request
+            print(f"Requesting data for parameters: {parameters}")
+            data = self.make_api_request(parameters)
+            
+            if not data:
+                print("Error: Failed to retrieve data from NASA API")
+                return {}
+            
+            # Extract seasonal data around target date
+            with self.metrics.time('seasonal_extraction'):
+                seasonal_data, seasonal_years = self.get_seasonal_window(data, parameters, target_month, target_day, tolerance_days)
+        
+        return self.predict_from_seasonal_data(seasonal_data, parameters, target_date, target_month, target_day, tolerance_days, seasonal_years)
+    
+    def predict_from_seasonal_data(self, seasonal_data: Dict[str, List[float]], parameters: List[str], target_date: str, target_month: int, target_day: int, tolerance_days: int,
+                                   seasonal_years: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Turn extracted seasonal data into the final prediction
+        
+        Args:
+            seasonal_data: Data for dates around target date
+            parameters: List of requested parameters
+            target_date: Target date as given by the caller
+            target_month: Parsed target month
+            target_day: Parsed target day
+            tolerance_days: Number of days before/after target date included
+            seasonal_years: Season year of each value, for the trend fit
+            
+        Returns:
+            Complete weather prediction for the target date (empty if there is no seasonal data)
+        """
         if not seasonal_data:
             print("Error: No seasonal data found for the specified date range")
             return {}
         
         # Calculate probabilities
-        results = self.calculate_date_probabilities(seasonal_data, parameters)
+        results = self.calculate_date_probabilities(seasonal_data, parameters, seasonal_years)
         
-        # Add target date to metadata
-        results['metadata']['target_date'] = target_date
-        results['metadata']['target_month'] = target_month
-        results['metadata']['target_day'] = target_day
-        results['metadata']['tolerance_days'] = tolerance_days
+        return self.add_target_metadata(results, target_date, target_month, target_day, tolerance_days)
+    
+    def predict_weather_for_dates(self, target_dates: List[str], parameters: Optional[List[str]] = None, tolerance_days: int = 7) -> Dict[str, Dict[str, Any]]:
+        """
+        Predict weather for many dates at this location with a single data fetch
         
-        return results
-
+        Args:
+            target_dates: Target dates in format "YYYY/MM/DD", "MM/DD", or "YYYYMMDD"
+            parameters: List of parameter codes to request (if None, uses all available parameters)
+            tolerance_days: Number of days before/after each target date to include in analysis
+            
+        Returns:
+            Dictionary mapping each target date to its prediction (empty for dates that could not be predicted)
+        """
+        parameters = self.validate_parameters(parameters)
+        if not parameters:
+            return {target_date: {} for target_date in target_dates}
+        
+        all_results = {}
+        pending = []
+        for target_date in target_dates:
+            try:
+                target_month, target_day = self.parse_date_string(target_date)
+            except ValueError as e:
+                print(f"Error: {e}")
+                all_results[target_date] = {}
+                continue
+            
+            key = self.memo_key(parameters, target_month, target_day, tolerance_days, 'index')
+            results = self.recall_prediction(key, target_date, target_month, target_day, tolerance_days)
+            if results is not None:
+                all_results[target_date] = results
+            else:
+                pending.append((target_date, target_month, target_day, key))
+        
+        # One fetch and one index build; every date is then a constant-time window query
+        if pending and not self.index_covers(parameters) and self.build_climatology_index(parameters) is None:
+            pending = []
+        
+        for target_date, target_month, target_day, key in pending:
+            results = self.calculate_date_probabilities_from_index(self.climatology_index, parameters, target_month, target_day, tolerance_days)
+            if not results:
+                print(f"Error: No seasonal data found for {target_date}")
+                all_results[target_date] = {}
+                continue
+            
+            results = self.add_target_metadata(results, target_date, target_month, target_day, tolerance_days)
+            all_results[target_date] = self.remember_prediction(key, results)
+        
+        # Keep the caller's date order (dates that could not be predicted get empty results)
+        return {target_date: all_results.get(target_date, {}) for target_date in target_dates}
 
 def main():
     """Main function to run the script"""
@@ -607,6 +1158,9 @@ def main():
                        help=f'End year for data collection (default: {default_end_year} - current year - 1)')
     parser.add_argument('--tolerance-days', type=int, default=7, help='Days before/after target date to include (default: 7)')
     parser.add_argument('--output', type=str, help='Output file path (optional)')
+    parser.add_argument('--cache-dir', type=str, default=None, help='Directory for caching API responses between runs (optional)')
+    parser.add_argument('--store-dir', type=str, default=None, help='Directory for the memory-mapped climate series store (optional)')
+    parser.add_argument('--exact-coordinates', action='store_true', help='Request the exact coordinates instead of the Power grid cell centre')
     
     args = parser.parse_args()
     
@@ -615,7 +1169,10 @@ def main():
         longitude=args.longitude,
         latitude=args.latitude,
         start_year=args.start_year,
-        end_year=args.end_year
+        end_year=args.end_year,
+        cache=PowerResponseCache(args.cache_dir) if args.cache_dir else None,
+        store=ClimateStore(args.store_dir) if args.store_dir else None,
+        grid=EXACT_COORDINATES if args.exact_coordinates else None
     )
     
     # Print the year range being used
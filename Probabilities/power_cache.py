@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for NASA Power API responses
+Stores decoded responses as gzip-compressed JSON files with a SQLite index for TTL and LRU eviction.
+Responses are kept one parameter per entry so any later parameter set can reuse them.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Any, Optional
+
+
+def split_power_response(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Split a multi-parameter Power API response into one response per parameter
+
+    Args:
+        data: Decoded API response
+
+    Returns:
+        Parameter code -> response holding only that parameter
+    """
+    properties = data.get('properties', {})
+    descriptions = data.get('parameters', {})
+    parts = {}
+    for param, values in properties.get('parameter', {}).items():
+        part = dict(data)
+        part['properties'] = dict(properties, parameter={param: values})
+        if param in descriptions:
+            part['parameters'] = {param: descriptions[param]}
+        parts[param] = part
+    return parts
+
+
+def merge_power_responses(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine responses for the same location and date range into one multi-parameter response
+
+    Args:
+        parts: Decoded API responses (header, geometry and messages are taken from the first)
+
+    Returns:
+        Response with the parameters of every part
+    """
+    merged = dict(parts[0])
+    merged['properties'] = dict(parts[0].get('properties', {}))
+    parameter_data: Dict[str, Any] = {}
+    descriptions: Dict[str, Any] = {}
+    for part in parts:
+        parameter_data.update(part.get('properties', {}).get('parameter', {}))
+        descriptions.update(part.get('parameters', {}))
+    merged['properties']['parameter'] = parameter_data
+    if descriptions:
+        merged['parameters'] = descriptions
+    return merged
+
+
+class PowerResponseCache:
+    """Disk-backed cache of NASA Power API responses shared by every estimator in a process (and across processes)"""
+
+    INDEX_FILENAME = 'index.sqlite'
+
+    def __init__(self, cache_dir: str, ttl_seconds: Optional[float] = 30 * 24 * 3600,
+                 max_bytes: int = 512 * 1024 * 1024, coordinate_precision: int = 4):
+        """
+        Initialize the response cache
+
+        Args:
+            cache_dir: Directory holding the cached responses and the index database
+            ttl_seconds: Seconds before an entry expires (None keeps entries until evicted)
+            max_bytes: Total size of cached payloads before least recently used entries are evicted
+            coordinate_precision: Decimal places latitude/longitude are rounded to when building keys
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.coordinate_precision = coordinate_precision
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, self.INDEX_FILENAME)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the cache usable from threads and forked workers
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _payload_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def make_key(self, latitude: float, longitude: float, parameters: List[str],
+                 start_year: int, end_year: int, community: str = 'RE') -> str:
+        """
+        Build the cache key for a Power API request
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameters: List of parameter codes requested
+            start_year: First year of the requested range
+            end_year: Last year of the requested range
+            community: Power API user community
+
+        Returns:
+            Hex digest identifying the request
+        """
+        key_fields = {
+            'latitude': round(float(latitude), self.coordinate_precision),
+            'longitude': round(float(longitude), self.coordinate_precision),
+            'parameters': sorted(set(parameters)),
+            'start_year': int(start_year),
+            'end_year': int(end_year),
+            'community': community,
+        }
+        canonical = json.dumps(key_fields, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Decoded API response, or None when missing or expired
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[0] > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._remove_payload(key)
+                row = None
+
+            data = None
+            if row is not None:
+                try:
+                    with gzip.open(self._payload_path(key), 'rt', encoding='utf-8') as f:
+                        data = json.load(f)
+                    conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                except (OSError, ValueError):
+                    # Payload vanished or is corrupt: drop the index row and treat as a miss
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    data = None
+
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def get_parameters(self, latitude: float, longitude: float, parameters: List[str],
+                       start_year: int, end_year: int, community: str = 'RE') -> Dict[str, Dict[str, Any]]:
+        """
+        Look up cached single-parameter responses
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            parameters: Parameter codes wanted
+            start_year: First year of the range
+            end_year: Last year of the range
+            community: Power API user community
+
+        Returns:
+            Parameter code -> cached response, for the parameters that are cached
+        """
+        found = {}
+        for param in parameters:
+            data = self.get(self.make_key(latitude, longitude, [param], start_year, end_year, community))
+            if data is not None:
+                found[param] = data
+        return found
+
+    def put_parameters(self, latitude: float, longitude: float, data: Dict[str, Any],
+                       start_year: int, end_year: int, community: str = 'RE') -> None:
+        """
+        Cache a response as one entry per parameter
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            data: Decoded API response
+            start_year: First year of the range
+            end_year: Last year of the range
+            community: Power API user community
+        """
+        for param, part in split_power_response(data).items():
+            self.put(self.make_key(latitude, longitude, [param], start_year, end_year, community), part)
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        """
+        Store a response and evict least recently used entries if the cache is over its size limit
+
+        Args:
+            key: Cache key from make_key
+            data: Decoded API response
+        """
+        path = self._payload_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        size = os.path.getsize(path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, size, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, size, now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._remove_payload(key)
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self.evictions += evicted
+
+    def _remove_payload(self, key: str) -> None:
+        try:
+            os.remove(self._payload_path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._connect() as conn:
+            for (key,) in conn.execute("SELECT key FROM entries").fetchall():
+                self._remove_payload(key)
+            conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache counters and current size
+
+        Returns:
+            Dictionary with hits, misses, evictions, hit ratio, entry count and total bytes
+        """
+        with self._connect() as conn:
+            entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': entries,
+                'total_bytes': total_bytes,
+            }
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Grid resolution model for NASA Power point requests
+Power serves meteorology from the MERRA-2 grid (0.5° latitude x 0.625° longitude), so every coordinate
+inside one cell gets the same daily series. Snapping coordinates to the cell centre lets nearby locations
+share downloads, cache entries, stored series and climatology indexes.
+"""
+
+import math
+from typing import Optional, Tuple
+
+
+class PowerGrid:
+    """Maps coordinates to the centre of the Power grid cell containing them"""
+
+    def __init__(self, latitude_step: Optional[float] = 0.5, longitude_step: Optional[float] = 0.625,
+                 precision: int = 4):
+        """
+        Initialize the grid
+
+        Args:
+            latitude_step: Cell height in degrees (None leaves latitude unsnapped)
+            longitude_step: Cell width in degrees (None leaves longitude unsnapped)
+            precision: Decimal places kept in snapped coordinates
+        """
+        self.latitude_step = latitude_step
+        self.longitude_step = longitude_step
+        self.precision = precision
+
+    @staticmethod
+    def _nearest_centre(value: float, step: float) -> float:
+        # Half-up rounding so a coordinate on a cell edge always lands in the same cell
+        return math.floor(value / step + 0.5) * step
+
+    def snap(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        """
+        Canonical cell centre for a coordinate
+
+        Args:
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+
+        Returns:
+            Tuple of (latitude, longitude) of the cell centre
+        """
+        if self.latitude_step:
+            latitude = min(90.0, max(-90.0, self._nearest_centre(latitude, self.latitude_step)))
+        if self.longitude_step:
+            longitude = self._nearest_centre(longitude, self.longitude_step)
+            # Wrap the antimeridian so -180 and 180 are the same cell
+            longitude = (longitude + 180.0) % 360.0 - 180.0
+        return round(latitude, self.precision) + 0.0, round(longitude, self.precision) + 0.0
+
+    def describe(self) -> str:
+        """Short description used in result metadata"""
+        if not self.latitude_step and not self.longitude_step:
+            return "exact coordinates"
+        return f"{self.latitude_step}° x {self.longitude_step}°"
+
+
+# Resolution of the Power meteorology parameters
+MERRA2_GRID = PowerGrid(0.5, 0.625)
+
+# No snapping: requests use the coordinates as given
+EXACT_COORDINATES = PowerGrid(None, None)
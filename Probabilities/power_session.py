@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP session for NASA Power API calls
+Keeps connections alive in a pool sized for the worker count, retries 429/5xx and connection errors
+with jittered exponential backoff, and records timing for every attempt
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_BASE_URL = "https://power.larc.nasa.gov/api/temporal/daily/point"
+
+
+def power_base_url() -> str:
+    """Daily point endpoint, overridable with POWER_BASE_URL (e.g. to point at a local stub server)"""
+    return os.environ.get('POWER_BASE_URL', DEFAULT_BASE_URL)
+
+
+class PowerSession:
+    """Thread-safe pooled session with bounded retries for Power API requests"""
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, pool_size: Optional[int] = None, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 10.0, history_size: int = 1000):
+        """
+        Initialize the session
+
+        Args:
+            pool_size: Connections kept per host (if None, uses POWER_POOL_SIZE or 16)
+            max_retries: Retries after the first attempt for retryable failures
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Upper bound for a single backoff delay in seconds
+            history_size: Number of recent attempts kept for inspection
+        """
+        self.pool_size = pool_size or int(os.environ.get('POWER_POOL_SIZE', 16))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # urllib3 connection pools are thread-safe; Power sets no cookies, so the shared jar stays empty
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self.attempts: deque = deque(maxlen=history_size)
+        self.counters = {'requests': 0, 'attempts': 0, 'retries': 0, 'failures': 0, 'attempt_seconds': 0.0}
+
+    def backoff_delay(self, retry: int, response: Optional[requests.Response] = None) -> float:
+        """
+        Delay before a retry: full-jitter exponential backoff, or Retry-After when the server sends one
+
+        Args:
+            retry: Retry number starting at 1
+            response: Failed response, if any
+
+        Returns:
+            Seconds to sleep
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None:
+                try:
+                    return min(self.backoff_max, max(0.0, float(retry_after)))
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (retry - 1))))
+
+    def _record(self, url: str, attempt: int, started: float, status: Optional[int], error: Optional[str],
+                num_bytes: int) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.counters['attempts'] += 1
+            self.counters['attempt_seconds'] += elapsed
+            self.attempts.append({
+                'url': url, 'attempt': attempt, 'status': status, 'error': error,
+                'seconds': round(elapsed, 4), 'bytes': num_bytes, 'time': time.time(),
+            })
+
+    def get(self, url: str, timeout: float = 30, **kwargs) -> requests.Response:
+        """
+        GET with retries on 429/5xx and connection errors
+
+        Args:
+            url: Request URL
+            timeout: Per-attempt timeout in seconds
+            **kwargs: Passed to requests.Session.get
+
+        Returns:
+            The last response (the caller still checks raise_for_status)
+
+        Raises:
+            requests.exceptions.RequestException: When every attempt failed without a response
+        """
+        with self._lock:
+            self.counters['requests'] += 1
+
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(url, attempt, started, None, type(e).__name__, 0)
+                if attempt > self.max_retries:
+                    with self._lock:
+                        self.counters['failures'] += 1
+                    raise
+                response = None
+            else:
+                body_bytes = 0 if kwargs.get('stream') else len(response.content)
+                self._record(url, attempt, started, response.status_code, None, body_bytes)
+                if response.status_code not in self.RETRY_STATUSES:
+                    return response
+                if attempt > self.max_retries:
+                    with self._lock:
+                        self.counters['failures'] += 1
+                    return response
+
+            if response is not None:
+                # Release the connection of a streamed response that is being retried
+                response.close()
+            with self._lock:
+                self.counters['retries'] += 1
+            time.sleep(self.backoff_delay(attempt, response))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report request counters and recent attempts
+
+        Returns:
+            Dictionary with counters, mean attempt latency and the most recent attempts
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            recent: List[Dict[str, Any]] = list(self.attempts)[-20:]
+        counters['mean_attempt_seconds'] = (
+            round(counters['attempt_seconds'] / counters['attempts'], 4) if counters['attempts'] else 0.0
+        )
+        counters['attempt_seconds'] = round(counters['attempt_seconds'], 4)
+        counters['pool_size'] = self.pool_size
+        counters['recent_attempts'] = recent
+        return counters
+
+
+_shared_session: Optional[PowerSession] = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session() -> PowerSession:
+    """Process-wide PowerSession, created on first use"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = PowerSession()
+        return _shared_session
+
+
+def reset_shared_session() -> None:
+    """
+    Close the process-wide PowerSession so the next use opens new connections
+
+    A server that fetches data before forking its workers calls this first, so no worker inherits
+    (and shares with its siblings) a socket opened by the parent.
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is not None:
+            _shared_session.session.close()
+        _shared_session = None
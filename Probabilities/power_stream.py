@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Streaming decoder for NASA Power API responses
+Reads the properties.parameter section incrementally, one parameter at a time, straight into typed arrays and keeps
+only the requested parameters, so the full dictionary tree of the response is never held in memory
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import ijson
+except ImportError:
+    # Optional: without ijson callers fall back to decoding the whole response
+    ijson = None
+
+try:
+    from .climate_store import DailySeries
+    from .data_quality import mask_invalid
+except ImportError:
+    from climate_store import DailySeries
+    from data_quality import mask_invalid
+
+
+PARAMETER_PREFIX = 'properties.parameter'
+
+
+class ChunkReader:
+    """File-like wrapper over an iterator of byte chunks (e.g. requests' iter_content)"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        # The parser only needs some bytes per call; an empty result marks the end of the stream
+        # (ijson probes with read(0) to learn whether the stream yields bytes or text)
+        if size == 0:
+            return b''
+        for chunk in self._chunks:
+            if chunk:
+                self.bytes_read += len(chunk)
+                return chunk
+        return b''
+
+
+def streaming_available() -> bool:
+    """True when the streaming decoder can be used (ijson is installed)"""
+    return ijson is not None
+
+
+def _day_arrays(day_values: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Day numbers (days since 1970-01-01) and values for one parameter's {YYYYMMDD: value} map"""
+    # Non-date keys are skipped, as from_power_json does
+    keys = [key for key in day_values if len(key) == 8 and key.isdigit()]
+    numeric = np.fromiter(map(int, keys), dtype=np.int64, count=len(keys))
+    values = np.fromiter(
+        (value if isinstance(value, (int, float)) else np.nan for value in map(day_values.__getitem__, keys)),
+        dtype=np.float64, count=len(keys)
+    )
+
+    years, months, days = numeric // 10000, (numeric // 100) % 100, numeric % 100
+    month_starts = ((years - 1970) * 12 + months - 1).astype('datetime64[M]')
+    dates = month_starts.astype('datetime64[D]') + (days - 1)
+    valid = (months >= 1) & (months <= 12) & (days >= 1)
+    valid &= dates < (month_starts + 1).astype('datetime64[D]')
+    return dates[valid].astype(np.int64), values[valid]
+
+
+def series_from_power_stream(stream, parameters: List[str]) -> Optional[DailySeries]:
+    """
+    Decode a Power API response into a DailySeries without materializing the JSON document
+
+    Args:
+        stream: File-like object returning the response body from read()
+        parameters: Parameter codes to keep
+
+    Returns:
+        DailySeries equivalent to DailySeries.from_power_json, or None when there is no usable parameter data
+
+    Raises:
+        ValueError: When the body is not valid JSON
+    """
+    wanted = set(parameters)
+    days = {}
+    values = {}
+
+    # One parameter's {date: value} map is decoded at a time and converted before the next is read
+    try:
+        for param, day_values in ijson.kvitems(stream, PARAMETER_PREFIX, use_float=True):
+            if param in wanted and isinstance(day_values, dict) and day_values:
+                days[param], values[param] = _day_arrays(day_values)
+            # Drop the map now rather than keeping it alive while the next one is decoded
+            del day_values
+    except ijson.JSONError as e:
+        raise ValueError(f"Invalid JSON in Power API response: {e}") from e
+
+    present = [p for p in parameters if p in days]
+    if not present:
+        return None
+
+    valid_days = [days[p] for p in present if len(days[p])]
+    if not valid_days:
+        return None
+    first = min(int(day.min()) for day in valid_days)
+    last = max(int(day.max()) for day in valid_days)
+
+    series = {}
+    for param in present:
+        filled = np.full(last - first + 1, np.nan, dtype=np.float64)
+        filled[days[param] - first] = values[param]
+        series[param] = mask_invalid(param, filled)
+
+    return DailySeries(np.datetime64(first, 'D').item(), series)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Opt-in CPU and allocation profiles of individual predictions
+A profiled prediction runs under cProfile and tracemalloc and leaves two files in the profile directory: a pstats
+dump (<name>.prof, readable with python -m pstats or snakeviz) and the lines that allocated the most memory
+(<name>.alloc.txt). Profiling is off unless a caller asks for it or a sample rate is set; when off, a prediction
+pays one comparison.
+"""
+
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class RequestProfiler:
+    """Captures cProfile and tracemalloc traces of sampled or requested predictions, one at a time per process"""
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, max_profiles: int = 200,
+                 top_allocations: int = 40, allocation_frames: int = 1):
+        """
+        Initialize the profiler
+
+        Args:
+            directory: Directory the profiles are written to
+            sample_rate: Fraction of predictions profiled without being asked (0 profiles only requested ones)
+            max_profiles: Profiles kept; the oldest are deleted beyond this
+            top_allocations: Allocation sites listed per profile
+            allocation_frames: Stack frames recorded per allocation (more frames cost more while tracing)
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.top_allocations = top_allocations
+        self.allocation_frames = allocation_frames
+
+        # cProfile and tracemalloc are process-wide hooks, so profiles never overlap
+        self._busy = threading.Lock()
+        self._random = random.Random()
+        self.captured = 0
+        self.skipped_busy = 0
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """Whether a prediction is profiled: when asked for, or by sampling"""
+        return requested or (self.sample_rate > 0 and self._random.random() < self.sample_rate)
+
+    @contextmanager
+    def capture(self, label: str) -> Iterator[Optional[str]]:
+        """
+        Profile the enclosed block
+
+        Args:
+            label: Describes the profiled work (e.g. grid cell and date); becomes part of the file names
+
+        Yields:
+            Profile name (file names without extension), or None when another profile is already running
+        """
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            yield None
+            return
+
+        try:
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}_{re.sub(r'[^A-Za-z0-9_-]+', '-', label)}_{uuid.uuid4().hex[:6]}"
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(self.allocation_frames)
+            # With tracing already on (e.g. under a benchmark) only this block's allocations are reported
+            before = None if started_tracing else tracemalloc.take_snapshot()
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                yield name
+            finally:
+                profile.disable()
+                seconds = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                self.write(name, label, profile, snapshot, before, seconds, peak)
+                self.captured += 1
+        finally:
+            self._busy.release()
+
+    def write(self, name: str, label: str, profile: cProfile.Profile, snapshot: tracemalloc.Snapshot,
+              before: Optional[tracemalloc.Snapshot], seconds: float, peak: int) -> None:
+        """Write the pstats dump and allocation report of one profile, then drop the oldest beyond max_profiles"""
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(os.path.join(self.directory, f"{name}.prof"))
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot = snapshot.filter_traces(filters)
+        if before is not None:
+            top = snapshot.compare_to(before.filter_traces(filters), 'lineno')
+            lines = [str(stat) for stat in top if stat.size_diff > 0][:self.top_allocations]
+        else:
+            lines = [str(stat) for stat in snapshot.statistics('lineno')[:self.top_allocations]]
+
+        # tracemalloc sees every thread, so allocations by concurrent requests can appear here too
+        header = [
+            f"label: {label}",
+            f"wall_seconds: {seconds:.6f}",
+            f"peak_traced_bytes: {peak}",
+            f"top {len(lines)} allocation sites:",
+        ]
+        with open(os.path.join(self.directory, f"{name}.alloc.txt"), 'w') as f:
+            f.write('\n'.join(header + lines) + '\n')
+        self.prune()
+
+    def profiles(self) -> List[str]:
+        """Names of the stored profiles, oldest first"""
+        try:
+            names = [entry[:-len('.prof')] for entry in os.listdir(self.directory) if entry.endswith('.prof')]
+        except FileNotFoundError:
+            return []
+        return sorted(names)
+
+    def prune(self) -> None:
+        names = self.profiles()
+        for name in names[:max(0, len(names) - self.max_profiles)]:
+            for extension in ('.prof', '.alloc.txt'):
+                try:
+                    os.remove(os.path.join(self.directory, name + extension))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Sample rate, profiles captured by this process, profiles skipped because another was running"""
+        return {'sample_rate': self.sample_rate, 'captured': self.captured, 'skipped_busy': self.skipped_busy}
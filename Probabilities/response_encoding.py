@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Compact JSON responses for the API
+Encodes results with orjson when it is installed, optionally keeps only selected fields and rounds floats, compresses
+large bodies with brotli or gzip as the client accepts, and tags every body with a content-derived ETag so browsers
+and CDNs can revalidate with If-None-Match instead of downloading the same climatology again.
+Framework-free: main.py wraps the result in a Flask response and asgi.py sends it directly.
+Brotli support is optional and not in requirements.txt (pip install brotli); without it only gzip is offered.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    # Optional: without orjson responses are encoded with the standard library
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without brotli only gzip is offered
+    brotli = None
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON with sorted keys (as Flask's jsonify), with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[Tuple[str, ...]]]:
+    """
+    Parse a field selection such as "probabilities,predicted_values.T2M"
+
+    Args:
+        fields: Comma-separated top-level keys or dotted paths (None or empty selects everything)
+
+    Returns:
+        Paths as key tuples, or None to keep the whole result
+    """
+    if not fields:
+        return None
+    paths = [tuple(part for part in field.strip().split('.') if part) for field in fields.split(',')]
+    return [path for path in paths if path] or None
+
+
+def select_fields(result: Any, paths: Optional[List[Tuple[str, ...]]]) -> Any:
+    """
+    Keep only the selected paths of a prediction (missing paths are left out)
+
+    Args:
+        result: Prediction dictionary
+        paths: Paths from parse_fields (None keeps everything)
+
+    Returns:
+        Dictionary with the same nesting, holding only the selected values
+    """
+    if paths is None or not isinstance(result, dict):
+        return result
+    selected: Dict[str, Any] = {}
+    for path in paths:
+        source, target = result, selected
+        for key in path[:-1]:
+            source = source.get(key) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and path[-1] in source:
+                target[path[-1]] = source[path[-1]]
+    return selected
+
+
+def round_floats(payload: Any, digits: Optional[int]) -> Any:
+    """Round every float in a nested structure to digits decimals (None leaves them as they are)"""
+    if digits is None:
+        return payload
+    if isinstance(payload, float):
+        return round(payload, digits)
+    if isinstance(payload, dict):
+        return {key: round_floats(value, digits) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [round_floats(value, digits) for value in payload]
+    return payload
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q values"""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Best compression both sides support: br (when brotli is installed), then gzip
+
+    Args:
+        accept_encoding: Accept-Encoding request header
+
+    Returns:
+        'br', 'gzip' or None for an uncompressed body
+    """
+    accepted = accepted_encodings(accept_encoding)
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, coding: str, level: int = 6) -> bytes:
+    """Compress a body with 'br' or 'gzip'"""
+    if coding == 'br':
+        return brotli.compress(body, quality=min(level, 11))
+    # mtime=0 keeps the bytes (and so any cache keyed on them) identical for identical bodies
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def etag_for(body: bytes) -> str:
+    """Weak ETag of an uncompressed body (weak, so it also matches the compressed representations)"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag (compared weakly, as RFC 9110 requires for this header)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+class ResponseEncoder:
+    """Turns API results into status, headers and body: compact JSON, ETag, Cache-Control and compression"""
+
+    def __init__(self, max_age: int = 86400, min_compress_bytes: int = 1400, compress_level: int = 6):
+        """
+        Initialize the encoder
+
+        Args:
+            max_age: Seconds clients and shared caches may reuse a response without revalidating (0 disables caching)
+            min_compress_bytes: Bodies smaller than this are sent uncompressed
+            compress_level: gzip level (brotli quality) used for larger bodies
+        """
+        self.max_age = max_age
+        self.min_compress_bytes = min_compress_bytes
+        self.compress_level = compress_level
+
+    def encode(self, payload: Any, accept_encoding: Optional[str] = None, if_none_match: Optional[str] = None,
+               cacheable: bool = True, status: int = 200) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Encode a result as an HTTP response
+
+        Args:
+            payload: JSON-serializable result
+            accept_encoding: Accept-Encoding request header
+            if_none_match: If-None-Match request header
+            cacheable: False for results that must not be reused (e.g. empty results after an upstream failure)
+            status: Status code of a full response
+
+        Returns:
+            (status, headers, body); status is 304 with an empty body when the client already holds this content
+        """
+        body = dumps(payload)
+        headers = {'Content-Type': 'application/json', 'Vary': 'Accept-Encoding'}
+
+        if not cacheable or self.max_age <= 0:
+            headers['Cache-Control'] = 'no-store'
+        else:
+            etag = etag_for(body)
+            headers['ETag'] = etag
+            # Results for past years do not change; the ETag covers redeploys that change them
+            headers['Cache-Control'] = f'public, max-age={self.max_age}'
+            if etag_matches(if_none_match, etag):
+                return 304, headers, b''
+
+        if len(body) >= self.min_compress_bytes:
+            coding = choose_encoding(accept_encoding)
+            if coding is not None:
+                body = compress(body, coding, self.compress_level)
+                headers['Content-Encoding'] = coding
+        headers['Content-Length'] = str(len(body))
+        return status, headers, body
+
+
+def shape_result(result: Any, paths: Optional[List[Tuple[str, ...]]], digits: Optional[int]) -> Any:
+    """select_fields followed by round_floats, as requested with ?fields= and ?precision="""
+    return round_floats(select_fields(result, paths), digits)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Memoization of final weather predictions
+A prediction depends only on the grid cell, year range, parameters, target month/day and tolerance, so finished
+results are kept in a bounded in-process LRU, optionally backed by a SQLite table every worker process reads.
+Entries are stored as JSON text, so every lookup returns an independent copy the caller may modify.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Part of every key: bump when a code change alters the predictions so stale shared entries are ignored
+RESULT_VERSION = 3
+
+# Shared inserts between trims of the shared tier down to shared_max_entries
+SHARED_TRIM_INTERVAL = 256
+
+
+class ResultMemo:
+    """Bounded LRU of finished predictions with an optional shared SQLite tier"""
+
+    def __init__(self, max_entries: int = 4096, shared_path: Optional[str] = None,
+                 shared_max_entries: int = 200000, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the memo
+
+        Args:
+            max_entries: Predictions kept in this process before least recently used ones are evicted
+            shared_path: SQLite file shared by every process (None keeps the memo in-process only)
+            shared_max_entries: Predictions kept in the shared file before the oldest ones are removed
+            ttl_seconds: Seconds before a shared entry expires (None keeps entries until evicted;
+                historical climatology does not change)
+        """
+        self.max_entries = max_entries
+        self.shared_path = shared_path
+        self.shared_max_entries = shared_max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._shared_puts = 0
+
+        if self.shared_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.shared_path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the memo usable from threads and forked workers
+        conn = sqlite3.connect(self.shared_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(latitude: float, longitude: float, start_year: int, end_year: int, parameters: List[str],
+                 target_month: int, target_day: int, tolerance_days: int, community: str = 'RE',
+                 resolution: str = '', method: str = 'samples') -> str:
+        """
+        Build the memo key for a prediction
+
+        Args:
+            latitude: Grid cell latitude
+            longitude: Grid cell longitude
+            start_year: First year of the historical range
+            end_year: Last year of the historical range
+            parameters: Parameter codes in request order (order decides which parameter sets a shared probability)
+            target_month: Parsed target month
+            target_day: Parsed target day
+            tolerance_days: Days before/after the target date included
+            community: Power API user community
+            resolution: Grid description reported in the result metadata
+            method: How the prediction was computed, 'samples' (window samples) or 'index' (climatology index
+                prefix sums); the two sum in a different order and can round differently
+
+        Returns:
+            Hex digest identifying the prediction
+        """
+        # The parsed month/day is used, so "07/15", "2025/07/15" and "20250715" share one entry
+        key_fields = {
+            'version': RESULT_VERSION,
+            'latitude': round(float(latitude), 4),
+            'longitude': round(float(longitude), 4),
+            'start_year': int(start_year),
+            'end_year': int(end_year),
+            'parameters': list(parameters),
+            'month': int(target_month),
+            'day': int(target_day),
+            'tolerance_days': int(tolerance_days),
+            'community': community,
+            'resolution': resolution,
+            'method': method,
+        }
+        canonical = json.dumps(key_fields, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a prediction, first in this process and then in the shared tier
+
+        Args:
+            key: Memo key from make_key
+
+        Returns:
+            Copy of the memoized prediction, or None when missing
+        """
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(text)
+
+        text = self._get_shared(key) if self.shared_path else None
+
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._remember(key, text)
+        return json.loads(text)
+
+    def _get_shared(self, key: str) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None and self.ttl_seconds is not None and time.time() - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    row = None
+        except sqlite3.Error as e:
+            print(f"Warning: prediction memo unavailable: {e}")
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Memoize a prediction in this process and the shared tier
+
+        Args:
+            key: Memo key from make_key
+            result: Finished prediction (empty results are not memoized)
+        """
+        if not result:
+            return
+        text = json.dumps(result, separators=(',', ':'))
+        with self._lock:
+            self._remember(key, text)
+            self._shared_puts += 1
+            trim = self._shared_puts % SHARED_TRIM_INTERVAL == 0
+
+        if not self.shared_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                             (key, text, time.time()))
+                if trim:
+                    # Oldest first rather than least recently used, so shared reads never write
+                    conn.execute(
+                        "DELETE FROM results WHERE key IN "
+                        "(SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                        (self.shared_max_entries,)
+                    )
+        except sqlite3.Error as e:
+            print(f"Warning: prediction memo unavailable: {e}")
+
+    def _remember(self, key: str, text: str) -> None:
+        # Caller holds self._lock
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every memoized prediction, including the shared tier"""
+        with self._lock:
+            self._entries.clear()
+        if self.shared_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report memo counters and current size
+
+        Returns:
+            Dictionary with hits (in-process and shared), misses, evictions, hit ratio and entry counts
+        """
+        shared_entries = None
+        if self.shared_path:
+            try:
+                with self._connect() as conn:
+                    shared_entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'shared_entries': shared_entries,
+            }
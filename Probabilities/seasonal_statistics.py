@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Batched statistics for seasonal samples
+Computes count, mean, variance, confidence interval and threshold exceedance counts for every parameter
+in one NumPy pass over a (parameter x sample) matrix
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def t_values(counts: np.ndarray) -> np.ndarray:
+    """
+    t-value used for the 95% confidence interval at each sample size
+
+    Args:
+        counts: Number of samples per parameter
+
+    Returns:
+        1.96 for n > 30 (z-score), otherwise the simplified t-distribution approximation
+    """
+    return np.where(counts > 30, 1.96, np.where(counts > 10, 2.0, 2.5))
+
+
+def sample_matrix(seasonal_data: Dict[str, List[float]], parameters: List[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Stack the seasonal samples of every parameter that has some
+
+    Args:
+        seasonal_data: Parameter code -> samples in the seasonal window
+        parameters: Parameter codes in output order
+
+    Returns:
+        Tuple of (parameters with samples, NaN-padded (parameter x sample) matrix)
+    """
+    present = [p for p in parameters if p in seasonal_data and len(seasonal_data[p]) > 0]
+    width = max((len(seasonal_data[p]) for p in present), default=0)
+    samples = np.full((len(present), width), np.nan, dtype=np.float64)
+    for row, param in enumerate(present):
+        values = seasonal_data[param]
+        samples[row, :len(values)] = values
+    return present, samples
+
+
+def _sequential_sum(matrix: np.ndarray) -> np.ndarray:
+    # Left-to-right accumulation reproduces the rounding of Python's sum(), so rounded outputs
+    # match the per-parameter loops exactly (ndarray.sum uses pairwise summation)
+    if matrix.shape[1] == 0:
+        return np.zeros(matrix.shape[0], dtype=np.float64)
+    return np.cumsum(matrix, axis=1)[:, -1]
+
+
+class SeasonalStatistics:
+    """Summary statistics for the parameters of one seasonal window, stored as aligned arrays"""
+
+    def __init__(self, parameters: List[str], count: np.ndarray, mean: np.ndarray,
+                 population_variance: np.ndarray, sample_variance: np.ndarray,
+                 above_counts: np.ndarray, below_counts: np.ndarray):
+        """
+        Initialize the statistics
+
+        Args:
+            parameters: Parameter codes, one per array row
+            count: Number of samples per parameter
+            mean: Mean per parameter
+            population_variance: Variance with n in the denominator
+            sample_variance: Variance with n - 1 in the denominator (0 when n < 2)
+            above_counts: Samples strictly above each parameter's upper threshold
+            below_counts: Samples strictly below each parameter's lower threshold
+        """
+        self.parameters = parameters
+        self.count = count
+        self.mean = mean
+        self.population_variance = population_variance
+        self.sample_variance = sample_variance
+        self.above_counts = above_counts
+        self.below_counts = below_counts
+        self.index = {param: i for i, param in enumerate(parameters)}
+
+    @classmethod
+    def from_seasonal_data(cls, seasonal_data: Dict[str, List[float]], parameters: List[str],
+                           above_thresholds: Optional[Dict[str, float]] = None,
+                           below_thresholds: Optional[Dict[str, float]] = None) -> 'SeasonalStatistics':
+        """
+        Compute statistics for every requested parameter with samples
+
+        Args:
+            seasonal_data: Parameter code -> samples in the seasonal window (NaN samples are skipped)
+            parameters: Parameter codes in output order
+            above_thresholds: Parameter code -> value that counts as an exceedance when strictly above
+            below_thresholds: Parameter code -> value that counts as an exceedance when strictly below
+
+        Returns:
+            SeasonalStatistics covering the parameters that have at least one sample
+        """
+        return cls.from_sample_matrix(*sample_matrix(seasonal_data, parameters), above_thresholds, below_thresholds)
+
+    @classmethod
+    def from_sample_matrix(cls, parameters: List[str], samples: np.ndarray,
+                           above_thresholds: Optional[Dict[str, float]] = None,
+                           below_thresholds: Optional[Dict[str, float]] = None) -> 'SeasonalStatistics':
+        """
+        Compute statistics from the output of sample_matrix
+
+        Args:
+            parameters: Parameter codes, one per row
+            samples: NaN-padded (parameter x sample) matrix
+            above_thresholds: Parameter code -> value that counts as an exceedance when strictly above
+            below_thresholds: Parameter code -> value that counts as an exceedance when strictly below
+
+        Returns:
+            SeasonalStatistics for the rows
+        """
+        above_thresholds = above_thresholds or {}
+        below_thresholds = below_thresholds or {}
+        above = np.array([above_thresholds.get(p, np.inf) for p in parameters], dtype=np.float64)
+        below = np.array([below_thresholds.get(p, -np.inf) for p in parameters], dtype=np.float64)
+        return cls.from_samples(parameters, samples, above, below)
+
+    @classmethod
+    def from_samples(cls, parameters: List[str], samples: np.ndarray,
+                     above: np.ndarray, below: np.ndarray) -> 'SeasonalStatistics':
+        """
+        Compute statistics from a NaN-padded (parameter x sample) matrix
+
+        Args:
+            parameters: Parameter codes, one per row
+            samples: Sample matrix, NaN where a row has fewer samples than the widest one
+            above: Upper threshold per row (inf disables the count)
+            below: Lower threshold per row (-inf disables the count)
+
+        Returns:
+            SeasonalStatistics for the rows
+        """
+        valid = ~np.isnan(samples)
+        count = valid.sum(axis=1)
+        safe_count = np.maximum(count, 1)
+
+        filled = np.where(valid, samples, 0.0)
+        mean = _sequential_sum(filled) / safe_count
+        squared_deviation = _sequential_sum(np.where(valid, (samples - mean[:, None]) ** 2, 0.0))
+
+        population_variance = squared_deviation / safe_count
+        sample_variance = np.where(count > 1, squared_deviation / np.maximum(count - 1, 1), 0.0)
+
+        # NaN padding compares False, so it never counts as an exceedance
+        with np.errstate(invalid='ignore'):
+            above_counts = (samples > above[:, None]).sum(axis=1)
+            below_counts = (samples < below[:, None]).sum(axis=1)
+
+        return cls(parameters, count, mean, population_variance, sample_variance, above_counts, below_counts)
+
+    def margin_of_error(self) -> np.ndarray:
+        """95% confidence margin of error per parameter (0 when fewer than two samples)"""
+        safe_count = np.maximum(self.count, 1)
+        std_error = np.sqrt(self.sample_variance / safe_count)
+        return np.where(self.count >= 2, t_values(self.count) * std_error, 0.0)
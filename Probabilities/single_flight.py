@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Single-flight de-duplication of identical upstream fetches
+The first caller for a key performs the fetch; concurrent callers for the same key wait for and share its result.
+Optionally a lock file per key extends this across processes (e.g. gunicorn workers sharing a disk cache).
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows: cross-process coalescing is disabled there
+    fcntl = None
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key within a process, and optionally across processes"""
+
+    def __init__(self, lock_dir: Optional[str] = None):
+        """
+        Initialize the coalescer
+
+        Args:
+            lock_dir: Directory for per-key lock files; when set, only one process at a time fetches a key
+        """
+        self.lock_dir = lock_dir if fcntl is not None else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    @contextmanager
+    def _process_lock(self, key: str) -> Iterator[None]:
+        if not self.lock_dir:
+            yield
+            return
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        with open(os.path.join(self.lock_dir, f"{digest}.lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def do(self, key: str, fetch: Callable[[], T], recheck: Optional[Callable[[], Optional[T]]] = None) -> T:
+        """
+        Run fetch once for all concurrent callers with the same key
+
+        Args:
+            key: Identity of the request (e.g. the API URL)
+            fetch: Performs the request and returns its result
+            recheck: Looks the result up again (e.g. in a shared cache) after waiting for another process
+
+        Returns:
+            The shared result (exceptions raised by fetch propagate to every waiting caller)
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            with self._process_lock(key):
+                result = recheck() if (recheck is not None and self.lock_dir) else None
+                if result is None:
+                    result = fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of fetches performed (leaders) and callers that shared another caller's fetch (followers)"""
+        with self._lock:
+            return {'leaders': self.leaders, 'followers': self.followers, 'inflight': len(self._inflight)}
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutines with the same key on one event loop"""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await fetch once for all concurrent callers with the same key
+
+        Args:
+            key: Identity of the request (e.g. the API URL)
+            fetch: Coroutine function performing the request
+
+        Returns:
+            The shared result
+        """
+        task = self._tasks.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(fetch())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _done: self._tasks.pop(key, None) if self._tasks.get(key) is _done else None)
+            self.leaders += 1
+        else:
+            self.followers += 1
+        # Shield so one cancelled caller does not cancel the fetch for everybody else
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of fetches performed (leaders) and callers that shared another caller's fetch (followers)"""
+        return {'leaders': self.leaders, 'followers': self.followers, 'inflight': len(self._tasks)}
+
+
+_shared_single_flight: Optional[SingleFlight] = None
+_shared_single_flight_lock = threading.Lock()
+
+
+def get_shared_single_flight() -> SingleFlight:
+    """Process-wide SingleFlight; POWER_LOCK_DIR enables cross-process coalescing"""
+    global _shared_single_flight
+    with _shared_single_flight_lock:
+        if _shared_single_flight is None:
+            _shared_single_flight = SingleFlight(os.environ.get('POWER_LOCK_DIR') or None)
+        return _shared_single_flight
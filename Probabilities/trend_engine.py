@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Year-over-year trend engine for seasonal windows
+Groups window samples by season year, then fits a least-squares slope and a recency-weighted mean for every
+parameter at once; the prediction is the weighted mean advanced by one year of trend
+"""
+
+import functools
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .climate_store import LEAP_MONTH_OFFSETS
+except ImportError:
+    from climate_store import LEAP_MONTH_OFFSETS
+
+
+# Weight of a year relative to the most recent one is exp(DECAY * (year - latest_year))
+DEFAULT_DECAY = 0.25
+
+
+def season_years(years: np.ndarray, day_of_year: np.ndarray, target_month: int, target_day: int) -> np.ndarray:
+    """
+    Season year of each window sample
+
+    Samples that wrap around the year boundary belong to the neighbouring year's window
+    (e.g. for a Jan 3 target, Dec 29 2019 counts toward Jan 3 2020).
+
+    Args:
+        years: Calendar year of each sample
+        day_of_year: Leap calendar day of year of each sample
+        target_month: Target month
+        target_day: Target day
+
+    Returns:
+        Array of season years
+    """
+    target = int(LEAP_MONTH_OFFSETS[target_month - 1]) + target_day
+    diff = np.asarray(day_of_year, dtype=np.int64) - target
+    return np.asarray(years, dtype=np.int64) + (diff > 180).astype(np.int64) - (diff < -180).astype(np.int64)
+
+
+@functools.lru_cache(maxsize=256)
+def trend_coefficients(offsets: Tuple[int, ...], decay: float = DEFAULT_DECAY) -> np.ndarray:
+    """
+    Weights turning per-year means into a prediction
+
+    For a fixed set of years with data, the recency-weighted mean and the least-squares slope are both linear in
+    the yearly means, so their sum is a single dot product with these weights.
+
+    Args:
+        offsets: Ascending offsets of the years with data from the first year
+        decay: Recency weighting strength
+
+    Returns:
+        Read-only array of one weight per offset up to the last one (0 for years without data)
+    """
+    x = np.array(offsets, dtype=np.float64)
+    recency = np.exp(decay * (x - x[-1]))
+    centered = x - x.mean()
+    spread = (centered * centered).sum()
+    coefficients = np.zeros(offsets[-1] + 1)
+    coefficients[list(offsets)] = recency / recency.sum() + (centered / spread if spread > 0 else 0.0)
+    coefficients.flags.writeable = False
+    return coefficients
+
+
+def block_years(count: int, start_year: int, end_year: int) -> np.ndarray:
+    """
+    Approximate season years for chronological samples without dates: equal consecutive blocks per year
+
+    Args:
+        count: Number of samples
+        start_year: First year
+        end_year: Last year
+
+    Returns:
+        Array of years, one per sample
+    """
+    num_years = max(1, end_year - start_year + 1)
+    block_size = max(1, count // num_years)
+    return start_year + np.minimum(np.arange(count) // block_size, num_years - 1)
+
+
+def yearly_means(samples: Dict[str, np.ndarray], sample_years: Dict[str, np.ndarray], parameters: List[str],
+                 start_year: int, end_year: int) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Mean of each parameter's window samples per season year
+
+    Args:
+        samples: Parameter code -> window samples
+        sample_years: Parameter code -> season year of each sample
+        parameters: Parameter codes in output order
+        start_year: First season year kept
+        end_year: Last season year kept (partial seasons outside the range are dropped)
+
+    Returns:
+        Tuple of (parameters with samples, years, means shaped (parameters, years) with NaN for empty years)
+    """
+    years = np.arange(start_year, end_year + 1)
+    kept = [p for p in parameters if p in samples and len(samples[p])]
+    num_cells = len(kept) * len(years)
+    if not kept:
+        return kept, years, np.zeros((0, len(years)))
+
+    # Every (parameter, year) group in one bincount over flattened cell indexes
+    lengths = [len(samples[p]) for p in kept]
+    values = np.concatenate([np.asarray(samples[p], dtype=np.float64) for p in kept])
+    columns = np.concatenate([np.asarray(sample_years[p], dtype=np.int64) for p in kept]) - start_year
+    cells = np.repeat(np.arange(len(kept)) * len(years), lengths) + columns
+    use = (columns >= 0) & (columns < len(years)) & ~np.isnan(values)
+
+    sums = np.bincount(cells[use], weights=values[use], minlength=num_cells).reshape(len(kept), len(years))
+    counts = np.bincount(cells[use], minlength=num_cells).reshape(len(kept), len(years))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    return kept, years, means
+
+
+def predict_from_means(means: np.ndarray, offsets: np.ndarray, decay: float = DEFAULT_DECAY) -> List[float]:
+    """
+    Weighted mean + slope of every row of per-year means
+
+    Args:
+        means: Per-year means shaped (rows, years), NaN where a year has no data
+        offsets: Ascending offset of each column's year from the first year
+        decay: Recency weighting strength
+
+    Returns:
+        Predicted value per row (NaN for rows without data)
+    """
+    # Rows with every year share one set of weights (a NaN mean makes the product NaN); the others get the
+    # weights for their own years
+    predicted = (means @ trend_coefficients(tuple(offsets.tolist()), decay)[offsets]).tolist()
+    for row, value in enumerate(predicted):
+        if value != value:
+            columns = np.flatnonzero(~np.isnan(means[row]))
+            if columns.size:
+                present = offsets[columns]
+                predicted[row] = float(means[row, columns] @ trend_coefficients(tuple(present.tolist()), decay)[present])
+    return predicted
+
+
+def fit_trends(parameters: List[str], years: np.ndarray, means: np.ndarray,
+               decay: float = DEFAULT_DECAY) -> Dict[str, float]:
+    """
+    Least-squares slope per year and recency-weighted mean for every parameter in one batched pass
+
+    Args:
+        parameters: Parameter codes, one per row of means
+        years: Ascending season years, one per column of means
+        means: Per-year means shaped (parameters, years), NaN where a year has no data
+        decay: Recency weighting strength
+
+    Returns:
+        Parameter code -> weighted mean + slope, rounded to 2 decimals (parameters without data are omitted)
+    """
+    if not parameters:
+        return {}
+    predicted = predict_from_means(means, np.asarray(years, dtype=np.int64) - years[0], decay)
+    return {param: round(value, 2) for param, value in zip(parameters, predicted) if value == value}
+
+
+@functools.lru_cache(maxsize=256)
+def year_indicator(years_key: bytes, start_year: int, end_year: int) -> np.ndarray:
+    """
+    Samples x years matrix with a 1 where a sample belongs to a season year (rows outside the range are all 0)
+
+    Args:
+        years_key: Season year of each sample, as the bytes of an int64 array
+        start_year: First season year kept
+        end_year: Last season year kept
+
+    Returns:
+        Read-only float matrix shaped (samples, years)
+    """
+    columns = np.frombuffer(years_key, dtype=np.int64) - start_year
+    indicator = (columns[:, None] == np.arange(end_year - start_year + 1)).astype(np.float64)
+    indicator.flags.writeable = False
+    return indicator
+
+
+@functools.lru_cache(maxsize=256)
+def sample_weights(years_key: bytes, start_year: int, end_year: int,
+                   decay: float = DEFAULT_DECAY) -> Optional[np.ndarray]:
+    """
+    Weight of each sample in the trend prediction for one season year array
+
+    Per-year means and the fit collapse into one weight per sample: its year's trend coefficient over the year's
+    sample count (0 outside the year range). A window's season years depend only on the date range, target date
+    and tolerance, so every location asking for the same window reuses the cached weights.
+
+    Args:
+        years_key: Season year of each sample, as the bytes of an int64 array
+        start_year: First season year kept
+        end_year: Last season year kept (partial seasons outside the range are dropped)
+        decay: Recency weighting strength
+
+    Returns:
+        Read-only array of one weight per sample, or None when no sample falls in the year range
+    """
+    indicator = year_indicator(years_key, start_year, end_year)
+    counts = indicator.sum(axis=0)
+    offsets = np.flatnonzero(counts)
+    if not offsets.size:
+        return None
+    coefficients = np.zeros(len(counts))
+    coefficients[:offsets[-1] + 1] = trend_coefficients(tuple(offsets.tolist()), decay)
+    weights = indicator @ np.divide(coefficients, counts, out=np.zeros_like(coefficients), where=counts > 0)
+    weights.flags.writeable = False
+    return weights
+
+
+def partial_year_trends(values: np.ndarray, indicator: np.ndarray, decay: float = DEFAULT_DECAY) -> List[float]:
+    """
+    Trend predictions for rows of samples with NaN where a day is missing
+
+    Args:
+        values: Samples shaped (rows, samples)
+        indicator: Season year of each sample, from year_indicator
+        decay: Recency weighting strength
+
+    Returns:
+        Predicted value per row (NaN for rows without samples)
+    """
+    valid = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (np.where(valid, values, 0.0) @ indicator) / (valid @ indicator)
+    return predict_from_means(means, np.arange(indicator.shape[1]), decay)
+
+
+def shared_year_trends(samples: Dict[str, np.ndarray], parameters: List[str], years: np.ndarray, start_year: int,
+                       end_year: int, decay: float = DEFAULT_DECAY, matrix: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """
+    Trend predictions for parameters whose samples share one season year array
+
+    All parameters take a single matrix-vector product with the cached sample_weights; rows with missing samples
+    are redone by partial_year_trends.
+
+    Args:
+        samples: Parameter code -> window samples, NaN where a day is missing
+        parameters: Parameter codes sharing the years
+        years: Season year of each sample
+        start_year: First season year kept
+        end_year: Last season year kept (partial seasons outside the range are dropped)
+        decay: Recency weighting strength
+        matrix: The same samples already stacked, one row per parameter (if None, they are stacked here)
+
+    Returns:
+        Parameter code -> predicted value (parameters without samples in range are omitted)
+    """
+    years_key = np.asarray(years, dtype=np.int64).tobytes()
+    weights = sample_weights(years_key, start_year, end_year, decay)
+    if weights is None:
+        return {}
+    values = matrix if matrix is not None else np.array([samples[p] for p in parameters], dtype=np.float64)
+    predicted = (values @ weights).tolist()
+
+    # A NaN sample makes its row NaN (NaN != NaN)
+    missing = [row for row, value in enumerate(predicted) if value != value]
+    if missing:
+        redone = partial_year_trends(values[missing], year_indicator(years_key, start_year, end_year), decay)
+        for row, value in zip(missing, redone):
+            predicted[row] = value
+    # Still NaN: no samples in range
+    return {param: round(value, 2) for param, value in zip(parameters, predicted) if value == value}
+
+
+def trends_from_samples(samples: Dict[str, np.ndarray], parameters: List[str], start_year: int, end_year: int,
+                        sample_years: Optional[Dict[str, np.ndarray]] = None,
+                        decay: float = DEFAULT_DECAY, matrix: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """
+    Trend predictions from seasonal window samples
+
+    Parameters given the same season year array (the same object) are predicted together by shared_year_trends.
+
+    Args:
+        samples: Parameter code -> window samples in chronological order, NaN where a day is missing
+        parameters: Parameter codes in output order
+        start_year: First season year
+        end_year: Last season year
+        sample_years: Parameter code -> season year of each sample (if None, samples are split into equal yearly blocks)
+        decay: Recency weighting strength
+        matrix: NaN-padded samples of the parameters with samples, one row each (seasonal_statistics.sample_matrix);
+            reused instead of stacking them again when they share one year array
+
+    Returns:
+        Parameter code -> predicted value
+    """
+    if sample_years is None:
+        # One array per sample count, so equally long parameters form one group
+        blocks: Dict[int, np.ndarray] = {}
+        for count in {len(v) for v in samples.values()}:
+            blocks[count] = block_years(count, start_year, end_year)
+        sample_years = {p: blocks[len(v)] for p, v in samples.items()}
+
+    kept = [param for param in parameters if param in samples and len(samples[param])]
+    if not kept:
+        return {}
+    years = sample_years[kept[0]]
+    if all(sample_years[param] is years for param in kept):
+        # The usual case: one window shared by every parameter, so no row of the matrix is padded
+        if matrix is not None and matrix.shape != (len(kept), len(years)):
+            matrix = None
+        return shared_year_trends(samples, kept, years, start_year, end_year, decay, matrix)
+
+    groups: Dict[int, List[str]] = {}
+    for param in kept:
+        groups.setdefault(id(sample_years[param]), []).append(param)
+    trends: Dict[str, float] = {}
+    for group in groups.values():
+        trends.update(shared_year_trends(samples, group, sample_years[group[0]], start_year, end_year, decay))
+    return {param: trends[param] for param in parameters if param in trends}
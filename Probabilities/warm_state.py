@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Warm state for production serving
+Climatology indexes of hot locations are built once in the server's parent process, before it forks its workers,
+so every worker shares the same read-only arrays and the first request for those locations answers from memory
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .climatology_index import ClimatologyIndex
+    from .climatology_tiles import ClimatologyTiles
+    from .nasa_weather_probability import NASAWeatherProbability
+except ImportError:
+    from climatology_index import ClimatologyIndex
+    from climatology_tiles import ClimatologyTiles
+    from nasa_weather_probability import NASAWeatherProbability
+
+
+class WarmIndexes:
+    """Pinned climatology indexes for hot grid cells, falling back to precomputed tiles for every other cell"""
+
+    def __init__(self, tiles: Optional[ClimatologyTiles] = None):
+        """
+        Initialize the pinned index set
+
+        Args:
+            tiles: Tiles consulted for cells without a pinned index (None answers only pinned cells)
+        """
+        self.tiles = tiles
+        self._indexes: Dict[Tuple[float, float, int, int], ClimatologyIndex] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, index: ClimatologyIndex) -> None:
+        """
+        Pin an index for its grid cell and year range (never evicted)
+
+        Args:
+            index: Climatology index to pin
+        """
+        with self._lock:
+            self._indexes[(index.latitude, index.longitude, index.start_year, index.end_year)] = index
+
+    def index_for(self, latitude: float, longitude: float, start_year: int, end_year: int) -> Optional[ClimatologyIndex]:
+        """
+        Climatology index of a grid cell, pinned or from its tile
+
+        Args:
+            latitude: Cell centre latitude
+            longitude: Cell centre longitude
+            start_year: First year of the historical range
+            end_year: Last year of the historical range
+
+        Returns:
+            ClimatologyIndex, or None when the cell is neither pinned nor covered by a tile
+        """
+        index = self._indexes.get((latitude, longitude, start_year, end_year))
+        with self._lock:
+            if index is not None:
+                self.hits += 1
+                return index
+            self.misses += 1
+        return self.tiles.index_for(latitude, longitude, start_year, end_year) if self.tiles is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookups answered by pinned indexes (hits) or passed on to the tiles (misses), and pinned cells"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'pinned_cells': len(self._indexes),
+            }
+
+
+def warm_up(locations: List[Dict[str, Any]], estimator_factory: Callable[[float, float], NASAWeatherProbability],
+            parameters: List[str], indexes: WarmIndexes, max_workers: int = 4) -> Dict[str, Any]:
+    """
+    Build and pin the climatology index of every location's grid cell
+
+    Cells already held by the store (or a tile) are indexed without any upstream call; the others are fetched once.
+
+    Args:
+        locations: List of {latitude, longitude} dictionaries
+        estimator_factory: Builds an estimator for (latitude, longitude), configured like the request handlers
+        parameters: Parameter codes the handlers request, so pinned indexes cover their queries
+        indexes: Index set to pin into
+        max_workers: Cells fetched from NASA at the same time
+
+    Returns:
+        Summary with location, cell, pinned and failed counts and elapsed seconds
+    """
+    started = time.perf_counter()
+
+    # Nearby locations share one grid cell and one index
+    estimators: Dict[Tuple[float, float], NASAWeatherProbability] = {}
+    for location in locations:
+        estimator = estimator_factory(location['latitude'], location['longitude'])
+        estimators.setdefault((estimator.cell_latitude, estimator.cell_longitude), estimator)
+
+    def warm(estimator: NASAWeatherProbability) -> bool:
+        if not estimator.index_covers(parameters) and estimator.build_climatology_index(parameters) is None:
+            return False
+        indexes.add(estimator.climatology_index)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(estimators) or 1))) as pool:
+        warmed = list(pool.map(warm, estimators.values()))
+
+    return {
+        'locations': len(locations),
+        'cells': len(estimators),
+        'pinned': sum(warmed),
+        'failed': len(warmed) - sum(warmed),
+        'seconds': round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,108 @@
+# ASGI entry point: serves /api/getWeather with the asyncio estimator so one process can keep
+# hundreds of upstream requests in flight. Every other route is handed to the Flask app.
+# Run with: uvicorn asgi:app --host 0.0.0.0 --port 8000 (or WORKER_MODEL=async gunicorn -c gunicorn.conf.py)
+
+import time
+from urllib.parse import parse_qs
+
+from main import app as flask_app, create_app as create_flask_app, response_cache, climate_store, prediction_memo, warm_indexes, stage_metrics, response_encoder, WEATHER_PARAMETERS, DATA_START_YEAR, DATA_END_YEAR
+from Probabilities.batch_prediction import coordinate_error
+from Probabilities.async_client import AsyncNASAWeatherProbability, create_async_client
+from Probabilities.response_encoding import parse_fields, shape_result
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+
+class WeatherASGIApp:
+    """Native async handler for the weather API with the Flask app as fallback"""
+
+    def __init__(self):
+        self.client = None
+        self.wsgi_app = WsgiToAsgi(flask_app) if WsgiToAsgi is not None else None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/api/getWeather' and scope['method'] == 'GET':
+            started = time.perf_counter()
+            await self.get_weather(scope, send)
+            stage_metrics.observe('weather_request_seconds', time.perf_counter() - started, endpoint='getWeather')
+        elif self.wsgi_app is not None:
+            await self.wsgi_app(scope, receive, send)
+        else:
+            await self.send_json(send, 404, {'error': 'not found'})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # One pooled client per process, shared by every request
+                self.client = create_async_client()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.client is not None:
+                    await self.client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def get_weather(self, scope, send):
+        query = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+        try:
+            latitude = float(query['latitude'][0])
+            longitude = float(query['longitude'][0])
+            target_date = query['date'][0]
+            digits = int(query['precision'][0]) if 'precision' in query else None
+        except (KeyError, IndexError, ValueError):
+            await self.send_json(send, 400, {'error': 'latitude, longitude and date are required'})
+            return
+        error = coordinate_error(latitude, longitude)
+        if error is not None:
+            await self.send_json(send, 400, {'error': error})
+            return
+        paths = parse_fields(query.get('fields', [None])[0])
+
+        estimator = AsyncNASAWeatherProbability(
+            longitude = longitude,
+            latitude = latitude,
+            start_year = DATA_START_YEAR,
+            end_year = DATA_END_YEAR,
+            client = self.client,
+            cache = response_cache,
+            store = climate_store,
+            memo = prediction_memo,
+            tiles = warm_indexes,
+        )
+
+        result = await estimator.predict_weather_for_date_async(target_date, WEATHER_PARAMETERS, tolerance_days=7)
+
+        # An empty result means the prediction failed and must not be cached
+        await self.send_json(send, 200, shape_result(result, paths, digits), scope, cacheable=bool(result))
+
+    async def send_json(self, send, status, payload, scope=None, cacheable=False):
+        request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in (scope or {}).get('headers', [])}
+        with stage_metrics.time('serialization'):
+            status, headers, body = response_encoder.encode(
+                payload,
+                accept_encoding=request_headers.get('accept-encoding'),
+                if_none_match=request_headers.get('if-none-match'),
+                cacheable=cacheable,
+                status=status,
+            )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_app():
+    """App factory for gunicorn's uvicorn workers: warms the shared state once (see main.create_app)"""
+    create_flask_app()
+    return WeatherASGIApp()
+
+
+app = WeatherASGIApp()
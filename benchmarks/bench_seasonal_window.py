@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark seasonal window extraction: vectorized get_seasonal_data vs the original per-key loop
+Run from the repository root: python benchmarks/bench_seasonal_window.py
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Probabilities.nasa_weather_probability import NASAWeatherProbability
+from synthetic_power import DEFAULT_PARAMETERS, synthetic_power_response
+
+
+def legacy_is_date_in_range(month, day, target_month, target_day, tolerance_days):
+    """Original implementation: two datetime.date objects per key"""
+    try:
+        date_obj = datetime.date(2024, month, day)
+        target_date_obj = datetime.date(2024, target_month, target_day)
+        diff = abs((date_obj - target_date_obj).days)
+        if diff > 180:
+            diff = 365 - diff
+        return diff <= tolerance_days
+    except ValueError:
+        return False
+
+
+def legacy_get_seasonal_data(data, parameters, target_month, target_day, tolerance_days=7):
+    """Original implementation of get_seasonal_data, kept as the reference for equivalence and timing"""
+    if not data or 'properties' not in data:
+        return {}
+    parameter_data = data['properties'].get('parameter', {})
+    seasonal_data = defaultdict(list)
+    for param in parameters:
+        if param not in parameter_data:
+            continue
+        param_values = parameter_data[param]
+        if not param_values:
+            continue
+        for date_key, value_data in param_values.items():
+            if isinstance(value_data, (int, float)) and value_data is not None:
+                try:
+                    if len(date_key) == 8:
+                        month = int(date_key[4:6])
+                        day = int(date_key[6:8])
+                        if legacy_is_date_in_range(month, day, target_month, target_day, tolerance_days):
+                            seasonal_data[param].append(value_data)
+                except (ValueError, IndexError):
+                    continue
+    return dict(seasonal_data)
+
+
+def best_of(repeats, func, *args):
+    """Return the fastest wall time of several runs and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark seasonal window extraction')
+    parser.add_argument('--years', type=int, default=10, help='Years of daily data (default: 10)')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per measurement, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    end_year = 2024
+    start_year = end_year - args.years + 1
+    data = synthetic_power_response(DEFAULT_PARAMETERS, start_year, end_year)
+    estimator = NASAWeatherProbability(longitude=-97.1384, latitude=30.2672, start_year=start_year, end_year=end_year)
+
+    print(f"{args.years} years x {len(DEFAULT_PARAMETERS)} parameters")
+    print(f"{'target':>8} {'tolerance':>9} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8}")
+    for target_month, target_day, tolerance in [(7, 15, 7), (1, 3, 7), (12, 30, 10), (2, 29, 5), (3, 1, 30)]:
+        legacy_time, expected = best_of(args.repeats, legacy_get_seasonal_data, data, DEFAULT_PARAMETERS,
+                                        target_month, target_day, tolerance)
+        vector_time, actual = best_of(args.repeats, estimator.get_seasonal_data, data, DEFAULT_PARAMETERS,
+                                      target_month, target_day, tolerance)
+        if actual != expected:
+            print(f"MISMATCH for {target_month:02d}/{target_day:02d} +/- {tolerance}")
+            sys.exit(1)
+        print(f"{target_month:02d}/{target_day:02d}".rjust(8) + f" {tolerance:>9} {legacy_time * 1000:>10.2f} "
+              f"{vector_time * 1000:>10.2f} {legacy_time / vector_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
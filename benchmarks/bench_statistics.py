@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark calculate_date_probabilities: batched statistics kernel vs the original per-parameter loops
+Run from the repository root: python benchmarks/bench_statistics.py
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Probabilities.nasa_weather_probability import NASAWeatherProbability
+from synthetic_power import DEFAULT_PARAMETERS, synthetic_power_response
+
+
+def legacy_statistics(estimator, seasonal_data, parameters):
+    """Original statistics loops: mean, std, CI variance and one pass per threshold (results assembly excluded)"""
+    thresholds = estimator.THRESHOLDS
+    out = {}
+    for param in parameters:
+        values = seasonal_data.get(param)
+        if not values:
+            continue
+        mean_val = sum(values) / len(values)
+        std_val = (sum((x - mean_val) ** 2 for x in values) / len(values)) ** 0.5
+        margin = 0.0
+        if len(values) >= 2:
+            variance = sum((x - mean_val) ** 2 for x in values) / (len(values) - 1)
+            n = len(values)
+            t_value = 1.96 if n > 30 else (2.0 if n > 10 else 2.5)
+            margin = t_value * math.sqrt(variance / n)
+        counts = [sum(1 for v in values if v > thresholds['very_hot_temp']),
+                  sum(1 for v in values if v < thresholds['very_cold_temp']),
+                  sum(1 for v in values if v > thresholds['very_windy_speed'])]
+        out[param] = (round(mean_val, 2), round(margin, 2), std_val, counts)
+    return out
+
+
+def best_of(repeats, func, *args):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the seasonal statistics kernel')
+    parser.add_argument('--tolerance-days', type=int, nargs='*', default=[3, 7, 15, 30],
+                        help='Window sizes to measure (default: 3 7 15 30)')
+    parser.add_argument('--repeats', type=int, default=20, help='Runs per measurement, best is reported (default: 20)')
+    args = parser.parse_args()
+
+    data = synthetic_power_response(DEFAULT_PARAMETERS, 2015, 2024)
+    estimator = NASAWeatherProbability(longitude=-97.1384, latitude=30.2672, start_year=2015, end_year=2024)
+
+    print(f"{'tolerance':>9} {'samples':>8} {'legacy ms':>10} {'kernel ms':>10} {'speedup':>8}")
+    for tolerance in args.tolerance_days:
+        seasonal_data = estimator.get_seasonal_data(data, DEFAULT_PARAMETERS, 7, 15, tolerance)
+        legacy_time = best_of(args.repeats, legacy_statistics, estimator, seasonal_data, DEFAULT_PARAMETERS)
+        kernel_time = best_of(args.repeats, estimator.calculate_date_probabilities, seasonal_data, DEFAULT_PARAMETERS)
+        samples = len(seasonal_data['T2M'])
+        print(f"{tolerance:>9} {samples:>8} {legacy_time * 1000:>10.3f} {kernel_time * 1000:>10.3f} "
+              f"{legacy_time / kernel_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark decoding a Power API response into a DailySeries: full json.loads vs the streaming decoder
+Reports time and peak Python heap (tracemalloc) for each path
+Run from the repository root: python benchmarks/bench_stream_decode.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Probabilities.climate_store import DailySeries
+from Probabilities.power_stream import ChunkReader, series_from_power_stream, streaming_available
+from synthetic_power import DEFAULT_PARAMETERS, synthetic_power_response
+
+
+def decode_full(body, parameters):
+    # As response.json() does: the whole body is read and joined, decoded to text, then parsed into dictionaries
+    content = b''.join(body[i:i + 65536] for i in range(0, len(body), 65536))
+    return DailySeries.from_power_json(json.loads(content.decode('utf-8')), parameters)
+
+
+def decode_stream(body, parameters):
+    # Same 64 KiB chunks the estimator reads from the socket, each copied as the network would deliver it
+    chunks = (body[i:i + 65536] for i in range(0, len(body), 65536))
+    return series_from_power_stream(ChunkReader(chunks), parameters)
+
+
+def measure(func, body, parameters, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(body, parameters)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(body, parameters)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming vs full JSON decoding of Power responses')
+    parser.add_argument('--years', type=int, nargs='*', default=[10, 20, 40], help='Years per response (default: 10 20 40)')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per measurement, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    if not streaming_available():
+        print("ijson is not installed; pip install ijson to enable the streaming decoder")
+        sys.exit(1)
+
+    print(f"{'years':>5} {'body MB':>8} {'full ms':>8} {'full peak MB':>13} {'stream ms':>10} {'stream peak MB':>15}")
+    for years in args.years:
+        body = json.dumps(synthetic_power_response(DEFAULT_PARAMETERS, 2024 - years + 1, 2024)).encode('utf-8')
+        full_time, full_peak = measure(decode_full, body, DEFAULT_PARAMETERS, args.repeats)
+        stream_time, stream_peak = measure(decode_stream, body, DEFAULT_PARAMETERS, args.repeats)
+        print(f"{years:>5} {len(body) / 1e6:>8.2f} {full_time * 1000:>8.1f} {full_peak / 1e6:>13.2f} "
+              f"{stream_time * 1000:>10.1f} {stream_peak / 1e6:>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Reproducible end-to-end benchmark suite
+Replays a Power fixture (recorded with record_power_fixture.py, or seeded synthetic data when none is given) through
+the local stub server and measures latency, throughput, time per stage and peak memory for single-date, multi-date
+and multi-location workloads, plus the seasonal window, statistics and trend kernels. Results are written as JSON
+and can be compared against a stored baseline from the same machine.
+Run from the repository root:
+python benchmarks/bench_suite.py --output baseline.json
+python benchmarks/bench_suite.py --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Probabilities.batch_prediction import predict_weather_batch
+from Probabilities.climate_store import ClimateStore
+from Probabilities.metrics import STAGES, StageMetrics
+from Probabilities.nasa_weather_probability import NASAWeatherProbability
+from Probabilities.power_cache import PowerResponseCache
+from Probabilities.result_memo import ResultMemo
+from Probabilities.single_flight import SingleFlight
+from Probabilities.trend_engine import trends_from_samples
+from stub_power_server import fixture_body, load_fixture, start_stub_server
+from synthetic_power import DEFAULT_PARAMETERS, synthetic_power_response
+
+
+SUITE_VERSION = 1
+
+START_YEAR = 2015
+END_YEAR = 2024
+
+# The fixture location (Austin, TX); multi-location runs spread out from it one grid cell apart
+LATITUDE = 30.2672
+LONGITUDE = -97.7431
+
+# Target dates cycled through by the single-date workloads, spread over the year
+TARGET_DATES = [f"{month:02d}/{day:02d}" for month in range(1, 13) for day in (3, 15, 27)]
+
+# Every day of a leap year, for the multi-date workload
+ALL_DATES = [(datetime.date(2024, 1, 1) + datetime.timedelta(days=i)).strftime('%m/%d') for i in range(366)]
+
+# Relative change beyond which a metric counts as a regression (sub-millisecond workloads vary by ~15% run to run)
+DEFAULT_THRESHOLD = 0.20
+
+
+def load_data(fixture_path: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Fixture to replay and a description of where it came from
+
+    Args:
+        fixture_path: Recorded Power response (.json or .json.gz), or None for seeded synthetic data
+
+    Returns:
+        Tuple of (Power response dictionary, provenance recorded in the results)
+    """
+    if fixture_path is None:
+        data = synthetic_power_response(DEFAULT_PARAMETERS, START_YEAR, END_YEAR, LONGITUDE, LATITUDE, seed=0)
+        return data, {'source': 'synthetic_power.py', 'seed': 0, 'synthetic': True}
+
+    data = load_fixture(fixture_path)
+    provenance = dict(data.get('fixture') or {})
+    provenance.setdefault('synthetic', 'synthetic' in data.get('header', {}).get('title', '').lower())
+    provenance['path'] = fixture_path
+    return data, provenance
+
+
+class Scenario:
+    """Estimator factory over fresh cache, store and (optionally) memo directories"""
+
+    def __init__(self, memo: bool = False, metrics: Optional[StageMetrics] = None):
+        self.root = tempfile.mkdtemp(prefix='bench_suite_')
+        self.cache = PowerResponseCache(os.path.join(self.root, 'cache'))
+        self.store = ClimateStore(os.path.join(self.root, 'store'))
+        self.memo = ResultMemo() if memo else None
+        self.single_flight = SingleFlight()
+        self.metrics = metrics if metrics is not None else StageMetrics()
+
+    def estimator(self, latitude: float, longitude: float) -> NASAWeatherProbability:
+        return NASAWeatherProbability(longitude, latitude, START_YEAR, END_YEAR, cache=self.cache, store=self.store,
+                                      single_flight=self.single_flight, memo=self.memo, metrics=self.metrics)
+
+    def close(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def run_workload(setup: Callable[[StageMetrics], Any], operation: Callable[[Any, int], Any], iterations: int,
+                 items_per_operation: int, teardown: Callable[[Any], None] = lambda state: None) -> Dict[str, Any]:
+    """
+    Time one workload
+
+    Each iteration gets a state from setup (not timed) and runs one timed operation. One untimed warm-up iteration
+    runs first, and one more under tracemalloc measures peak memory, so tracing never slows the timed runs.
+
+    Args:
+        setup: Builds the state for one iteration from the metrics the estimators record into
+        operation: Runs one operation on a state; the second argument is the iteration number
+        iterations: Timed iterations
+        items_per_operation: Predictions (or kernel calls) per operation, for throughput
+        teardown: Releases a state
+
+    Returns:
+        Latency percentiles, throughput, peak memory and time per stage
+    """
+    def once(metrics: StageMetrics, iteration: int) -> float:
+        state = setup(metrics)
+        try:
+            with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+                started = time.perf_counter()
+                operation(state, iteration)
+                return time.perf_counter() - started
+        finally:
+            teardown(state)
+
+    gc.collect()
+    once(StageMetrics(), 0)
+
+    metrics = StageMetrics()
+    latencies = [once(metrics, i) for i in range(iterations)]
+
+    gc.collect()
+    tracemalloc.start()
+    once(StageMetrics(), 0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    stages = {}
+    for stage, observed in metrics.totals().items():
+        stages[stage] = {
+            'count': observed['count'],
+            'total_ms': round(observed['sum'] * 1000, 3),
+            'mean_ms': round(observed['sum'] * 1000 / observed['count'], 4) if observed['count'] else 0.0,
+        }
+    return {
+        'iterations': iterations,
+        'items_per_operation': items_per_operation,
+        'mean_ms': round(total * 1000 / iterations, 4),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4),
+        'throughput_per_s': round(iterations * items_per_operation / total, 2) if total else 0.0,
+        'peak_memory_mb': round(peak / 1e6, 3),
+        'stages': {stage: stages[stage] for stage in STAGES if stage in stages},
+    }
+
+
+def prefilled(memo: bool = False) -> Callable[[StageMetrics], Scenario]:
+    """Setup returning one scenario whose store (and memo) already holds the fixture location"""
+    scenarios: Dict[bool, Scenario] = {}
+
+    def setup(metrics: StageMetrics) -> Scenario:
+        if memo not in scenarios:
+            scenario = Scenario(memo=memo)
+            with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+                scenario.estimator(LATITUDE, LONGITUDE).predict_weather_for_date(TARGET_DATES[0], DEFAULT_PARAMETERS)
+            scenarios[memo] = scenario
+        scenario = scenarios[memo]
+        scenario.metrics = metrics
+        return scenario
+
+    setup.scenarios = scenarios
+    return setup
+
+
+def run_suite(args: argparse.Namespace, data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the selected workloads
+
+    Args:
+        args: Parsed command line
+        data: Power response the stub replays
+
+    Returns:
+        Workload name -> measurements
+    """
+    scale = 0.2 if args.quick else 1.0
+
+    def iterations(count: int) -> int:
+        return max(1, int(count * scale))
+
+    locations = [(LATITUDE + 0.5 * (i // 4), LONGITUDE + 0.625 * (i % 4)) for i in range(args.locations)]
+    batch = [{'latitude': lat, 'longitude': lon, 'date': date}
+             for lat, lon in locations for date in TARGET_DATES[:args.dates_per_location]]
+
+    decoded = json.loads(fixture_body(data, ','.join(DEFAULT_PARAMETERS), f"{START_YEAR}0101", f"{END_YEAR}1231"))
+    kernel_estimator = NASAWeatherProbability(LONGITUDE, LATITUDE, START_YEAR, END_YEAR)
+
+    def kernel_setup(metrics: StageMetrics) -> NASAWeatherProbability:
+        kernel_estimator.metrics = metrics
+        return kernel_estimator
+    seasonal_data, seasonal_years = kernel_estimator.get_seasonal_window(decoded, DEFAULT_PARAMETERS, 7, 15, 7)
+
+    store_setup = prefilled()
+    memo_setup = prefilled(memo=True)
+
+    workloads = {
+        # Empty caches: download, decode, store, extract, statistics and trend for one date
+        'single_cold': lambda: run_workload(
+            lambda metrics: Scenario(metrics=metrics),
+            lambda scenario, i: scenario.estimator(LATITUDE, LONGITUDE).predict_weather_for_date(
+                TARGET_DATES[i % len(TARGET_DATES)], DEFAULT_PARAMETERS),
+            iterations(10), 1, teardown=Scenario.close),
+        # Location already in the climate store, no memo: what a new date at a known location costs
+        'single_store': lambda: run_workload(
+            store_setup,
+            lambda scenario, i: scenario.estimator(LATITUDE, LONGITUDE).predict_weather_for_date(
+                TARGET_DATES[i % len(TARGET_DATES)], DEFAULT_PARAMETERS),
+            iterations(100), 1),
+        # Repeated request answered from the prediction memo
+        'single_memo': lambda: run_workload(
+            memo_setup,
+            lambda scenario, i: scenario.estimator(LATITUDE, LONGITUDE).predict_weather_for_date(
+                TARGET_DATES[0], DEFAULT_PARAMETERS),
+            iterations(500), 1),
+        # Every day of the year at a stored location in one call (one index build, then window queries)
+        'multi_date': lambda: run_workload(
+            store_setup,
+            lambda scenario, i: scenario.estimator(LATITUDE, LONGITUDE).predict_weather_for_dates(
+                ALL_DATES, DEFAULT_PARAMETERS),
+            iterations(5), len(ALL_DATES)),
+        # Batch over distinct grid cells with empty caches, fetched concurrently
+        'multi_location': lambda: run_workload(
+            lambda metrics: Scenario(metrics=metrics),
+            lambda scenario, i: predict_weather_batch(batch, scenario.estimator, DEFAULT_PARAMETERS,
+                                                      max_workers=args.workers),
+            iterations(3), len(batch), teardown=Scenario.close),
+        # Kernels on decoded data, without I/O
+        'kernel_seasonal_window': lambda: run_workload(
+            kernel_setup,
+            lambda estimator, i: estimator.get_seasonal_window(decoded, DEFAULT_PARAMETERS, 7, 15, 7),
+            iterations(50), 1),
+        'kernel_statistics': lambda: run_workload(
+            kernel_setup,
+            lambda estimator, i: estimator.calculate_date_probabilities(seasonal_data, DEFAULT_PARAMETERS,
+                                                                        seasonal_years),
+            iterations(200), 1),
+        'kernel_trend': lambda: run_workload(
+            lambda metrics: None,
+            lambda state, i: trends_from_samples(seasonal_data, DEFAULT_PARAMETERS, START_YEAR, END_YEAR,
+                                                 seasonal_years),
+            iterations(500), 1),
+    }
+
+    selected = args.workloads or list(workloads)
+    unknown = [name for name in selected if name not in workloads]
+    if unknown:
+        raise SystemExit(f"Unknown workloads: {', '.join(unknown)} (choose from {', '.join(workloads)})")
+
+    results = {}
+    try:
+        for name in selected:
+            print(f"Running {name}...", flush=True)
+            results[name] = workloads[name]()
+    finally:
+        for setup in (store_setup, memo_setup):
+            for scenario in setup.scenarios.values():
+                scenario.close()
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """Interpreter, library and machine details, so results are only compared like for like"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print current results next to a baseline and list regressions
+
+    Args:
+        current: Results of this run
+        baseline: Stored results
+        threshold: Relative change counted as a regression
+
+    Returns:
+        One description per regressed metric
+    """
+    if current['data'].get('synthetic') != baseline['data'].get('synthetic'):
+        print("Warning: baseline and current runs replayed different kinds of data (synthetic vs recorded)")
+    for key in ('python', 'numpy', 'machine', 'cpu_count'):
+        if current['environment'].get(key) != baseline['environment'].get(key):
+            print(f"Warning: {key} differs from the baseline ({baseline['environment'].get(key)} -> "
+                  f"{current['environment'].get(key)})")
+
+    # (metric, higher is better)
+    metrics = [('throughput_per_s', True), ('p50_ms', False), ('p95_ms', False), ('peak_memory_mb', False)]
+    regressions = []
+    print(f"\n{'workload':<24} {'metric':<17} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current['workloads'].items():
+        before = baseline['workloads'].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in metrics:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = ' REGRESSION' if worse > threshold else ''
+            print(f"{name:<24} {metric:<17} {old:>12.3f} {new:>12.3f} {change:>+7.1%}{flag}")
+            if flag:
+                regressions.append(f"{name} {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'workload':<24} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+    for name, result in results.items():
+        print(f"{name:<24} {result['throughput_per_s']:>10.1f} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['peak_memory_mb']:>8.2f}")
+        for stage, observed in result['stages'].items():
+            print(f"    {stage:<20} {observed['count']:>8} calls {observed['mean_ms']:>10.4f} ms mean")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end benchmark suite')
+    parser.add_argument('--fixture', type=str, default=None,
+                        help='Recorded Power response to replay (default: seeded synthetic data)')
+    parser.add_argument('--workloads', nargs='*', default=None, help='Workloads to run (default: all)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the stub adds to every response (default: 0)')
+    parser.add_argument('--locations', type=int, default=8, help='Grid cells in the multi-location batch (default: 8)')
+    parser.add_argument('--dates-per-location', type=int, default=4, help='Dates per location in the batch (default: 4)')
+    parser.add_argument('--workers', type=int, default=8, help='Locations fetched at the same time in the batch (default: 8)')
+    parser.add_argument('--quick', action='store_true', help='Run a fifth of the iterations (smoke test)')
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON')
+    parser.add_argument('--baseline', type=str, default=None, help='Compare against results written by an earlier run')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Relative change reported as a regression (default: {DEFAULT_THRESHOLD})')
+    args = parser.parse_args()
+
+    data, provenance = load_data(args.fixture)
+    if provenance['synthetic']:
+        print("Replaying SYNTHETIC data (record a real response with record_power_fixture.py and pass --fixture)")
+
+    server = start_stub_server(latency=args.latency, fixture=data)
+    os.environ['POWER_BASE_URL'] = server.base_url
+    try:
+        workloads = run_suite(args, data)
+    finally:
+        server.shutdown()
+
+    results = {
+        'suite_version': SUITE_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'data': {**provenance, 'start_year': START_YEAR, 'end_year': END_YEAR, 'parameters': DEFAULT_PARAMETERS},
+        'config': {key: getattr(args, key) for key in ('latency', 'locations', 'dates_per_location', 'workers', 'quick')},
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'workloads': workloads,
+    }
+    print_results(workloads)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == '__main__':
+    main()
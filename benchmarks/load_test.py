@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Load test for /api/getWeather
+Starts the stub Power server (with latency and failure injection) and the app under gunicorn.conf.py, or targets a
+running server with --url, then sweeps closed-loop concurrency levels with a configurable mix of locations and dates.
+Each level reports throughput, p50/p95/p99 latency, error rate and saturation: requests in flight against the
+server's capacity and, for a launched server, CPU cores its processes used.
+Run from the repository root:
+python benchmarks/load_test.py --concurrency 1 4 16 64 --duration 20 --workers 2 --worker-model threaded
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, REPO_ROOT)
+
+from Probabilities.power_grid import MERRA2_GRID
+
+
+def make_locations(count: int, seed: int) -> List[Tuple[float, float]]:
+    """
+    Distinct grid cells over the contiguous United States
+
+    Args:
+        count: Number of locations
+        seed: Random seed
+
+    Returns:
+        List of (latitude, longitude), each in a different Power grid cell
+    """
+    rng = random.Random(seed)
+    cells = {}
+    while len(cells) < count:
+        latitude, longitude = round(rng.uniform(25, 49), 4), round(rng.uniform(-124, -67), 4)
+        cells.setdefault(MERRA2_GRID.snap(latitude, longitude), (latitude, longitude))
+    return list(cells.values())
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    """Popularity of the k-th location proportional to 1 / k^exponent (0 gives a uniform mix)"""
+    return [1.0 / (k ** exponent) for k in range(1, count + 1)]
+
+
+class RequestMix:
+    """Draws (latitude, longitude, date) requests: Zipf-popular locations and a pool of target dates"""
+
+    def __init__(self, locations: int, date_pool: int, zipf_exponent: float, seed: int):
+        self.locations = make_locations(locations, seed)
+        self.weights = zipf_weights(locations, zipf_exponent)
+        rng = random.Random(seed)
+        all_dates = [f"{month:02d}/{day:02d}" for month in range(1, 13) for day in range(1, 29)]
+        self.dates = rng.sample(all_dates, min(date_pool, len(all_dates)))
+
+    def draw(self, rng: random.Random) -> Tuple[float, float, str]:
+        latitude, longitude = rng.choices(self.locations, weights=self.weights)[0]
+        return latitude, longitude, rng.choice(self.dates)
+
+
+def wait_until_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+def process_tree(pid: int) -> List[int]:
+    """A process and its direct children (gunicorn master and workers), from /proc"""
+    children = []
+    try:
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as f:
+                        fields = f.read().rsplit(')', 1)[1].split()
+                except OSError:
+                    continue
+                if int(fields[1]) == pid:
+                    children.append(int(entry))
+    except OSError:
+        return [pid]
+    return [pid] + children
+
+
+def cpu_seconds(pids: List[int]) -> Optional[float]:
+    """User plus system CPU time of processes from /proc (None where /proc is unavailable)"""
+    ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+    total = 0.0
+    found = False
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        total += (int(fields[11]) + int(fields[12])) / ticks
+        found = True
+    return total if found else None
+
+
+def run_level(base_url: str, mix: RequestMix, concurrency: int, duration: float, timeout: float,
+              seed: int) -> Dict[str, Any]:
+    """
+    Closed loop: each of concurrency clients sends its next request as soon as the previous one returns
+
+    Args:
+        base_url: Server root URL
+        mix: Request mix
+        concurrency: Concurrent clients
+        duration: Seconds to run
+        timeout: Per-request timeout in seconds
+        seed: Random seed (each client derives its own)
+
+    Returns:
+        Request count, elapsed seconds, latencies and error counts by kind
+    """
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def client(number: int) -> None:
+        rng = random.Random(f"{seed}:{concurrency}:{number}")
+        session = requests.Session()
+        own_latencies, own_errors = [], {}
+        start.wait()
+        while time.perf_counter() < deadline[0]:
+            latitude, longitude, date = mix.draw(rng)
+            started = time.perf_counter()
+            error = None
+            try:
+                response = session.get(f"{base_url}/api/getWeather", timeout=timeout,
+                                       params={'latitude': latitude, 'longitude': longitude, 'date': date})
+                if response.status_code != 200:
+                    error = f"http_{response.status_code}"
+                elif response.content.strip() in (b'{}', b''):
+                    # The app answers 200 with an empty object when Power could not be reached
+                    error = 'empty_result'
+            except requests.exceptions.Timeout:
+                error = 'timeout'
+            except requests.exceptions.RequestException:
+                error = 'connection'
+            own_latencies.append(time.perf_counter() - started)
+            if error:
+                own_errors[error] = own_errors.get(error, 0) + 1
+        session.close()
+        with lock:
+            latencies.extend(own_latencies)
+            for kind, count in own_errors.items():
+                errors[kind] = errors.get(kind, 0) + count
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start.wait()
+    for thread in threads:
+        thread.join()
+    return {'elapsed': time.perf_counter() - started, 'latencies': latencies, 'errors': errors}
+
+
+def summarize_level(concurrency: int, raw: Dict[str, Any], capacity: Optional[int],
+                    cpu_used: Optional[float]) -> Dict[str, Any]:
+    latencies = np.array(raw['latencies']) * 1000
+    count = len(latencies)
+    failed = sum(raw['errors'].values())
+    throughput = count / raw['elapsed'] if raw['elapsed'] else 0.0
+    # Little's law: average requests in flight at the server
+    in_flight = throughput * (latencies.mean() / 1000) if count else 0.0
+    cores = cpu_used / raw['elapsed'] if cpu_used is not None and raw['elapsed'] else None
+    return {
+        'concurrency': concurrency,
+        'requests': count,
+        'throughput_rps': round(throughput, 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2) if count else None,
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2) if count else None,
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2) if count else None,
+        'error_rate': round(failed / count, 4) if count else 0.0,
+        'errors': raw['errors'],
+        'in_flight': round(in_flight, 2),
+        'utilization': round(in_flight / capacity, 3) if capacity else None,
+        'server_cpu_cores': round(cores, 2) if cores is not None else None,
+        'rps_per_core': round(throughput / cores, 2) if cores else None,
+    }
+
+
+def start_servers(args: argparse.Namespace, workdir: str) -> Tuple[List[subprocess.Popen], str]:
+    """Launch the stub Power server and gunicorn; returns the processes and the app's base URL"""
+    logs = open(os.path.join(workdir, 'servers.log'), 'w')
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'benchmarks', 'stub_power_server.py'), '--port', str(args.stub_port),
+         '--latency', str(args.upstream_latency), '--jitter', str(args.upstream_jitter),
+         '--failure-rate', str(args.failure_rate)] + (['--fixture', args.fixture] if args.fixture else []),
+        stdout=logs, stderr=subprocess.STDOUT)
+
+    env = dict(os.environ)
+    env.update({
+        'POWER_BASE_URL': f"http://127.0.0.1:{args.stub_port}/api/temporal/daily/point",
+        'POWER_CACHE_DIR': os.path.join(workdir, 'power'),
+        'POWER_STORE_DIR': os.path.join(workdir, 'store'),
+        'PREDICTION_MEMO_PATH': os.path.join(workdir, 'predictions.sqlite'),
+        'CLIMATOLOGY_TILE_DIR': os.path.join(workdir, 'tiles'),
+        'BIND': f"127.0.0.1:{args.port}",
+        'WORKER_MODEL': args.worker_model,
+        'WEB_CONCURRENCY': str(args.workers),
+        'THREADS': str(args.threads),
+    })
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py'], cwd=REPO_ROOT, env=env,
+                              stdout=logs, stderr=subprocess.STDOUT)
+    return [server, stub], f"http://127.0.0.1:{args.port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /api/getWeather')
+    parser.add_argument('--url', type=str, default=None, help='Target a running server instead of launching one')
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 2, 4, 8, 16, 32],
+                        help='Concurrent clients per level (default: 1 2 4 8 16 32)')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per level (default: 15)')
+    parser.add_argument('--warmup', type=float, default=5.0, help='Seconds of untimed load before the sweep (default: 5)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds (default: 60)')
+    parser.add_argument('--locations', type=int, default=200, help='Distinct grid cells in the mix (default: 200)')
+    parser.add_argument('--zipf', type=float, default=1.1,
+                        help='Location popularity exponent; 0 is uniform, higher means more cache hits (default: 1.1)')
+    parser.add_argument('--date-pool', type=int, default=30, help='Distinct target dates in the mix (default: 30)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--upstream-latency', type=float, default=0.5, help='Seconds the stub adds per response (default: 0.5)')
+    parser.add_argument('--upstream-jitter', type=float, default=0.2, help='Extra random stub latency up to this (default: 0.2)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of stub responses that fail (default: 0)')
+    parser.add_argument('--fixture', type=str, default=None, help='Recorded Power response for the stub to replay')
+    parser.add_argument('--worker-model', choices=['sync', 'threaded', 'async'], default='threaded',
+                        help='gunicorn worker model of the launched server (default: threaded)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers of the launched server (default: 2)')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per threaded worker (default: 8)')
+    parser.add_argument('--capacity', type=int, default=None,
+                        help='Requests the server handles at once, for utilization (default: derived for a launched server)')
+    parser.add_argument('--port', type=int, default=8791, help='Port of the launched server (default: 8791)')
+    parser.add_argument('--stub-port', type=int, default=8792, help='Port of the stub Power server (default: 8792)')
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON')
+    args = parser.parse_args()
+
+    mix = RequestMix(args.locations, args.date_pool, args.zipf, args.seed)
+    processes: List[subprocess.Popen] = []
+    workdir = None
+    capacity = args.capacity
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        workdir = tempfile.mkdtemp(prefix='load_test_')
+        processes, base_url = start_servers(args, workdir)
+        if capacity is None and args.worker_model != 'async':
+            capacity = args.workers * (args.threads if args.worker_model == 'threaded' else 1)
+
+    levels = []
+    try:
+        wait_until_ready(f"{base_url}/api/cacheStats", timeout=120)
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup:.0f}s...", flush=True)
+            run_level(base_url, mix, max(args.concurrency), args.warmup, args.timeout, args.seed - 1)
+
+        print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} "
+              f"{'in flight':>9} {'util':>6} {'cpu cores':>9} {'req/s/core':>10}")
+        for concurrency in args.concurrency:
+            pids = process_tree(processes[0].pid) if processes else []
+            cpu_before = cpu_seconds(pids) if pids else None
+            raw = run_level(base_url, mix, concurrency, args.duration, args.timeout, args.seed)
+            cpu_after = cpu_seconds(pids) if pids else None
+            cpu_used = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+
+            level = summarize_level(concurrency, raw, capacity, cpu_used)
+            levels.append(level)
+
+            def show(value, spec):
+                return format(value, spec) if value is not None else '-'
+            print(f"{concurrency:>7} {level['throughput_rps']:>8.1f} {show(level['p50_ms'], '9.1f')} "
+                  f"{show(level['p95_ms'], '9.1f')} {show(level['p99_ms'], '9.1f')} {level['error_rate']:>7.1%} "
+                  f"{level['in_flight']:>9.1f} {show(level['utilization'], '6.0%')} "
+                  f"{show(level['server_cpu_cores'], '9.2f')} {show(level['rps_per_core'], '10.1f')}", flush=True)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != 'output'}
+        with open(args.output, 'w') as f:
+            json.dump({'config': config, 'cpu_count': os.cpu_count(), 'levels': levels}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
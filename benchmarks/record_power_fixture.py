@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Record a NASA Power daily point response as a benchmark fixture
+The stub server and bench_suite.py replay it offline, slicing it to whatever parameters and years a request asks for.
+Run from the repository root (needs network access):
+python benchmarks/record_power_fixture.py --latitude 30.2672 --longitude -97.7431 --output benchmarks/fixtures/austin_2015-2024.json.gz
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Probabilities.nasa_weather_probability import NASAWeatherProbability
+from Probabilities.power_grid import EXACT_COORDINATES
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record a NASA Power response for offline benchmarks')
+    parser.add_argument('--latitude', type=float, required=True, help='Latitude coordinate')
+    parser.add_argument('--longitude', type=float, required=True, help='Longitude coordinate')
+    parser.add_argument('--start-year', type=int, default=2015, help='First year (default: 2015)')
+    parser.add_argument('--end-year', type=int, default=2024, help='Last year (default: 2024)')
+    parser.add_argument('--parameters', nargs='*', default=None,
+                        choices=list(NASAWeatherProbability.AVAILABLE_PARAMETERS.keys()),
+                        help='Parameters to record (default: all available parameters)')
+    parser.add_argument('--output', type=str, required=True, help='Fixture path (.json or .json.gz)')
+    args = parser.parse_args()
+
+    # Exact coordinates, so the fixture records what Power returns for the point itself
+    estimator = NASAWeatherProbability(args.longitude, args.latitude, args.start_year, args.end_year,
+                                       grid=EXACT_COORDINATES)
+    parameters = args.parameters or estimator.default_parameters
+    url = estimator.build_api_url(parameters, f"{args.start_year}0101", f"{args.end_year}1231")
+    data = estimator.fetch_api_data(url, args.start_year, args.end_year)
+    if 'properties' not in data:
+        print("Error: Failed to retrieve data from NASA API")
+        sys.exit(1)
+
+    # Provenance travels with the fixture so benchmark results can say where their data came from
+    data['fixture'] = {
+        'source': url,
+        'recorded': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'synthetic': False,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    opener = gzip.open if args.output.endswith('.gz') else open
+    with opener(args.output, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    print(f"Recorded {len(data['properties']['parameter'])} parameters to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the NASA Power daily point endpoint
+Serves synthetic (or recorded fixture) responses with configurable latency and failure injection.
+Point the estimator at it with POWER_BASE_URL=http://127.0.0.1:<port>/api/temporal/daily/point
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_power import synthetic_power_response
+
+
+@lru_cache(maxsize=64)
+def synthetic_body(parameters: str, start: str, end: str, longitude: str, latitude: str) -> bytes:
+    """Encoded synthetic response, seeded by location so different places get different data"""
+    # crc32 rather than hash(): string hashes are randomized per process, and runs must be reproducible
+    seed = zlib.crc32(f"{longitude},{latitude}".encode('utf-8'))
+    data = synthetic_power_response(parameters.split(','), int(start[:4]), int(end[:4]),
+                                    float(longitude), float(latitude), seed=seed)
+    return json.dumps(data).encode('utf-8')
+
+
+def load_fixture(path: str) -> dict:
+    """Read a recorded Power response (.json or .json.gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def fixture_body(fixture: dict, parameters: str, start: str, end: str) -> bytes:
+    """Slice a recorded response down to the requested parameters and date range"""
+    wanted = parameters.split(',')
+    source = fixture['properties']['parameter']
+    sliced = {
+        param: {day: value for day, value in source[param].items() if start <= day <= end}
+        for param in wanted if param in source
+    }
+    data = dict(fixture)
+    data['properties'] = {'parameter': sliced}
+    return json.dumps(data).encode('utf-8')
+
+
+class StubPowerServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stub configuration and request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 failure_status: int = 503, fixture: Optional[dict] = None, seed: int = 0):
+        super().__init__(address, StubPowerHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.fixture = fixture
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests_served = 0
+        self.failures_injected = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/temporal/daily/point"
+
+
+class StubPowerHandler(BaseHTTPRequestHandler):
+    """Handles GET /api/temporal/daily/point like the real endpoint"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server: StubPowerServer = self.server
+        url = urlparse(self.path)
+        if url.path != '/api/temporal/daily/point':
+            self.send_body(404, b'{"messages": ["not found"]}')
+            return
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            args = (query['parameters'], query['start'], query['end'])
+            location = (query['longitude'], query['latitude'])
+        except KeyError as e:
+            self.send_body(422, json.dumps({'messages': [f'missing {e.args[0]}']}).encode('utf-8'))
+            return
+
+        with server.lock:
+            server.requests_served += 1
+            delay = server.latency + server.rng.uniform(0, server.jitter)
+            fail = server.rng.random() < server.failure_rate
+            if fail:
+                server.failures_injected += 1
+        if delay:
+            time.sleep(delay)
+
+        if fail:
+            self.send_body(server.failure_status, b'{"messages": ["injected failure"]}')
+            return
+
+        if server.fixture is not None:
+            body = fixture_body(server.fixture, *args)
+        else:
+            body = synthetic_body(*args, *location)
+        self.send_body(200, body)
+
+
+def start_stub_server(port: int = 0, **kwargs) -> StubPowerServer:
+    """
+    Start a stub server on a background thread
+
+    Args:
+        port: Port to bind on 127.0.0.1 (0 picks a free port)
+        **kwargs: latency, jitter, failure_rate, failure_status, fixture, seed
+
+    Returns:
+        The running server (call shutdown() to stop it)
+    """
+    server = StubPowerServer(('127.0.0.1', port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the NASA Power daily point API')
+    parser.add_argument('--port', type=int, default=8787, help='Port to listen on (default: 8787)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency up to this many seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests answered with an error')
+    parser.add_argument('--failure-status', type=int, default=503, help='HTTP status for injected failures')
+    parser.add_argument('--fixture', type=str, default=None, help='Recorded Power response to serve instead of synthetic data')
+    args = parser.parse_args()
+
+    server = StubPowerServer(('127.0.0.1', args.port), latency=args.latency, jitter=args.jitter,
+                             failure_rate=args.failure_rate, failure_status=args.failure_status,
+                             fixture=load_fixture(args.fixture) if args.fixture else None)
+    print(f"Stub Power API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
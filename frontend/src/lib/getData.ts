@@ -61,8 +61,19 @@ export const WeatherData = z.object({
 
     // ✅ add the new ones seen in your JSON
     T2MWET: z.number(),
-    IMERG_PRECLIQUID_PROB: z.number(),   // (often -999 sentinel is fine; it’s still a number)
+    IMERG_PRECLIQUID_PROB: z.number().optional(),   // absent when Power only has fill values (-999) for the window
     CLRSKY_SFC_SW_DWN: z.number(),
+
+    // trend predictions for the other parameters (present when the parameter has data)
+    T2M_MAX_trend: z.number().optional(),
+    T2M_MIN_trend: z.number().optional(),
+    PRECTOTCORR_trend: z.number().optional(),
+    WS2M_trend: z.number().optional(),
+    WD2M_trend: z.number().optional(),
+    RH2M_trend: z.number().optional(),
+    T2MWET_trend: z.number().optional(),
+    IMERG_PRECLIQUID_PROB_trend: z.number().optional(),
+    CLRSKY_SFC_SW_DWN_trend: z.number().optional(),
   }).strict(),
 
   confidence: z.object({
@@ -74,7 +85,7 @@ export const WeatherData = z.object({
     WD2M: Confidence,
     RH2M: Confidence,
     T2MWET: Confidence,
-    IMERG_PRECLIQUID_PROB: Confidence,
+    IMERG_PRECLIQUID_PROB: Confidence.optional(),
     CLRSKY_SFC_SW_DWN: Confidence,
   }).strict(),
 
@@ -88,7 +99,7 @@ export const WeatherData = z.object({
       WD2M: MeasurementUncertainty,
       RH2M: MeasurementUncertainty,
       T2MWET: MeasurementUncertainty,
-      IMERG_PRECLIQUID_PROB: MeasurementUncertainty,
+      IMERG_PRECLIQUID_PROB: MeasurementUncertainty.optional(),
       CLRSKY_SFC_SW_DWN: MeasurementUncertainty,
     }).strict(),
   }).strict(),
@@ -108,7 +119,7 @@ export const WeatherData = z.object({
       WD2M: nonNegInt,
       RH2M: nonNegInt,
       T2MWET: nonNegInt,
-      IMERG_PRECLIQUID_PROB: nonNegInt,
+      IMERG_PRECLIQUID_PROB: nonNegInt.optional(),
       CLRSKY_SFC_SW_DWN: nonNegInt,
     }).strict(),
 
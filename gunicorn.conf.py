@@ -0,0 +1,39 @@
+# Production server settings. Run with: gunicorn -c gunicorn.conf.py
+#
+# WORKER_MODEL picks how each worker process serves requests:
+#   sync      one request at a time (the simplest, for CPU-bound loads with every location warm)
+#   threaded  THREADS requests at a time, sharing the process caches and connection pool (default)
+#   async     uvicorn workers running asgi.py, keeping many upstream fetches in flight per process
+#
+# The app is preloaded: the master imports it and runs the warm-up (WARM_LOCATIONS_FILE) once, then forks
+# the workers, which share the warm indexes copy-on-write instead of each building its own.
+
+import gc
+import multiprocessing
+import os
+
+WORKER_MODELS = {
+    'sync': ('sync', 'main:create_app()'),
+    'threaded': ('gthread', 'main:create_app()'),
+    'async': ('uvicorn.workers.UvicornWorker', 'asgi:create_app()'),
+}
+
+worker_model = os.environ.get('WORKER_MODEL', 'threaded')
+if worker_model not in WORKER_MODELS:
+    raise ValueError(f"WORKER_MODEL must be one of {', '.join(WORKER_MODELS)}, not {worker_model!r}")
+worker_class, wsgi_app = WORKER_MODELS[worker_model]
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('THREADS', 8)) if worker_model == 'threaded' else 1
+preload_app = True
+
+# A cold location waits for NASA Power, which can take well over gunicorn's default 30 seconds
+timeout = int(os.environ.get('WORKER_TIMEOUT', 120))
+graceful_timeout = 30
+
+
+def when_ready(server):
+    # Everything loaded so far lives for the whole run; moving it out of the collector's reach keeps the
+    # collector from writing to (and so copying) the shared pages in every worker
+    gc.freeze()
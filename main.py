@@ -1,11 +1,92 @@
 # This code only runs the home page of the site and provides api for using the probability calculator
 
-from flask import Flask, render_template, request
+from flask import Flask, Response, g, render_template, request
 from Probabilities.nasa_weather_probability import NASAWeatherProbability
+from Probabilities.power_cache import PowerResponseCache
+from Probabilities.climate_store import ClimateStore
+from Probabilities.batch_prediction import coordinate_error, predict_weather_batch
+from Probabilities.power_session import get_shared_session, reset_shared_session
+from Probabilities.power_stream import streaming_available
+from Probabilities.single_flight import SingleFlight
+from Probabilities.result_memo import ResultMemo
+from Probabilities.climatology_tiles import ClimatologyTiles
+from Probabilities.warm_state import WarmIndexes, warm_up
+from Probabilities.analyze_null_values import load_locations
+from Probabilities.metrics import cache_families, get_shared_metrics, upstream_families
+from Probabilities.request_profiler import RequestProfiler
+from Probabilities.response_encoding import ResponseEncoder, parse_fields, shape_result
 from datetime import date
+import hmac
+import os
+import time
 
 app = Flask(__name__)
 
+# Shared across requests (and gunicorn workers) so repeated locations are served from disk. The climate store
+# below keeps every downloaded series; with ijson installed it is filled from streamed responses that never pass
+# through this cache, so the cache only exists for the buffered fallback (None otherwise)
+CACHE_DIR = os.environ.get('POWER_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'power'))
+response_cache = None if streaming_available() else PowerResponseCache(
+    CACHE_DIR,
+    max_bytes=int(os.environ.get('POWER_CACHE_MAX_BYTES', 512 * 1024 * 1024)),
+)
+
+# Daily series per grid cell and parameter; widening the year range only downloads the missing years
+climate_store = ClimateStore(
+    os.environ.get('POWER_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'store'))
+)
+
+# Concurrent requests for the same location download it once, also across gunicorn workers
+upstream_flights = SingleFlight(os.environ.get('POWER_LOCK_DIR', os.path.join(CACHE_DIR, 'locks')))
+
+# Finished predictions per grid cell and date; an empty PREDICTION_MEMO_PATH keeps them in-process only
+prediction_memo = ResultMemo(
+    max_entries=int(os.environ.get('PREDICTION_MEMO_ENTRIES', 4096)),
+    shared_path=os.environ.get('PREDICTION_MEMO_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'predictions.sqlite')) or None,
+)
+
+# Precomputed climatology for the busiest regions (build with Probabilities/build_climatology_tiles.py);
+# cells outside every tile are fetched live
+climatology_tiles = ClimatologyTiles(
+    os.environ.get('CLIMATOLOGY_TILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'tiles'))
+)
+
+# Indexes of hot locations pinned by create_app before the workers fork; other cells go on to the tiles
+warm_indexes = WarmIndexes(climatology_tiles)
+
+# Stage and request latency histograms of this process, served on /metrics
+stage_metrics = get_shared_metrics()
+
+# Opt-in profiles of single predictions: a PROFILE_SAMPLE_RATE fraction of them, plus any /api/getWeather request
+# whose X-Profile header matches PROFILE_TOKEN (the header is ignored while no token is set)
+request_profiler = RequestProfiler(
+    os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'profiles')),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    max_profiles=int(os.environ.get('PROFILE_MAX_FILES', 200)),
+)
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+
+# Prediction responses: compact JSON, gzip (or brotli) above COMPRESS_MIN_BYTES, and ETags with a
+# RESPONSE_MAX_AGE Cache-Control, since climatology for past years does not change (0 sends no-store)
+response_encoder = ResponseEncoder(
+    max_age=int(os.environ.get('RESPONSE_MAX_AGE', 86400)),
+    min_compress_bytes=int(os.environ.get('COMPRESS_MIN_BYTES', 1400)),
+)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None and request.endpoint is not None:
+        stage_metrics.observe('weather_request_seconds', time.perf_counter() - started, endpoint = request.endpoint)
+    return response
+
+
 # ------ Pages ------
 @app.route('/')
 def index():
@@ -13,24 +94,172 @@ def index():
 
 
 # ------ APIs ------
+WEATHER_PARAMETERS = ['T2M', 'T2M_MAX', 'T2M_MIN', 'PRECTOTCORR', 'WS2M', 'WD2M', 'RH2M', "T2MWET", "IMERG_PRECLIQUID_PROB", "CLRSKY_SFC_SW_DWN"]
+
+# Historical range used for every prediction
+DATA_START_YEAR = 2015
+DATA_END_YEAR = 2024
+
+# Upper bound on dates per multi-date request (one full year, including Feb 29)
+MAX_DATES_PER_REQUEST = 366
+
+# Batch endpoint limits: items per request and locations fetched from NASA at the same time
+MAX_BATCH_ITEMS = int(os.environ.get('MAX_BATCH_ITEMS', 1000))
+BATCH_FETCH_WORKERS = int(os.environ.get('BATCH_FETCH_WORKERS', 8))
+
+
+def build_estimator(latitude, longitude):
+    return NASAWeatherProbability(
+        longitude = longitude,
+        latitude = latitude,
+        start_year = DATA_START_YEAR,
+        end_year = DATA_END_YEAR,
+        cache = response_cache,
+        store = climate_store,
+        single_flight = upstream_flights,
+        memo = prediction_memo,
+        tiles = warm_indexes,
+        profiler = request_profiler,
+    )
+
+
+def profile_requested():
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(request.headers.get('X-Profile', ''), PROFILE_TOKEN)
+
+
+def response_shape():
+    # ?fields=probabilities,metadata.grid_cell keeps only those parts of each prediction; ?precision=1 rounds floats
+    return parse_fields(request.args.get('fields', type=str)), request.args.get('precision', type=int)
+
+
+def json_response(result, cacheable = True):
+    with stage_metrics.time('serialization'):
+        status, headers, body = response_encoder.encode(
+            result,
+            accept_encoding = request.headers.get('Accept-Encoding'),
+            if_none_match = request.headers.get('If-None-Match'),
+            cacheable = cacheable,
+        )
+        return Response(body, status = status, headers = headers)
+
+
 @app.route('/api/getWeather', methods=['GET'])
 def getWeather():
     latitude = request.args.get('latitude', type=float)
     longitude = request.args.get('longitude', type=float)
     target_date = request.args.get('date', type=str)
 
-    estimator = NASAWeatherProbability(
-        longitude = longitude,
-        latitude = latitude,
-        start_year = 2015,
-        end_year = 2024,
-    )
+    if latitude is None or longitude is None or not target_date:
+        return {'error': 'latitude, longitude and date are required'}, 400
+    error = coordinate_error(latitude, longitude)
+    if error is not None:
+        return {'error': error}, 400
+
+    estimator = build_estimator(latitude, longitude)
+
+    result = estimator.predict_weather_for_date(target_date, WEATHER_PARAMETERS, tolerance_days=7, profile = profile_requested())
+
+    # An empty result means the prediction failed (e.g. NASA Power was unreachable) and must not be cached
+    response = json_response(shape_result(result, *response_shape()), cacheable = bool(result))
+    if estimator.last_profile:
+        # Names the files in PROFILE_DIR holding this request's profile
+        response.headers['X-Profile'] = estimator.last_profile
+    return response
+
+
+@app.route('/api/getWeatherForDates', methods=['GET'])
+def getWeatherForDates():
+    latitude = request.args.get('latitude', type=float)
+    longitude = request.args.get('longitude', type=float)
+    dates = [d for d in request.args.get('dates', default='', type=str).split(',') if d]
+
+    if latitude is None or longitude is None:
+        return {'error': 'latitude and longitude are required'}, 400
+    error = coordinate_error(latitude, longitude)
+    if error is not None:
+        return {'error': error}, 400
+    if not dates:
+        return {'error': 'dates must be a comma-separated list of dates'}, 400
+    if len(dates) > MAX_DATES_PER_REQUEST:
+        return {'error': f'at most {MAX_DATES_PER_REQUEST} dates per request'}, 400
+
+    estimator = build_estimator(latitude, longitude)
+
+    # Fetches the location once and answers every date from the same climatology index
+    results = estimator.predict_weather_for_dates(dates, WEATHER_PARAMETERS, tolerance_days=7)
+
+    paths, digits = response_shape()
+    return json_response({target_date: shape_result(result, paths, digits) for target_date, result in results.items()},
+                         cacheable = bool(results) and all(results.values()))
+
+
+@app.route('/api/getWeatherBatch', methods=['POST'])
+def getWeatherBatch():
+    payload = request.get_json(silent=True)
+    items = payload.get('items') if isinstance(payload, dict) else payload
+
+    if not isinstance(items, list) or not items:
+        return {'error': 'body must be a JSON list of {latitude, longitude, date} items (or {"items": [...]})'}, 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return {'error': f'at most {MAX_BATCH_ITEMS} items per request'}, 400
+
+    results = predict_weather_batch(items, build_estimator, WEATHER_PARAMETERS, tolerance_days=7, max_workers=BATCH_FETCH_WORKERS)
+
+    paths, digits = response_shape()
+    for entry in results:
+        if 'result' in entry:
+            entry['result'] = shape_result(entry['result'], paths, digits)
+
+    # POST responses are not cached; large batches still benefit from compression
+    return json_response({'results': results}, cacheable = False)
+
+
+@app.route('/api/cacheStats', methods=['GET'])
+def cacheStats():
+    stats = response_cache.stats() if response_cache is not None else {}
+    stats['predictions'] = prediction_memo.stats()
+    stats['tiles'] = climatology_tiles.stats()
+    stats['warm'] = warm_indexes.stats()
+    return stats
+
+
+@app.route('/api/upstreamStats', methods=['GET'])
+def upstreamStats():
+    stats = get_shared_session().stats()
+    stats['coalescing'] = upstream_flights.stats()
+    return stats
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    caches = {
+        'predictions': prediction_memo.stats(),
+        'tiles': climatology_tiles.stats(),
+        'warm': warm_indexes.stats(),
+    }
+    if response_cache is not None:
+        caches['responses'] = response_cache.stats()
+    text = stage_metrics.render() + cache_families(caches) + upstream_families(get_shared_session().stats(), upstream_flights.stats())
+    return Response(text, content_type = 'text/plain; version=0.0.4; charset=utf-8')
+
 
-    parameters = ['T2M', 'T2M_MAX', 'T2M_MIN', 'PRECTOTCORR', 'WS2M', 'WD2M', 'RH2M', "T2MWET", "IMERG_PRECLIQUID_PROB", "CLRSKY_SFC_SW_DWN"]
+def create_app():
+    """
+    App factory for production servers (see gunicorn.conf.py)
 
-    result = estimator.predict_weather_for_date(target_date, parameters, tolerance_days=7)
+    With gunicorn's preload_app this runs once in the master: the indexes of the hot locations listed in
+    WARM_LOCATIONS_FILE (JSON or CSV with latitude and longitude, as for analyze_null_values) are built from the
+    climate store, fetching cells it does not hold yet, and every forked worker shares them copy-on-write.
+    """
+    locations_file = os.environ.get('WARM_LOCATIONS_FILE')
+    if locations_file:
+        summary = warm_up(load_locations(locations_file), build_estimator, WEATHER_PARAMETERS, warm_indexes, max_workers = BATCH_FETCH_WORKERS)
+        print(f"Warm-up: {summary['pinned']} of {summary['cells']} grid cells pinned "
+              f"({summary['locations']} locations, {summary['failed']} failed) in {summary['seconds']}s")
 
-    return result
+        # Connections opened by the warm-up must not be inherited by the workers
+        reset_shared_session()
+    return app
 
 
 if __name__ == '__main__':
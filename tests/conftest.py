@@ -0,0 +1,42 @@
+"""
+Shared fixtures: a stub Power server on a free port and the Flask app pointed at it
+The app keeps its caches, store, tiles and profiles in a temporary directory
+"""
+
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+from stub_power_server import start_stub_server
+
+
+@pytest.fixture
+def stub_server():
+    """Stub Power API without failures; tests may change failure_rate/failure_status while it runs"""
+    server = start_stub_server(seed=1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """main.py imported once, with every on-disk state under a temporary directory"""
+    state = tmp_path_factory.mktemp('state')
+    for name in ('POWER_CACHE_DIR', 'POWER_STORE_DIR', 'CLIMATOLOGY_TILE_DIR', 'PROFILE_DIR'):
+        os.environ[name] = str(state / name.lower())
+    os.environ['PREDICTION_MEMO_PATH'] = ''
+    import main
+    return main
+
+
+@pytest.fixture
+def client(app_module, stub_server, monkeypatch):
+    """Flask test client whose upstream requests go to the stub server"""
+    monkeypatch.setenv('POWER_BASE_URL', stub_server.base_url)
+    return app_module.app.test_client()
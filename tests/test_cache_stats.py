@@ -0,0 +1,14 @@
+"""Cache reporting: only cache layers the server actually fills are reported"""
+
+from Probabilities.power_stream import streaming_available
+
+
+def test_response_cache_exists_only_without_streaming(app_module):
+    assert (app_module.response_cache is None) == streaming_available()
+
+
+def test_cache_stats_and_metrics_report_built_caches(client, app_module):
+    stats = client.get('/api/cacheStats').get_json()
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert {'predictions', 'tiles', 'warm'} <= set(stats)
+    assert ('cache="responses"' in metrics) == (app_module.response_cache is not None)
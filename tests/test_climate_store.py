@@ -0,0 +1,45 @@
+"""Climate store fills: parameters a response leaves out are stored, so the cell is downloaded once"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+from stub_power_server import start_stub_server
+from synthetic_power import synthetic_power_response
+
+from Probabilities.climate_store import ClimateStore, DailySeries
+from Probabilities.nasa_weather_probability import NASAWeatherProbability
+
+ABSENT = 'IMERG_PRECLIQUID_PROB'
+
+
+@pytest.fixture
+def server_without_imerg():
+    """Stub serving a recorded response without IMERG, as Power does outside its coverage"""
+    parameters = [p for p in NASAWeatherProbability.AVAILABLE_PARAMETERS if p != ABSENT]
+    server = start_stub_server(fixture=synthetic_power_response(parameters, 2015, 2024, seed=1))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_with_parameters_adds_missing_days():
+    series = DailySeries(np.datetime64('2020-01-01').item(), {'T2M': np.arange(3.0)})
+    filled = series.with_parameters(['T2M', ABSENT])
+    assert filled.base_date == series.base_date
+    assert np.array_equal(filled.values['T2M'], series.values['T2M'])
+    assert np.isnan(filled.values[ABSENT]).all() and len(filled.values[ABSENT]) == 3
+    assert series.with_parameters(['T2M']) is series
+
+
+def test_parameter_missing_from_response_is_not_fetched_again(server_without_imerg, tmp_path, monkeypatch):
+    monkeypatch.setenv('POWER_BASE_URL', server_without_imerg.base_url)
+    store = ClimateStore(str(tmp_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = NASAWeatherProbability(-97.7, 30.2, 2015, 2024, store=store).predict_weather_for_date('07/15')
+        second = NASAWeatherProbability(-97.7, 30.2, 2015, 2024, store=store).predict_weather_for_date('07/15')
+    assert first and first == second
+    assert server_without_imerg.requests_served == 1
+    assert f'{ABSENT}_trend' not in first['predicted_values']
+    assert first['metadata']['data_quality'][ABSENT]['valid'] == 0
@@ -0,0 +1,38 @@
+"""Coordinates: missing, non-finite and out-of-range locations are answered with 400"""
+
+import pytest
+
+from Probabilities.batch_prediction import coordinate_error, parse_batch_item
+
+INVALID = [('nan', '-97.7'), ('30.2', 'nan'), ('inf', '-97.7'), ('30.2', '-inf'), ('95', '-97.7'),
+           ('-90.5', '-97.7'), ('30.2', '181'), ('30.2', '-180.01')]
+
+
+@pytest.mark.parametrize('latitude, longitude', INVALID)
+def test_get_weather_rejects_invalid_coordinates(client, latitude, longitude):
+    response = client.get(f'/api/getWeather?latitude={latitude}&longitude={longitude}&date=07/04')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('latitude, longitude', INVALID)
+def test_get_weather_for_dates_rejects_invalid_coordinates(client, latitude, longitude):
+    response = client.get(f'/api/getWeatherForDates?latitude={latitude}&longitude={longitude}&dates=07/04')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('query', ['longitude=-97.7&date=07/04', 'latitude=abc&longitude=-97.7&date=07/04'])
+def test_get_weather_rejects_missing_coordinates(client, query):
+    assert client.get(f'/api/getWeather?{query}').status_code == 400
+
+
+@pytest.mark.parametrize('latitude, longitude', [(90, 180), (-90, -180), (0, 0), (30.2, -97.7)])
+def test_coordinate_error_accepts_the_globe(latitude, longitude):
+    assert coordinate_error(latitude, longitude) is None
+
+
+@pytest.mark.parametrize('latitude, longitude', [(float(lat), float(lon)) for lat, lon in INVALID])
+def test_batch_item_rejects_invalid_coordinates(latitude, longitude):
+    parsed, error = parse_batch_item({'latitude': latitude, 'longitude': longitude, 'date': '07/04'})
+    assert parsed is None
+    assert error == coordinate_error(latitude, longitude)
@@ -0,0 +1,42 @@
+"""Date parsing: calendar checks before any month/day table is indexed"""
+
+import pytest
+
+from Probabilities.nasa_weather_probability import NASAWeatherProbability
+
+
+@pytest.fixture
+def estimator():
+    return NASAWeatherProbability(-97.7, 30.2, 2015, 2024)
+
+
+@pytest.mark.parametrize('date_str, expected', [
+    ('07/04', (7, 4)),
+    ('2025/07/04', (7, 4)),
+    ('20250704', (7, 4)),
+    ('02/29', (2, 29)),
+    ('12/31', (12, 31)),
+])
+def test_parse_date_string_accepts_calendar_dates(estimator, date_str, expected):
+    assert estimator.parse_date_string(date_str) == expected
+
+
+@pytest.mark.parametrize('date_str', ['13/01', '2025/13/05', '20251301', '00/10', '02/30', '04/31', '07/00', 'abc', '1/2/3/4'])
+def test_parse_date_string_rejects_invalid_dates(estimator, date_str):
+    with pytest.raises(ValueError):
+        estimator.parse_date_string(date_str)
+
+
+@pytest.mark.parametrize('date_str', ['13/01', '2025/13/05', '20251301', '02/30'])
+def test_get_weather_answers_invalid_date_with_empty_result(client, date_str):
+    response = client.get(f'/api/getWeather?latitude=30.2&longitude=-97.7&date={date_str}')
+    assert response.status_code == 200
+    assert response.get_json() == {}
+
+
+def test_get_weather_for_dates_reports_invalid_date(client):
+    response = client.get('/api/getWeatherForDates?latitude=30.2&longitude=-97.7&dates=13/01,07/04')
+    assert response.status_code == 200
+    results = response.get_json()
+    assert results['13/01'] == {}
+    assert results['07/04']['probabilities']
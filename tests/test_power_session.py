@@ -0,0 +1,103 @@
+"""Upstream retries: 429/5xx are retried with bounded jittered backoff and every attempt is counted"""
+
+import random
+
+import pytest
+import requests
+
+from Probabilities.power_session import PowerSession, get_shared_session
+
+QUERY = '?parameters=T2M&community=RE&longitude=-97.7&latitude=30.2&start=20200101&end=20201231&format=JSON'
+
+
+def delta(before, after):
+    return {name: after[name] - before[name] for name in ('requests', 'attempts', 'retries', 'failures')}
+
+
+@pytest.mark.parametrize('status', sorted(PowerSession.RETRY_STATUSES))
+def test_retryable_status_is_retried_until_attempts_run_out(stub_server, status):
+    stub_server.failure_rate = 1.0
+    stub_server.failure_status = status
+    session = PowerSession(max_retries=2, backoff_base=0.0)
+
+    response = session.get(stub_server.base_url + QUERY)
+
+    assert response.status_code == status
+    assert stub_server.requests_served == 3
+    stats = session.stats()
+    assert {name: stats[name] for name in ('requests', 'attempts', 'retries', 'failures')} == {
+        'requests': 1, 'attempts': 3, 'retries': 2, 'failures': 1}
+    assert [(a['attempt'], a['status']) for a in stats['recent_attempts']] == [(1, status), (2, status), (3, status)]
+
+
+def test_other_errors_are_not_retried(stub_server):
+    stub_server.failure_rate = 1.0
+    stub_server.failure_status = 422
+    session = PowerSession(max_retries=2, backoff_base=0.0)
+
+    assert session.get(stub_server.base_url + QUERY).status_code == 422
+    assert stub_server.requests_served == 1
+    assert session.stats()['retries'] == 0
+
+
+def test_request_recovers_after_a_failed_attempt(stub_server, monkeypatch):
+    stub_server.failure_rate = 1.0
+    session = PowerSession(max_retries=3)
+
+    def heal(retry, response=None):
+        # The outage ends while the client backs off
+        stub_server.failure_rate = 0.0
+        return 0.0
+
+    monkeypatch.setattr(session, 'backoff_delay', heal)
+    response = session.get(stub_server.base_url + QUERY)
+
+    assert response.status_code == 200
+    assert response.json()['properties']['parameter']['T2M']
+    stats = session.stats()
+    assert (stats['attempts'], stats['retries'], stats['failures']) == (2, 1, 0)
+    assert [a['status'] for a in stats['recent_attempts']] == [503, 200]
+    assert stats['recent_attempts'][-1]['bytes'] > 0
+
+
+def test_backoff_delay_jitter_stays_within_exponential_bound():
+    session = PowerSession(backoff_base=0.5, backoff_max=3.0)
+    random.seed(7)
+    for retry, bound in ((1, 0.5), (2, 1.0), (3, 2.0), (4, 3.0), (10, 3.0)):
+        delays = [session.backoff_delay(retry) for _ in range(200)]
+        assert all(0.0 <= d <= bound for d in delays)
+        # Full jitter spreads retries over the whole interval
+        assert max(delays) > bound * 0.8 and min(delays) < bound * 0.2
+
+
+@pytest.mark.parametrize('retry_after, expected', [('2', 2.0), ('60', 3.0), ('-1', 0.0)])
+def test_backoff_delay_honours_retry_after(retry_after, expected):
+    session = PowerSession(backoff_base=0.5, backoff_max=3.0)
+    response = requests.Response()
+    response.headers['Retry-After'] = retry_after
+    assert session.backoff_delay(1, response) == expected
+
+
+def test_upstream_stats_count_retries_and_recovery(client, stub_server, monkeypatch):
+    session = get_shared_session()
+    monkeypatch.setattr(session, 'backoff_delay', lambda retry, response=None: 0.0)
+    # A cell no other test has fetched, so the request goes upstream
+    url = '/api/getWeather?latitude=-12.34&longitude=56.78&date=07/15'
+
+    stub_server.failure_rate = 1.0
+    before = client.get('/api/upstreamStats').get_json()
+    assert client.get(url).get_json() == {}
+    during = client.get('/api/upstreamStats').get_json()
+    failed = delta(before, during)
+    assert failed['requests'] >= 1
+    assert failed['failures'] == failed['requests']
+    assert failed['attempts'] == failed['requests'] * (session.max_retries + 1)
+    assert failed['retries'] == failed['requests'] * session.max_retries
+    assert during['recent_attempts'][-1]['status'] == 503
+
+    stub_server.failure_rate = 0.0
+    assert client.get(url).get_json()['probabilities']
+    recovered = delta(during, client.get('/api/upstreamStats').get_json())
+    assert recovered['requests'] >= 1
+    assert recovered['attempts'] == recovered['requests']
+    assert recovered['retries'] == recovered['failures'] == 0
@@ -0,0 +1,33 @@
+"""Memoized predictions: the index and sample paths never answer for each other"""
+
+import contextlib
+import io
+
+from Probabilities.nasa_weather_probability import NASAWeatherProbability
+from Probabilities.result_memo import ResultMemo
+
+# Dates where, on the stub's data, the index and sample paths round a statistic differently
+DATES = ['01/29', '06/11', '07/09', '07/17']
+
+
+def predict(memo, batch_first):
+    """Single-date predictions, optionally after a batch request for the same dates filled the memo"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if batch_first:
+            NASAWeatherProbability(-97.7, 30.2, 2015, 2024, memo=memo).predict_weather_for_dates(DATES)
+        estimator = NASAWeatherProbability(-97.7, 30.2, 2015, 2024, memo=memo)
+        return {date: estimator.predict_weather_for_date(date) for date in DATES}
+
+
+def test_single_date_answer_does_not_depend_on_batch_memoizing_first(stub_server, monkeypatch):
+    monkeypatch.setenv('POWER_BASE_URL', stub_server.base_url)
+    alone = predict(ResultMemo(), batch_first=False)
+    after_batch = predict(ResultMemo(), batch_first=True)
+    assert all(alone[date] for date in DATES)
+    assert after_batch == alone
+
+
+def test_make_key_separates_computation_methods():
+    args = (30.25, -97.5, 2015, 2024, ['T2M'], 7, 15, 7)
+    assert ResultMemo.make_key(*args, method='index') != ResultMemo.make_key(*args, method='samples')
+    assert ResultMemo.make_key(*args) == ResultMemo.make_key(*args, method='samples')